@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+'''
+MetMast Benchmarks
+-------
+
+Measure latency, throughput and peak memory of the MetMast import and
+analysis methods on synthetic records, and compare against stored
+baselines.
+
+Usage:
+
+    python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py --save
+    python benchmarks/run_benchmarks.py --max-rows 320000000 --repeat 5
+
+The default --max-rows skips the 1 Hz records, which need 32 million rows
+per year. Pass --max-rows 320000000 to run the full 10 year 1 Hz grid.
+Exits with status 1 if any case is slower, or uses more memory, than its
+baseline by more than the tolerance.
+
+'''
+from __future__ import print_function
+from __future__ import division
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import timeit
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+import climatic as cl
+import synthetic
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+INTERVALS = (('10Min', 600), ('1Min', 60), ('1Hz', 1))
+YEARS = (1, 5, 10)
+CHANNELS = (3, 12, 30)
+BASELINE_PATH = os.path.join(BENCH_DIR, 'baselines.json')
+
+
+def measure(func, repeat=3):
+    '''Best wall clock time over repeat calls, and the peak traced memory
+    of one extra call in MB (None without tracemalloc)'''
+    times = []
+    for x in range(repeat):
+        start = timeit.default_timer()
+        func()
+        times.append(timeit.default_timer() - start)
+    peak = None
+    if tracemalloc is not None:
+        tracemalloc.start()
+        func()
+        peak = tracemalloc.get_traced_memory()[1]/1e6
+        tracemalloc.stop()
+    return min(times), peak
+
+
+def cases(max_rows):
+    '''All (label, interval, years, channels, rows) benchmark cases at or
+    below max_rows'''
+    selected = []
+    for label, interval in INTERVALS:
+        for years in YEARS:
+            rows = int(years*365*86400/interval)
+            if rows > max_rows:
+                continue
+            for channels in CHANNELS:
+                selected.append((label, interval, years, channels, rows))
+    return selected
+
+
+def run_case(label, interval, years, channels, rows, repeat=3,
+             max_import_rows=1000000, workdir=None):
+    '''Benchmark each MetMast method on one synthetic record'''
+    frame = synthetic.mast_frame(years=years, interval=interval,
+                                 channels=channels)
+    columns = frame.columns.tolist()
+    ws, wd = columns[0], columns[2 % len(columns)]
+    mast = cl.MetMast(height=80)
+    mast.data = frame
+    mast.interval = interval
+
+    methods = [('binned', lambda: mast.binned(column=ws,
+                                              bins=np.arange(0, 41, 1))),
+               ('sectorwise', lambda: mast.sectorwise(column=wd, plot=None)),
+               ('weibull', lambda: mast.weibull(column=ws, plot=None)),
+               ('data_overlap', mast.data_overlap)]
+    if rows <= max_import_rows and workdir is not None:
+        path = os.path.join(workdir, 'synthetic.csv')
+        synthetic.write_csv(frame, path)
+        importer = cl.MetMast()
+        methods.insert(0, ('wind_import', lambda: importer.wind_import(
+            path, columns=columns, header_row=0, time_col=0)))
+        methods.insert(1, ('logger_import', lambda: importer.logger_import(
+            path, columns=columns)))
+
+    results = []
+    for method, func in methods:
+        seconds, peak = measure(func, repeat=repeat)
+        key = '{0} {1} {2}y {3}ch'.format(method, label, years, channels)
+        results.append({'case': key, 'method': method, 'rows': rows,
+                        'channels': channels, 'seconds': seconds,
+                        'rows_per_s': rows/seconds if seconds else None,
+                        'peak_mb': peak})
+    return results
+
+
+def compare(results, baselines, tolerance=0.25):
+    '''Flag results slower or larger than baseline by more than tolerance'''
+    regressions = []
+    for result in results:
+        base = baselines.get(result['case'])
+        if base is None:
+            continue
+        for metric in ('seconds', 'peak_mb'):
+            if result[metric] is None or base.get(metric) is None:
+                continue
+            if result[metric] > base[metric]*(1 + tolerance):
+                regressions.append((result['case'], metric, base[metric],
+                                    result[metric]))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=('Benchmark MetMast methods '
+                                                  'on synthetic data'))
+    parser.add_argument('--max-rows', type=int, default=5000000,
+                        help='skip records longer than this')
+    parser.add_argument('--max-import-rows', type=int, default=1000000,
+                        help=('skip wind_import and logger_import on records '
+                              'longer than this'))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='allowed fractional slowdown over baseline')
+    parser.add_argument('--baselines', default=BASELINE_PATH)
+    parser.add_argument('--save', action='store_true',
+                        help='store these results as the new baselines')
+    parser.add_argument('--output', help='write results to a JSON file')
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp()
+    results = []
+    try:
+        for case in cases(args.max_rows):
+            results.extend(run_case(*case, repeat=args.repeat,
+                                    max_import_rows=args.max_import_rows,
+                                    workdir=workdir))
+    finally:
+        shutil.rmtree(workdir)
+
+    row = '{0:<36}{1:>12}{2:>14}{3:>12}'
+    print(row.format('Case', 'Seconds', 'Rows/s', 'Peak MB'))
+    for result in results:
+        peak = result['peak_mb']
+        print(row.format(result['case'], '{0:.4f}'.format(result['seconds']),
+                         '{0:.0f}'.format(result['rows_per_s'] or 0),
+                         '-' if peak is None else '{0:.1f}'.format(peak)))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.save:
+        with open(args.baselines, 'w') as f:
+            json.dump(dict((x['case'], {'seconds': x['seconds'],
+                                        'peak_mb': x['peak_mb']})
+                           for x in results), f, indent=2, sort_keys=True)
+        print('Baselines saved to {0}'.format(args.baselines))
+        return 0
+
+    if not os.path.exists(args.baselines):
+        print('No baselines found. Run with --save to create them.')
+        return 0
+    with open(args.baselines) as f:
+        baselines = json.load(f)
+    regressions = compare(results, baselines, tolerance=args.tolerance)
+    for case, metric, base, current in regressions:
+        print('REGRESSION {0}: {1} {2:.4f} -> {3:.4f}'.format(case, metric,
+                                                              base, current))
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+'''
+Synthetic Met Mast Data
+-------
+
+Generators for synthetic met mast records of any length, sampling interval
+and channel count, for benchmarking
+
+'''
+from __future__ import division
+import numpy as np
+import pandas as pd
+
+
+def columns(channels):
+    '''MetMast style ('Signal', Height) columns. Channels are added in
+    groups of wind speed mean, wind speed standard deviation and wind
+    direction, one group per height, spread from 80 m down to 10 m.'''
+    signals = ['WS Mean', 'WS StdDev', 'WD Mean']
+    step = 70//max((channels + 2)//3 - 1, 1)
+    cols = []
+    for i in range(channels):
+        height = 80 - step*(i//3)
+        cols.append(('{0} {1}'.format(signals[i % 3], i//3 + 1), height))
+    return cols
+
+
+def mast_frame(years=1, interval=600, channels=3, seed=0,
+               start='2010/01/01'):
+    '''Synthetic met mast DataFrame
+
+    Parameters:
+    ___________
+    years: float, default 1
+        Record length in years
+    interval: float, default 600
+        Sampling interval in seconds
+    channels: int, default 3
+        Number of data columns
+    seed: int, default 0
+        Random seed
+
+    Returns:
+    ________
+    DataFrame with a DatetimeIndex. Wind speeds are Weibull distributed
+    with a diurnal cycle, directions follow a slow random walk.
+    '''
+    rs = np.random.RandomState(seed)
+    rows = int(years*365*86400/interval)
+    index = pd.date_range(start, periods=rows,
+                          freq=pd.offsets.Second(int(interval)))
+    hours = np.arange(rows)*interval/3600
+    diurnal = 1 + 0.15*np.sin(2*np.pi*hours/24)
+    base = rs.weibull(2.1, rows)*8*diurnal
+    walk = np.cumsum(rs.normal(0, 3, rows)) % 360
+    data = {}
+    for column in columns(channels):
+        shear = (column[1]/80)**0.2
+        if column[0].startswith('WS Mean'):
+            values = base*shear
+        elif column[0].startswith('WS StdDev'):
+            values = base*shear*rs.uniform(0.08, 0.18, rows)
+        else:
+            values = (walk + rs.normal(0, 5, rows)) % 360
+        data[column] = np.round(values, 2)
+    return pd.DataFrame(data, index=index, columns=columns(channels))
+
+
+def write_csv(frame, path):
+    '''Write a synthetic frame as a logger style CSV, with a time stamp
+    column and one header row'''
+    out = frame.copy()
+    out.columns = ['{0} {1}m'.format(x, y) for x, y in frame.columns]
+    out.index.name = 'Time Stamp'
+    out.to_csv(path, date_format='%m/%d/%Y %H:%M:%S')
@@ -1,4 +1,5 @@
 ﻿  # -*- coding: utf-8 -*-
 
 from .mast import MetMast
+from .farm import Site
 from .plottools import wind_rose
@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+'''
+Cache
+-------
+
+Opt-in memoization of MetMast analysis results. Results are keyed by
+method, arguments and the data version of the mast, so any new data makes
+older results unreachable, and the cache is bounded with least recently
+used eviction.
+
+    >>> mast.enable_cache(maxsize=256)
+    >>> mast.weibull(column=('WS Mean 1', 50))
+    >>> mast.cache_stats()
+
+'''
+from __future__ import division
+import copy
+import functools
+import hashlib
+import inspect
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+
+class LRUCache(object):
+    '''Bounded mapping that evicts the least recently used entry'''
+
+    def __init__(self, maxsize=128):
+        if maxsize < 1:
+            raise ValueError('maxsize must be at least 1')
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.uncacheable = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key):
+        '''Tuple of (found, value), marking the entry as recently used'''
+        try:
+            value = self.entries.pop(key)
+        except KeyError:
+            self.misses += 1
+            return False, None
+        self.entries[key] = value
+        self.hits += 1
+        return True, value
+
+    def put(self, key, value):
+        self.entries.pop(key, None)
+        self.entries[key] = value
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self.entries.clear()
+
+    def stats(self):
+        '''dict of hits, misses, evictions, uncacheable calls, size and
+        maxsize'''
+        return {'hits': self.hits, 'misses': self.misses,
+                'evictions': self.evictions,
+                'uncacheable': self.uncacheable, 'size': len(self.entries),
+                'maxsize': self.maxsize}
+
+
+def _digest(values):
+    values = np.ascontiguousarray(values)
+    return hashlib.sha1(values.view(np.uint8)).hexdigest()
+
+
+def freeze(value):
+    '''Hashable key for an argument value. Arrays and DataFrames are keyed
+    by their contents, masts by identity and data version. Raises TypeError
+    for values that cannot be keyed.'''
+    if value is None or isinstance(value, (bool, int, float, str, bytes)):
+        return value
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (tuple, list)):
+        return ('seq', tuple(freeze(x) for x in value))
+    if isinstance(value, dict):
+        items = [(freeze(k), freeze(v)) for k, v in value.items()]
+        return ('dict', tuple(sorted(items, key=repr)))
+    if isinstance(value, pd.DataFrame):
+        columns = tuple(freeze(value.iloc[:, x])
+                        for x in range(value.shape[1]))
+        return ('frame', freeze(value.index), freeze(value.columns),
+                columns)
+    if isinstance(value, (pd.Series, pd.Index)):
+        value = np.asarray(value)
+    if isinstance(value, np.ndarray):
+        if value.dtype == object:
+            return ('objects', value.shape, freeze(value.ravel().tolist()))
+        return ('array', value.dtype.str, value.shape, _digest(value))
+    if hasattr(value, 'data_version'):
+        return ('mast', id(value), value.data_version)
+    hash(value)
+    return value
+
+
+def memoized(method):
+    '''Decorator caching the result of a MetMast method while the mast
+    cache is enabled. Arguments are bound to the method signature first,
+    so positional and keyword calls share entries. Results are returned
+    as copies of the cached entry.'''
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        cache = getattr(self, '_cache', None)
+        if cache is None:
+            return method(self, *args, **kwargs)
+        try:
+            bound = inspect.getcallargs(method, self, *args, **kwargs)
+            bound.pop('self')
+            key = (method.__name__, self.data_version, self.interval,
+                   freeze(bound))
+        except TypeError:
+            cache.uncacheable += 1
+            return method(self, *args, **kwargs)
+        found, value = cache.get(key)
+        if not found:
+            value = method(self, *args, **kwargs)
+            cache.put(key, value)
+        #Every caller gets its own copy, so changing a result never reaches
+        #the cached entry
+        return copy.deepcopy(value)
+    return wrapper
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+'''
+Channels
+-------
+
+Small helpers for classifying met mast columns. MetMast columns are tuples
+of the form ('Signal', Height), as generated by wind_import, but plain
+string columns are handled as well.
+
+'''
+import re
+
+
+def signal(column):
+    '''Signal name of a column, e.g. 'WS Mean 1' for ('WS Mean 1', 50)'''
+    if isinstance(column, tuple):
+        return str(column[0])
+    return str(column)
+
+
+def height(column):
+    '''Height of a column, or None if the column carries no height'''
+    if isinstance(column, tuple) and len(column) > 1:
+        return column[1]
+    return None
+
+
+def _stripped(column):
+    return signal(column).lower().replace(' ', '')
+
+
+def is_stddev(column):
+    '''True for standard deviation channels (StdDev, St Dev, Std Dev)'''
+    stripped = _stripped(column)
+    return 'std' in stripped or 'dev' in stripped
+
+
+def is_direction(column):
+    '''True for wind direction channels (WD, Dir, Direction)'''
+    stripped = _stripped(column)
+    if is_stddev(column):
+        return False
+    return 'dir' in stripped or stripped.startswith('wd')
+
+
+def is_turbulence(column):
+    '''True for turbulence intensity channels (TI, Turbulence)'''
+    return 'turb' in _stripped(column) or 'TI' in signal(column).split()
+
+
+def is_speed(column):
+    '''True for mean wind speed channels (WS, Speed). Standard deviation,
+    max, min, direction and turbulence channels are excluded.'''
+    stripped = _stripped(column)
+    if (is_direction(column) or is_stddev(column) or is_turbulence(column)
+            or 'max' in stripped or 'min' in stripped):
+        return False
+    return 'speed' in stripped or 'ws' in stripped or 'spd' in stripped
+
+
+def is_maximum(column):
+    '''True for maximum wind speed or gust channels (WS Max, Gust).
+    Maxima of temperature, turbulence intensity and air density are
+    excluded.'''
+    stripped = _stripped(column)
+    if (is_direction(column) or is_stddev(column) or is_turbulence(column)
+            or 'temp' in stripped or 'rho' in stripped
+            or 'dens' in stripped):
+        return False
+    if 'gust' in stripped:
+        return True
+    return 'max' in stripped and ('speed' in stripped or 'ws' in stripped or
+                                  'spd' in stripped)
+
+
+def sensor(column):
+    '''Sensor number in the signal name, e.g. 2 for 'WS Mean 2', or None'''
+    numbers = re.findall(r'\d+', signal(column))
+    if numbers:
+        return int(numbers[-1])
+    return None
+
+
+def ws_pairs(columns):
+    '''Pair each mean wind speed column with the standard deviation column
+    of the same sensor. Columns are matched on height and sensor number,
+    falling back to column order at each height.
+
+    Returns:
+    ________
+    list of (mean column, standard deviation column) tuples
+    '''
+    speeds = [x for x in columns if is_speed(x)]
+    stds = [x for x in columns if is_stddev(x) and 'dir' not in _stripped(x)
+            and not _stripped(x).startswith('wd')]
+    pairs = []
+    for mean in speeds:
+        candidates = [x for x in stds if height(x) == height(mean)]
+        same_sensor = [x for x in candidates if sensor(x) == sensor(mean)]
+        if same_sensor:
+            pairs.append((mean, same_sensor[0]))
+            stds.remove(same_sensor[0])
+        elif candidates:
+            pairs.append((mean, candidates[0]))
+            stds.remove(candidates[0])
+    return pairs
+
+
+def signal_type(column):
+    '''Signal name with sensor numbers removed, e.g. 'Wind Speed Mean' for
+    ('Wind Speed 1 Mean', 50). Redundant sensors share a signal type.'''
+    return ' '.join(re.sub(r'\d+', ' ', signal(column)).split())
@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+'''
+Circular
+-------
+
+Tools for binning wind directions into sectors, and circular statistics
+for directions: unit vector means, the Yamartino standard deviation and
+speed weighted means, for whole columns or per group of bin codes
+
+'''
+from __future__ import division
+import numpy as np
+
+
+def sector_centers(sectors=12):
+    '''Sector center directions, starting with the north sector at 0'''
+    return np.arange(0, 360, 360/sectors)
+
+
+def sector_codes(directions, sectors=12):
+    '''Sector number for each direction. Sector 0 is centered on north, so
+    with 12 sectors it covers [345, 15), with 360 taken as north. Missing
+    directions and readings outside [0, 360], e.g. -999 sentinels, get
+    -1.
+
+    Parameters:
+    ___________
+    directions: array of float
+        Wind directions in degrees
+    sectors: int, default 12
+        Number of sectors
+
+    Returns:
+    ________
+    Integer array of sector numbers
+    '''
+    directions = np.asarray(directions, dtype=float)
+    cuts = 360/sectors
+    with np.errstate(invalid='ignore'):
+        valid = (directions >= 0) & (directions <= 360)
+    codes = np.full(directions.shape, -1, dtype=np.intp)
+    shifted = (directions[valid] % 360 + cuts/2)//cuts
+    codes[valid] = shifted.astype(np.intp) % sectors
+    return codes
+
+
+def direction(sin_sum, cos_sum):
+    '''Direction in degrees, in [0, 360), of summed sine and cosine
+    components'''
+    result = np.degrees(np.arctan2(sin_sum, cos_sum)) % 360
+    result[result >= 360] = 0
+    return result
+
+
+def yamartino(sin_mean, cos_mean):
+    '''Yamartino estimate of the circular standard deviation in degrees,
+    from the mean sine and cosine of the directions'''
+    epsilon = np.sqrt(np.clip(1 - (sin_mean**2 + cos_mean**2), 0, 1))
+    return np.degrees(np.arcsin(epsilon)*(1 + (2/np.sqrt(3) - 1)*epsilon**3))
+
+
+def _as_2d(values):
+    values = np.asarray(values, dtype=float)
+    return values.reshape(len(values), -1), values.ndim == 1
+
+
+def group_stats(directions, codes=None, ngroups=None, weights=None):
+    '''Circular statistics of direction columns, per group
+
+    Parameters:
+    ___________
+    directions: array of float
+        Wind directions in degrees, 1D or one column per channel. Missing
+        values are ignored.
+    codes: array of int, default None
+        Group number of each row, e.g. bin or sector codes. Rows with a
+        negative code are left out. Defaults to a single group.
+    ngroups: int, default None
+        Number of groups. Defaults to the largest code plus one.
+    weights: array of float, default None
+        Weight of each value, e.g. wind speeds for speed weighted means.
+        Same shape as directions, or 1D to weight every column the same.
+
+    Returns:
+    ________
+    dict of 'Mean', 'StdDev' (Yamartino) and 'Count' arrays of shape
+    (ngroups, columns), or (ngroups,) for 1D directions. Groups with no
+    data are NaN. The standard deviation is always unweighted.
+    '''
+    values, flat = _as_2d(directions)
+    nrows, ncols = values.shape
+    if codes is None:
+        codes = np.zeros(nrows, dtype=np.intp)
+    codes = np.asarray(codes)
+    if ngroups is None:
+        ngroups = int(codes.max()) + 1 if len(codes) else 0
+    valid = ~np.isnan(values) & (codes >= 0)[:, None]
+    if weights is not None:
+        weights = np.asarray(weights, dtype=float)
+        if weights.ndim == 1:
+            weights = weights[:, None]
+        valid &= ~np.isnan(weights)
+    keys = (np.where(codes >= 0, codes, 0)[:, None]*ncols +
+            np.arange(ncols)).ravel()
+    size = ngroups*ncols
+
+    def total(x):
+        x = np.where(valid, x, 0).ravel()
+        return np.bincount(keys, weights=x, minlength=size).reshape(ngroups,
+                                                                    ncols)
+    radians = np.radians(np.where(valid, values, 0))
+    sines, cosines = np.sin(radians), np.cos(radians)
+    counts = total(1.0)
+    sin_sum, cos_sum = total(sines), total(cosines)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        stddev = yamartino(sin_sum/counts, cos_sum/counts)
+    if weights is not None:
+        weights = np.broadcast_to(weights, values.shape)
+        sin_sum, cos_sum = total(sines*weights), total(cosines*weights)
+    mean = direction(sin_sum, cos_sum)
+    empty = counts == 0
+    mean[empty] = np.nan
+    stddev[empty] = np.nan
+    stats = {'Mean': mean, 'StdDev': stddev, 'Count': counts}
+    if flat:
+        stats = dict((k, v[:, 0]) for k, v in stats.items())
+    return stats
+
+
+def vector_mean(directions, weights=None):
+    '''Unit vector mean direction of each column, optionally weighted,
+    e.g. by wind speed
+
+    Examples:
+    _________
+    >>> circular.vector_mean([359, 1])
+    0.0
+    '''
+    mean = group_stats(directions, weights=weights)['Mean'][0]
+    return mean if np.ndim(mean) else float(mean)
+
+
+def stddev(directions):
+    '''Yamartino circular standard deviation of each column, in degrees'''
+    result = group_stats(directions)['StdDev'][0]
+    return result if np.ndim(result) else float(result)
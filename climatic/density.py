@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+'''
+Density
+-------
+
+Air density from temperature and pressure, extrapolated to every wind
+speed height, and wind power density (1/2 rho v^3) as time series or
+grouped by sector, month or hour of day
+
+'''
+from __future__ import division
+import numpy as np
+
+R_DRY = 287.05
+GRAVITY = 9.80665
+LAPSE_RATE = 0.0065
+SEA_LEVEL_PRESSURE = 101325.
+SEA_LEVEL_TEMPERATURE = 288.15
+PRESSURE_UNITS = {'Pa': 1., 'hPa': 100., 'mbar': 100., 'kPa': 1000.}
+
+
+def standard_pressure(altitude):
+    '''ISA pressure in Pa at an altitude in m above sea level'''
+    exponent = GRAVITY/(R_DRY*LAPSE_RATE)
+    altitude = np.asarray(altitude, dtype=float)
+    return SEA_LEVEL_PRESSURE*(1 - LAPSE_RATE*altitude/
+                               SEA_LEVEL_TEMPERATURE)**exponent
+
+
+def air_density(temperature, pressure=None, sensor_height=0, heights=None,
+                elevation=0, pressure_units='hPa'):
+    '''Air density at one or more heights
+
+    Temperature is moved to each height with the standard lapse rate and
+    pressure with the hypsometric equation. Without a pressure channel the
+    ISA pressure at the sensor altitude is used instead.
+
+    Parameters:
+    ___________
+    temperature: array of float
+        Air temperature in degrees C
+    pressure: array of float, default None
+        Barometric pressure at the same height as the temperature sensor
+    sensor_height: float, default 0
+        Height of the temperature and pressure sensors above ground
+    heights: list, default None
+        Heights above ground to compute density at. Defaults to the sensor
+        height.
+    elevation: float, default 0
+        Ground elevation above sea level in m
+    pressure_units: string, default 'hPa'
+        'Pa', 'hPa', 'mbar' or 'kPa'
+
+    Returns:
+    ________
+    Array of densities in kg/m^3, one column per height
+    '''
+    kelvin = np.asarray(temperature, dtype=float) + 273.15
+    if pressure is None:
+        pressure = standard_pressure(elevation + sensor_height)
+    else:
+        pressure = (np.asarray(pressure, dtype=float) *
+                    PRESSURE_UNITS[pressure_units])
+    if heights is None:
+        heights = [sensor_height]
+    rise = np.asarray(heights, dtype=float) - sensor_height
+    kelvin = np.broadcast_to(kelvin, np.broadcast(kelvin, pressure).shape)
+    layer_temp = kelvin[:, None] - LAPSE_RATE*rise/2
+    pressure = (np.broadcast_to(pressure, kelvin.shape)[:, None] *
+                np.exp(-GRAVITY*rise/(R_DRY*layer_temp)))
+    return pressure/(R_DRY*(kelvin[:, None] - LAPSE_RATE*rise))
+
+
+def power_density(ws, rho=1.225):
+    '''Wind power density, 1/2 rho v^3, in W/m^2. Works on any shape of
+    wind speeds, with rho broadcast against them.'''
+    return 0.5*np.asarray(rho, dtype=float)*np.asarray(ws, dtype=float)**3
+
+
+def grouped(ws, rho, codes, ngroups):
+    '''Mean wind power density per group for many columns at once
+
+    Parameters:
+    ___________
+    ws: 2D array of float
+        Wind speeds, one column per sensor
+    rho: 2D array of float
+        Air density, same shape as ws
+    codes: array of int
+        Group of each row, e.g. sector, month or hour. Negative codes are
+        left out.
+    ngroups: int
+        Number of groups
+
+    Returns:
+    ________
+    Tuple of (mean power density, mean cubed wind speed, counts) arrays of
+    shape (ngroups, columns)
+    '''
+    ws = np.asarray(ws, dtype=float)
+    rho = np.broadcast_to(np.asarray(rho, dtype=float), ws.shape)
+    ncols = ws.shape[1]
+    codes = np.asarray(codes)
+    valid = ~np.isnan(ws) & ~np.isnan(rho) & (codes >= 0)[:, None]
+    keys = (np.where(codes >= 0, codes, 0)[:, None]*ncols +
+            np.arange(ncols)).ravel()
+    cubed = np.where(valid, ws, 0)**3
+    size = ngroups*ncols
+
+    def total(x):
+        return np.bincount(keys, weights=x.ravel(),
+                           minlength=size).reshape(ngroups, ncols)
+    counts = total(valid.astype(float))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        wpd = 0.5*total(np.where(valid, rho, 0)*cubed)/counts
+        m3 = total(cubed)/counts
+    return wpd, m3, counts
+
+
+def time_codes(index, by):
+    '''Month (0-11) or hour of day (0-23) of each timestamp, in local wall
+    time'''
+    if getattr(index, 'tz', None) is not None:
+        index = index.tz_localize(None)
+    stamps = np.asarray(index.values, dtype='datetime64[ns]')
+    if by == 'month':
+        months = stamps.astype('datetime64[M]').astype(np.int64)
+        return months % 12, 12
+    days = stamps.astype('datetime64[D]')
+    return ((stamps - days).astype('timedelta64[h]').astype(np.int64), 24)
@@ -0,0 +1,309 @@
+# -*- coding: utf-8 -*-
+'''
+Export
+-------
+
+Observed wind climates as WAsP .tab files, the format WindPRO also
+imports. Tables are built straight from joint wind speed and direction
+counts for every mast and height of a campaign, written with one buffered
+write per file, and read back without the raw data.
+
+    >>> export.campaign({'North': north, 'South': south}, 'owc/')
+    >>> owc = export.read_tab('owc/North_WS_Mean_1_50.tab')
+
+'''
+from __future__ import division
+import os
+import re
+import multiprocessing
+import numpy as np
+import pandas as pd
+import channels
+import circular
+
+
+def joint_counts(ws, directions, sectors=12, ws_intervals=1, max_ws=None):
+    '''Records in each wind speed bin and direction sector
+
+    Parameters:
+    ___________
+    ws: array of float
+        Wind speeds. NaNs, infinite and negative values, e.g. logger
+        sentinels such as -9999, are left out.
+    directions: array of float
+        Wind directions in degrees. Records missing either value are left
+        out.
+    sectors: int, default 12
+        Number of sectors, with sector 0 centered on north
+    ws_intervals: float, default 1
+        Width of the wind speed bins. Bins are closed on the right, with
+        calms in the first bin.
+    max_ws: float, default None
+        Upper edge of the last bin. Faster records are left out. Defaults
+        to the highest wind speed.
+
+    Returns:
+    ________
+    Tuple of (counts, edges): an array of shape (bins, sectors) and the
+    upper edge of each bin
+    '''
+    ws = np.asarray(ws, dtype=float)
+    codes = circular.sector_codes(directions, sectors)
+    with np.errstate(invalid='ignore'):
+        valid = np.isfinite(ws) & (ws >= 0) & (codes >= 0)
+        if max_ws is not None:
+            valid &= ws <= max_ws
+    speeds = ws[valid]
+    if max_ws is None:
+        max_ws = speeds.max() if len(speeds) else ws_intervals
+    nbins = max(int(np.ceil(max_ws/ws_intervals)), 1)
+    #Calms go to the first bin, and the clip guards rounding at max_ws
+    bins = np.clip(np.ceil(speeds/ws_intervals).astype(np.int64) - 1, 0,
+                   nbins - 1)
+    counts = np.bincount(bins*sectors + codes[valid],
+                         minlength=nbins*sectors).reshape(nbins, sectors)
+    return counts, np.arange(1, nbins + 1)*ws_intervals
+
+
+def tab_text(counts, edges, title='climatic', lat=None, lon=None,
+             height=None, speed_factor=1, offset=0):
+    '''WAsP .tab text for a table of joint counts
+
+    The header holds the title, the position and height, the number of
+    sectors with the speed factor and direction offset, and the sector
+    frequencies in percent. Each following row is the upper edge of a wind
+    speed bin and the per mille frequency of that bin within each sector.
+
+    Parameters:
+    ___________
+    counts: 2D array
+        Records per wind speed bin (rows) and sector (columns)
+    edges: array of float
+        Upper edge of each wind speed bin
+    title: string, default 'climatic'
+        Title line
+    lat, lon, height: float, default None
+        Position and measurement height. Missing values are written as 0.
+
+    Returns:
+    ________
+    string
+    '''
+    counts = np.asarray(counts, dtype=float)
+    sector_totals = counts.sum(axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        percent = np.nan_to_num(100*sector_totals/sector_totals.sum())
+        permille = np.nan_to_num(1000*counts/sector_totals)
+    position = [0 if x is None else x for x in (lat, lon, height)]
+    lines = [title.replace('\n', ' '),
+             '{0:10.4f} {1:10.4f} {2:8.2f}'.format(*position),
+             '{0:4d} {1:8.2f} {2:8.2f}'.format(counts.shape[1], speed_factor,
+                                                offset),
+             ' '*8 + ''.join('{0:9.3f}'.format(x) for x in percent)]
+    row = '{:8.2f}' + '{:9.3f}'*counts.shape[1]
+    lines.extend(row.format(edge, *values)
+                 for edge, values in zip(edges, permille))
+    return '\n'.join(lines) + '\n'
+
+
+def write_tab(path, counts, edges, **kwargs):
+    '''Write a WAsP .tab file from joint counts in a single write. kwargs
+    are passed to export.tab_text. Returns the path.'''
+    text = tab_text(counts, edges, **kwargs)
+    with open(path, 'w') as f:
+        f.write(text)
+    return path
+
+
+def read_tab(path):
+    '''Read a WAsP .tab file
+
+    Parameters:
+    ___________
+    path: string
+        Path to .tab file
+
+    Returns:
+    ________
+    dict with the 'Title', 'Latitude', 'Longitude', 'Height', 'Speed
+    Factor' and 'Offset', the sector 'Frequencies' as fractions, the per
+    mille 'Table' of each sector indexed by upper bin edge, and 'Joint',
+    the joint frequency of each bin and sector, which sums to 1
+    '''
+    with open(path, 'r') as f:
+        lines = f.read().splitlines()
+    lat, lon, height = [float(x) for x in lines[1].split()[:3]]
+    header = lines[2].split()
+    sectors = int(header[0])
+    factor, offset = float(header[1]), float(header[2])
+    percent = np.array(lines[3].split()[:sectors], dtype=float)
+    rows = np.array([x.split()[:sectors + 1] for x in lines[4:] if x.strip()],
+                    dtype=float).reshape(-1, sectors + 1)
+    centers = circular.sector_centers(sectors)
+    frequencies = pd.Series(percent/100, index=centers)
+    table = pd.DataFrame(rows[:, 1:], index=rows[:, 0], columns=centers)
+    return {'Title': lines[0], 'Latitude': lat, 'Longitude': lon,
+            'Height': height, 'Speed Factor': factor, 'Offset': offset,
+            'Frequencies': frequencies, 'Table': table,
+            'Joint': table*frequencies/1000}
+
+
+def label(column):
+    '''Signal and height of a column as text, e.g. 'WS Mean 1 50' for
+    ('WS Mean 1', 50)'''
+    parts = list(column) if isinstance(column, tuple) else [column]
+    return ' '.join(str(x) for x in parts if x is not None)
+
+
+def file_name(mast, column):
+    '''File system safe .tab name for a mast and column, e.g.
+    North_WS_Mean_1_50.tab'''
+    name = ' '.join(str(x) for x in (mast, label(column)) if x is not None)
+    return re.sub(r'[^A-Za-z0-9.-]+', '_', name).strip('_') + '.tab'
+
+
+def pairs(columns):
+    '''Pair every mean wind speed column with the direction column closest
+    in height. Returns a list of (speed, direction) tuples, skipping speeds
+    when there is no direction channel.'''
+    directions = [x for x in columns if channels.is_direction(x)]
+    if not directions:
+        return []
+    found = []
+    for column in columns:
+        if not channels.is_speed(column):
+            continue
+        level = channels.height(column) or 0
+        nearest = min(directions,
+                      key=lambda x: abs((channels.height(x) or 0) - level))
+        found.append((column, nearest))
+    return found
+
+
+def _write_chunk(args):
+    '''Count and write a list of (path, ws, directions, header) tables'''
+    tables, sectors, ws_intervals = args
+    paths = []
+    for path, ws, directions, header in tables:
+        counts, edges = joint_counts(ws, directions, sectors=sectors,
+                                     ws_intervals=ws_intervals)
+        paths.append(write_tab(path, counts, edges, **header))
+    return paths
+
+
+def write_tabs(tables, sectors=12, ws_intervals=1, processes=None):
+    '''Count and write many .tab files in parallel
+
+    Parameters:
+    ___________
+    tables: list
+        (path, ws, directions, header) tuples, with header a dict of
+        export.tab_text arguments
+    sectors: int, default 12
+        Number of sectors
+    ws_intervals: float, default 1
+        Width of the wind speed bins
+    processes: int, default None
+        Worker processes. Defaults to one per CPU. Tables are written in
+        this process with processes=1.
+
+    Returns:
+    ________
+    List of paths, in the order of tables
+    '''
+    if not tables:
+        return []
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+    processes = max(1, min(processes, len(tables)))
+    if processes == 1:
+        return _write_chunk((tables, sectors, ws_intervals))
+    chunks = [(tables[x::processes], sectors, ws_intervals)
+              for x in range(processes)]
+    pool = multiprocessing.Pool(processes)
+    try:
+        written = pool.map(_write_chunk, chunks)
+    finally:
+        pool.close()
+        pool.join()
+    paths = [None]*len(tables)
+    for num, chunk in enumerate(written):
+        paths[num::processes] = chunk
+    return paths
+
+
+def mast_tables(mast, directory, name=None, columns=None, mask=None):
+    '''(path, ws, directions, header) tables for every wind speed height of
+    a mast, ready for export.write_tabs
+
+    Parameters:
+    ___________
+    mast: MetMast
+    directory: string
+        Output directory
+    name: string, default None
+        Mast name used in file names and titles
+    columns: list, default None
+        (speed, direction) column pairs. Defaults to export.pairs of the
+        mast columns.
+    mask: array of bool, default None
+        Rows to include, e.g. from MetMast.qc_mask
+    '''
+    if columns is None:
+        numeric = mast.data.select_dtypes(include=[np.number]).columns
+        columns = pairs(list(numeric))
+    tables = []
+    for ws_column, wd_column in columns:
+        ws = mast.data[ws_column].values.astype(float)
+        if mask is not None:
+            ws = np.where(np.asarray(mask, dtype=bool), ws, np.nan)
+        height = channels.height(ws_column)
+        if height is None:
+            height = mast.height
+        title = ', '.join(str(x) for x in (name, label(ws_column),
+                                           label(wd_column))
+                          if x is not None)
+        header = {'title': title, 'lat': mast.lat, 'lon': mast.lon,
+                  'height': height}
+        path = os.path.join(directory, file_name(name, ws_column))
+        tables.append((path, ws, mast.data[wd_column].values, header))
+    return tables
+
+
+def campaign(masts, directory, names=None, sectors=12, ws_intervals=1,
+             processes=None):
+    '''Write a .tab file for every wind speed height of every mast
+
+    Parameters:
+    ___________
+    masts: dict or list
+        dict of name: MetMast, or a list of MetMast objects
+    directory: string
+        Output directory
+    names: list, default None
+        Mast names for a list of masts. Defaults to 'Mast 1', 'Mast 2'...
+    sectors: int, default 12
+        Number of sectors
+    ws_intervals: float, default 1
+        Width of the wind speed bins
+    processes: int, default None
+        Worker processes
+
+    Returns:
+    ________
+    dict of (mast name, wind speed column): path
+    '''
+    if isinstance(masts, dict):
+        names = sorted(masts.keys())
+        masts = [masts[x] for x in names]
+    elif names is None:
+        names = ['Mast {0}'.format(x + 1) for x in range(len(masts))]
+    keys, tables = [], []
+    for name, mast in zip(names, masts):
+        numeric = mast.data.select_dtypes(include=[np.number]).columns
+        found = pairs(list(numeric))
+        keys.extend((name, x[0]) for x in found)
+        tables.extend(mast_tables(mast, directory, name=name, columns=found))
+    paths = write_tabs(tables, sectors=sectors, ws_intervals=ws_intervals,
+                       processes=processes)
+    return dict(zip(keys, paths))
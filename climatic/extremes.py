@@ -0,0 +1,271 @@
+# -*- coding: utf-8 -*-
+'''
+Extremes
+-------
+
+Extreme wind estimation: annual or monthly block maxima, declustered peaks
+over threshold, Gumbel and GEV fits for many columns at once, and return
+levels such as the 50 year wind (Vref) with bootstrap confidence intervals
+
+'''
+from __future__ import division
+import multiprocessing
+import numpy as np
+import pandas as pd
+from scipy.special import gamma
+import resample
+
+DISTRIBUTIONS = ('gumbel', 'gev')
+BLOCKS = {'A': 'datetime64[Y]', 'Y': 'datetime64[Y]', 'M': 'datetime64[M]'}
+EULER = 0.5772156649015329
+
+
+def _wall_ns(index):
+    '''Nanosecond stamps in local wall time, so blocks follow the calendar
+    of the record'''
+    if getattr(index, 'tz', None) is not None:
+        index = index.tz_localize(None)
+    return resample.epoch_ns(index)
+
+
+def block_maxima(data, freq='A', min_coverage=0, interval=None):
+    '''Maximum of every column in each calendar year or month
+
+    Parameters:
+    ___________
+    data: DataFrame
+        Data with a DatetimeIndex. Non-numeric columns are dropped.
+    freq: string, default 'A'
+        'A' for annual or 'M' for monthly blocks
+    min_coverage: float, default 0
+        Fraction of the expected records per block required for a valid
+        maximum. Blocks below this fraction are set to NaN.
+    interval: float, default None
+        Sampling interval in seconds, used with min_coverage. Detected
+        from the index if not given.
+
+    Returns:
+    ________
+    DataFrame of block maxima, indexed by block start
+    '''
+    if freq not in BLOCKS:
+        raise ValueError('freq must be one of {0}'.format(sorted(BLOCKS)))
+    numeric = data.select_dtypes(include=[np.number])
+    stamps = _wall_ns(data.index)
+    values = numeric.values.astype(float)
+    if len(stamps) > 1 and (np.diff(stamps) < 0).any():
+        order = np.argsort(stamps, kind='mergesort')
+        stamps, values = stamps[order], values[order]
+
+    blocks = stamps.view('datetime64[ns]').astype(BLOCKS[freq])
+    starts = np.flatnonzero(np.r_[True, blocks[1:] != blocks[:-1]])
+    valid = ~np.isnan(values)
+    maxima = np.maximum.reduceat(np.where(valid, values, -np.inf), starts,
+                                 axis=0)
+    counts = np.add.reduceat(valid.astype(np.int64), starts, axis=0)
+    maxima[counts == 0] = np.nan
+
+    block_starts = blocks[starts]
+    if min_coverage:
+        if interval is None:
+            interval = resample.infer_interval(data.index)
+        ends = (block_starts + 1).astype('datetime64[s]')
+        seconds = (ends - block_starts.astype('datetime64[s]')).astype(float)
+        expected = seconds/interval
+        maxima[counts < min_coverage*expected[:, None]] = np.nan
+
+    index = pd.DatetimeIndex(block_starts.astype('datetime64[ns]'))
+    return pd.DataFrame(maxima, index=index, columns=numeric.columns)
+
+
+def peaks_over_threshold(data, threshold=None, quantile=0.99,
+                         separation=48):
+    '''Declustered peaks over threshold. Exceedances closer together than
+    the separation time belong to one storm, and only the storm maximum
+    is kept.
+
+    Parameters:
+    ___________
+    data: DataFrame
+        Data with a DatetimeIndex
+    threshold: float or dict, default None
+        Threshold for all columns, or a dict of column: threshold.
+        Defaults to the quantile of each column.
+    quantile: float, default 0.99
+        Quantile used as threshold when none is given
+    separation: float, default 48
+        Minimum hours between independent storms
+
+    Returns:
+    ________
+    dict of column: Series of storm peaks, indexed by peak time
+    '''
+    numeric = data.select_dtypes(include=[np.number])
+    stamps = resample.epoch_ns(data.index)
+    gap = int(separation*3600*1e9)
+    peaks = {}
+    for column in numeric.columns:
+        values = numeric[column].values.astype(float)
+        if isinstance(threshold, dict):
+            level = threshold[column]
+        elif threshold is not None:
+            level = threshold
+        else:
+            level = np.nanpercentile(values, quantile*100)
+        over = np.flatnonzero(values > level)
+        if not len(over):
+            peaks[column] = pd.Series([], dtype=float)
+            continue
+        storms = np.flatnonzero(np.r_[True, np.diff(stamps[over]) > gap])
+        storm_max = np.maximum.reduceat(values[over], storms)
+        #First row in each storm holding the storm maximum
+        storm_ids = np.repeat(np.arange(len(storms)),
+                              np.diff(np.r_[storms, len(over)]))
+        first = np.flatnonzero(values[over] == storm_max[storm_ids])
+        first = first[np.r_[True, np.diff(storm_ids[first]) != 0]]
+        peaks[column] = pd.Series(storm_max, index=data.index[over[first]])
+    return peaks
+
+
+def _sorted_columns(maxima):
+    '''Each column sorted ascending with NaN last, and the number of valid
+    values per column'''
+    values = np.asarray(maxima, dtype=float)
+    if values.ndim == 1:
+        values = values[:, None]
+    return np.sort(values, axis=0), (~np.isnan(values)).sum(axis=0)
+
+
+def fit(maxima, dist='gumbel'):
+    '''Fit Gumbel or GEV distributions to block maxima, one per column
+
+    Gumbel parameters come from the method of moments, GEV parameters from
+    probability weighted moments (Hosking et al., 1985). Both are closed
+    form, so any number of columns, or bootstrap samples, fit at once.
+
+    Parameters:
+    ___________
+    maxima: array or DataFrame
+        Block maxima, one column per channel. NaNs are ignored.
+    dist: string, default 'gumbel'
+        'gumbel' or 'gev'
+
+    Returns:
+    ________
+    dict of 'loc', 'scale' and 'shape' arrays, one value per column.
+    shape follows Hosking's sign convention and is 0 for Gumbel.
+    '''
+    if dist not in DISTRIBUTIONS:
+        raise ValueError('dist must be one of {0}'.format(DISTRIBUTIONS))
+    values, n = _sorted_columns(maxima)
+    valid = ~np.isnan(values)
+    filled = np.where(valid, values, 0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        if dist == 'gumbel':
+            mean = filled.sum(axis=0)/n
+            var = (np.where(valid, values - mean, 0)**2).sum(axis=0)/(n - 1)
+            scale = np.sqrt(6*var)/np.pi
+            loc = mean - EULER*scale
+            return {'loc': loc, 'scale': scale, 'shape': np.zeros_like(loc)}
+
+        rank = np.arange(len(values))[:, None]
+        b0 = filled.sum(axis=0)/n
+        b1 = (filled*rank/(n - 1)).sum(axis=0)/n
+        b2 = (filled*rank*(rank - 1)/((n - 1)*(n - 2))).sum(axis=0)/n
+        c = (2*b1 - b0)/(3*b2 - b0) - np.log(2)/np.log(3)
+        shape = 7.8590*c + 2.9554*c**2
+        g = gamma(1 + shape)
+        scale = (2*b1 - b0)*shape/(g*(1 - 2**-shape))
+        loc = b0 + scale*(g - 1)/shape
+    return {'loc': loc, 'scale': scale, 'shape': shape}
+
+
+def return_level(params, period=50, blocks_per_year=1):
+    '''Value exceeded on average once per return period
+
+    Parameters:
+    ___________
+    params: dict
+        Fitted parameters from extremes.fit
+    period: float, default 50
+        Return period in years
+    blocks_per_year: float, default 1
+        12 for monthly maxima
+
+    Returns:
+    ________
+    array with one return level per column
+    '''
+    y = -np.log(1 - 1/(period*blocks_per_year))
+    shape = np.asarray(params['shape'], dtype=float)
+    gumbel = params['loc'] - params['scale']*np.log(y)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        gev = params['loc'] + params['scale']/shape*(1 - y**shape)
+    return np.where(np.abs(shape) < 1e-9, gumbel, gev)
+
+
+def _bootstrap_levels(args):
+    '''Return levels for one batch of bootstrap resamples'''
+    maxima, dist, period, blocks_per_year, samples, seed = args
+    rs = np.random.RandomState(seed)
+    nblocks, ncols = maxima.shape
+    picks = rs.randint(0, nblocks, (nblocks, samples))
+    #Stack resamples side by side so every sample and column fits at once
+    resampled = maxima[picks].reshape(nblocks, samples*ncols)
+    levels = return_level(fit(resampled, dist=dist), period=period,
+                          blocks_per_year=blocks_per_year)
+    return levels.reshape(samples, ncols)
+
+
+def bootstrap(maxima, dist='gumbel', period=50, blocks_per_year=1,
+              samples=1000, ci=0.9, processes=None, seed=0, batch=250):
+    '''Bootstrap confidence intervals of return levels
+
+    Parameters:
+    ___________
+    maxima: array or DataFrame
+        Block maxima, one column per channel
+    dist: string, default 'gumbel'
+        'gumbel' or 'gev'
+    period: float, default 50
+        Return period in years
+    blocks_per_year: float, default 1
+        12 for monthly maxima
+    samples: int, default 1000
+        Number of bootstrap resamples
+    ci: float, default 0.9
+        Confidence level
+    processes: int, default None
+        Worker processes. Batches are run in this process with
+        processes=1 or when there is a single batch.
+    seed: int, default 0
+        Random seed. Each batch gets its own seed, so results do not
+        depend on the number of processes.
+    batch: int, default 250
+        Resamples fit together in one batch
+
+    Returns:
+    ________
+    Tuple of (lower, upper) arrays, one value per column
+    '''
+    values = np.asarray(maxima, dtype=float)
+    if values.ndim == 1:
+        values = values[:, None]
+    sizes = [min(batch, samples - x) for x in range(0, samples, batch)]
+    args = [(values, dist, period, blocks_per_year, size, seed + num)
+            for num, size in enumerate(sizes)]
+    if processes == 1 or len(args) == 1:
+        levels = [_bootstrap_levels(x) for x in args]
+    else:
+        pool = multiprocessing.Pool(processes)
+        try:
+            levels = pool.map(_bootstrap_levels, args)
+        finally:
+            pool.close()
+            pool.join()
+    levels = np.vstack(levels)
+    tail = (1 - ci)/2*100
+    with np.errstate(invalid='ignore'):
+        lower = np.nanpercentile(levels, tail, axis=0)
+        upper = np.nanpercentile(levels, 100 - tail, axis=0)
+    return lower, upper
@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+'''
+Farm
+-------
+
+A wind farm site holding many met masts on one shared time axis. All mast
+data lives in a single Fortran-ordered float block, so each mast is a
+zero-copy column slice and cross-mast comparisons are matrix products over
+data that was aligned once.
+
+'''
+from __future__ import division
+import numpy as np
+import pandas as pd
+import channels
+import export
+import resample
+
+
+class Site(object):
+    '''Many MetMast objects aligned on one shared time axis'''
+
+    def __init__(self, masts, names=None):
+        '''Align the numeric data of every mast on the union of their
+        timestamps. Timestamps missing from a mast are NaN in its columns.
+        Masts must either all be time zone aware, and are then aligned in
+        UTC, or all be naive, as naive local times cannot be placed in
+        UTC. Raises a ValueError for a mix of both.
+
+        Parameters
+        ----------
+        masts: dict or list
+            dict of name: MetMast, or a list of MetMast objects
+        names: list, default None
+            Mast names for a list of masts. Defaults to 'Mast 1', 'Mast 2'...
+        '''
+        if isinstance(masts, dict):
+            names = sorted(masts.keys())
+            masts = [masts[x] for x in names]
+        elif names is None:
+            names = ['Mast {0}'.format(x + 1) for x in range(len(masts))]
+        self.names = list(names)
+        self.masts = dict(zip(self.names, masts))
+
+        frames = [x.data.select_dtypes(include=[np.number]) for x in masts]
+        aware = [getattr(x.index, 'tz', None) is not None for x in frames]
+        if any(aware) and not all(aware):
+            naive = [x for x, y in zip(self.names, aware) if not y]
+            raise ValueError(('Masts {0} have no time zone while others do. '
+                              'Please import every mast with localize, or '
+                              'none of them.').format(naive))
+        self.utc = any(aware)
+        stamps = [resample.epoch_ns(x.index) for x in frames]
+        self.stamps = np.unique(np.concatenate(stamps))
+
+        widths = [x.shape[1] for x in frames]
+        bounds = np.r_[0, np.cumsum(widths)]
+        self.slices = dict((name, slice(bounds[i], bounds[i + 1]))
+                           for i, name in enumerate(self.names))
+        self.block = np.full((len(self.stamps), bounds[-1]), np.nan,
+                             order='F')
+        self.columns = []
+        for name, frame, mast_stamps in zip(self.names, frames, stamps):
+            rows = np.searchsorted(self.stamps, mast_stamps)
+            self.block[rows, self.slices[name]] = frame.values
+            self.columns.extend([(name, x) for x in frame.columns])
+
+    def __repr__(self):
+        return 'climatic.Site(masts={0}, records={1})'.format(
+            self.names, len(self.stamps))
+
+    @property
+    def index(self):
+        '''Shared DatetimeIndex, in UTC if any mast is time zone aware'''
+        if self.utc:
+            return pd.to_datetime(self.stamps, utc=True)
+        return pd.to_datetime(self.stamps)
+
+    def values(self, name):
+        '''Zero-copy array view of one mast's columns on the shared axis'''
+        return self.block[:, self.slices[name]]
+
+    def view(self, name):
+        '''One mast's data on the shared axis, as a DataFrame over the
+        shared block'''
+        columns = [x[1] for x in self.columns[self.slices[name]]]
+        return pd.DataFrame(self.values(name), index=self.index,
+                            columns=columns, copy=False)
+
+    def _speeds(self, columns=None):
+        '''Array of one wind speed column per mast. Defaults to the highest
+        mean wind speed channel of each mast.'''
+        if columns is None:
+            columns = {}
+        picks = []
+        for name in self.names:
+            own = [x[1] for x in self.columns[self.slices[name]]]
+            column = columns.get(name)
+            if column is None:
+                speeds = [x for x in own if channels.is_speed(x)]
+                if not speeds:
+                    raise ValueError(('No wind speed column found for {0}. '
+                                      'Please pass columns.').format(name))
+                column = max(speeds, key=lambda x: channels.height(x) or 0)
+            picks.append(self.slices[name].start + own.index(column))
+        return self.block[:, picks]
+
+    def _sums(self, columns=None):
+        '''Concurrent pairwise sums from matrix products. Entry [i, j] of
+        each matrix is taken over the records where masts i and j both have
+        data.'''
+        values = self._speeds(columns)
+        valid = (~np.isnan(values)).astype(float)
+        x = np.where(valid > 0, values, 0)
+        return {'n': valid.T.dot(valid), 'sx': x.T.dot(valid),
+                'sxx': (x*x).T.dot(valid), 'sxy': x.T.dot(x)}
+
+    def _frame(self, matrix):
+        return pd.DataFrame(matrix, index=self.names, columns=self.names)
+
+    def coverage(self, columns=None):
+        '''Fraction of the shared time axis where each pair of masts has
+        concurrent data. The diagonal is the coverage of each mast.
+
+        Parameters:
+        ___________
+        columns: dict, default None
+            dict of mast name: wind speed column. Defaults to the highest
+            mean wind speed channel of each mast
+
+        Returns:
+        ________
+        DataFrame of pairwise coverage
+        '''
+        return self._frame(self._sums(columns)['n']/len(self.stamps))
+
+    def correlation(self, columns=None, min_points=10):
+        '''Pearson correlation of wind speeds between every pair of masts,
+        over their concurrent data
+
+        Parameters:
+        ___________
+        columns: dict, default None
+            dict of mast name: wind speed column. Defaults to the highest
+            mean wind speed channel of each mast
+        min_points: int, default 10
+            Pairs with fewer concurrent records are NaN
+
+        Returns:
+        ________
+        DataFrame of correlation coefficients
+        '''
+        sums = self._sums(columns)
+        n, sx, sxx = sums['n'], sums['sx'], sums['sxx']
+        with np.errstate(invalid='ignore', divide='ignore'):
+            r = ((n*sums['sxy'] - sx*sx.T) /
+                 np.sqrt((n*sxx - sx**2)*(n*sxx.T - sx.T**2)))
+        r[n < min_points] = np.nan
+        return self._frame(r)
+
+    def speed_ratio(self, columns=None, min_points=10):
+        '''Ratio of concurrent mean wind speeds between every pair of masts.
+        Entry [i, j] is the mean speed at mast i over the mean speed at
+        mast j.
+
+        Parameters:
+        ___________
+        columns: dict, default None
+            dict of mast name: wind speed column. Defaults to the highest
+            mean wind speed channel of each mast
+        min_points: int, default 10
+            Pairs with fewer concurrent records are NaN
+
+        Returns:
+        ________
+        DataFrame of speed ratios
+        '''
+        sums = self._sums(columns)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            ratio = sums['sx']/sums['sx'].T
+        ratio[sums['n'] < min_points] = np.nan
+        return self._frame(ratio)
+
+    def export_tabs(self, directory, sectors=12, ws_intervals=1,
+                    processes=None):
+        '''Write a WAsP .tab file for every wind speed height of every mast,
+        in parallel across masts. See export.campaign.
+
+        Returns:
+        ________
+        dict of (mast name, wind speed column): path
+        '''
+        return export.campaign(self.masts, directory, sectors=sectors,
+                               ws_intervals=ws_intervals,
+                               processes=processes)
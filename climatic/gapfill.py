@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+'''
+Gap Fill
+-------
+
+Fill sensor gaps from redundant sensors at the same height, falling back
+to shear extrapolation from the other heights for wind speeds
+
+'''
+from __future__ import division
+import numpy as np
+import pandas as pd
+import channels
+
+
+def redundant_pairs(columns):
+    '''Pairs of redundant sensors, i.e. columns with the same signal type
+    and height, such as ('WS Mean 1', 50) and ('WS Mean 2', 50)
+
+    Returns:
+    ________
+    list of (target column, source column) tuples, with every column of a
+    redundant group used as a source for each of the others
+    '''
+    groups = {}
+    for column in columns:
+        if channels.height(column) is None:
+            continue
+        key = (channels.signal_type(column), channels.height(column))
+        groups.setdefault(key, []).append(column)
+    pairs = []
+    for group in groups.values():
+        pairs.extend([(x, y) for x in group for y in group if x != y])
+    return pairs
+
+
+def fit_pairs(target, source, directions=None):
+    '''Linear fits of target on source columns, on concurrent data, for all
+    column pairs at once
+
+    Parameters:
+    ___________
+    target: 2D array of float
+        Target sensor data, one column per pair
+    source: 2D array of float
+        Source sensor data, same shape as target
+    directions: array of bool, default None
+        Pairs holding wind directions. These get a slope of 1 and the
+        vector mean difference between the vanes as offset.
+
+    Returns:
+    ________
+    Tuple of (slope, offset, concurrent points) arrays, one value per pair
+    '''
+    target = np.asarray(target, dtype=float)
+    source = np.asarray(source, dtype=float)
+    concurrent = ~np.isnan(target) & ~np.isnan(source)
+    n = concurrent.sum(axis=0).astype(float)
+    x = np.where(concurrent, source, 0)
+    y = np.where(concurrent, target, 0)
+    sx, sy = x.sum(axis=0), y.sum(axis=0)
+    sxx, sxy = (x*x).sum(axis=0), (x*y).sum(axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        slope = (n*sxy - sx*sy)/(n*sxx - sx**2)
+        offset = (sy - slope*sx)/n
+
+    if directions is not None and np.any(directions):
+        diff = np.radians(y - x)
+        veer = np.degrees(np.arctan2(np.where(concurrent, np.sin(diff), 0)
+                                     .sum(axis=0),
+                                     np.where(concurrent, np.cos(diff), 0)
+                                     .sum(axis=0)))
+        slope = np.where(directions, 1, slope)
+        offset = np.where(directions, veer, offset)
+    return slope, offset, n
+
+
+def shear_alpha(target, source, target_height, source_height):
+    '''Power law shear exponents between target and source columns, from the
+    mean wind speeds over concurrent data. All arguments are arrays with one
+    value, or one column, per pair.'''
+    target = np.asarray(target, dtype=float)
+    source = np.asarray(source, dtype=float)
+    concurrent = ~np.isnan(target) & ~np.isnan(source)
+    n = concurrent.sum(axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        target_mean = np.where(concurrent, target, 0).sum(axis=0)/n
+        source_mean = np.where(concurrent, source, 0).sum(axis=0)/n
+        ratio = np.asarray(target_height, dtype=float)/source_height
+        return np.log(target_mean/source_mean)/np.log(ratio)
+
+
+def fill(data, pairs=None, shear=True, min_points=100, mask=None):
+    '''Fill gaps in met mast data
+
+    Gaps are first filled from redundant sensors at the same height with a
+    linear fit on concurrent data. Wind speed gaps that remain are filled by
+    power law shear extrapolation from the nearest other height with
+    enough concurrent data, one target column at a time.
+
+    Parameters:
+    ___________
+    data: DataFrame
+        Met mast data, with ('Signal', Height) columns
+    pairs: list, default None
+        List of (target column, source column) tuples for redundant sensor
+        substitution, tried in order. Defaults to gapfill.redundant_pairs
+    shear: boolean, default True
+        Extrapolate the remaining wind speed gaps from other heights
+    min_points: int, default 100
+        Minimum concurrent points needed for a fit to be used
+    mask: array of bool, default None
+        Rows to use, e.g. from MetMast.qc_mask. Other rows are left out of
+        the fits, are not used as sources and are left as they are.
+
+    Returns:
+    ________
+    Tuple of (filled DataFrame, DataFrame with the missing values per
+    column and how many were filled by each method)
+    '''
+    columns = data.columns.tolist()
+    if pairs is None:
+        pairs = redundant_pairs(columns)
+    numeric = data.select_dtypes(include=[np.number]).columns.tolist()
+    pairs = [(x, y) for x, y in pairs if x in numeric and y in numeric]
+    usable = np.ones(len(data), dtype=bool)
+    if mask is not None:
+        usable = np.asarray(mask, dtype=bool)
+    filled = data.copy()
+    position = dict((x, i) for i, x in enumerate(columns))
+    missing = filled.isnull().sum().values
+    redundant = np.zeros(len(columns), dtype=int)
+    extrapolated = np.zeros(len(columns), dtype=int)
+
+    def values(column):
+        '''Values of a column, NaN outside the usable rows'''
+        return np.where(usable, data[column].values.astype(float), np.nan)
+
+    if pairs:
+        targets = [x for x, y in pairs]
+        sources = [y for x, y in pairs]
+        is_dir = np.array([channels.is_direction(x) for x in targets])
+        source_values = np.column_stack([values(x) for x in sources])
+        target_values = np.column_stack([values(x) for x in targets])
+        slope, offset, n = fit_pairs(target_values, source_values,
+                                     directions=is_dir)
+        predicted = source_values*slope + offset
+        predicted[:, is_dir] = predicted[:, is_dir] % 360
+        for i, target in enumerate(targets):
+            if n[i] < min_points:
+                continue
+            column = filled[target].values.astype(float)
+            gaps = np.isnan(column) & ~np.isnan(predicted[:, i])
+            column[gaps] = predicted[gaps, i]
+            filled[target] = column
+            redundant[position[target]] += gaps.sum()
+
+    if shear:
+        speeds = [x for x in numeric if channels.is_speed(x)
+                  and channels.height(x) is not None]
+        for target in speeds:
+            level = channels.height(target)
+            others = [x for x in speeds if channels.height(x) != level]
+            others.sort(key=lambda x: abs(channels.height(x) - level))
+            column = filled[target].values.astype(float)
+            target_values = values(target)
+            for source in others:
+                gaps = np.isnan(column)
+                if not gaps.any():
+                    break
+                source_values = values(source)
+                concurrent = np.count_nonzero(~np.isnan(target_values) &
+                                              ~np.isnan(source_values))
+                if concurrent < min_points:
+                    continue
+                height = channels.height(source)
+                alpha = shear_alpha(target_values, source_values, level,
+                                    height)
+                if not np.isfinite(alpha):
+                    continue
+                gaps &= ~np.isnan(source_values)
+                column[gaps] = source_values[gaps]*(level/height)**alpha
+                extrapolated[position[target]] += gaps.sum()
+            filled[target] = column
+
+    report = pd.DataFrame({'Missing': missing, 'Redundant': redundant,
+                           'Shear': extrapolated,
+                           'Remaining': filled.isnull().sum().values},
+                          index=data.columns,
+                          columns=['Missing', 'Redundant', 'Shear',
+                                   'Remaining'])
+    return filled, report
@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+'''
+Instrument
+-------
+
+Per-stage timing, row counts and memory deltas for the MetMast pipeline.
+Instrumentation is off by default, and a disabled stage costs a single
+flag check.
+
+    >>> from climatic import instrument
+    >>> instrument.enable(profile='tracemalloc')
+    >>> mast.wind_import(...)
+    >>> instrument.report_json()
+
+Progress messages go to the 'climatic' logger. Stage timings are logged at
+DEBUG level when instrumentation is enabled.
+
+'''
+from __future__ import division
+import functools
+import json
+import logging
+import timeit
+
+log = logging.getLogger('climatic')
+log.addHandler(logging.NullHandler())
+
+PROFILE_MODES = (None, 'cprofile', 'tracemalloc')
+
+
+class _NullStage(object):
+    '''Stand-in returned by stage() when instrumentation is disabled'''
+
+    rows = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class Recorder(object):
+    '''Collects stage records while instrumentation is enabled'''
+
+    def __init__(self):
+        self.enabled = False
+        self.profile = None
+        self.records = []
+        self.stack = []
+
+
+_recorder = Recorder()
+
+
+class Stage(object):
+    '''A timed pipeline stage. Set Stage.rows inside the block to record the
+    number of rows the stage handled.'''
+
+    def __init__(self, name, rows=None):
+        self.name = name
+        self.rows = rows
+
+    def __enter__(self):
+        _recorder.stack.append(self.name)
+        self.path = '/'.join(_recorder.stack)
+        self.profiler = None
+        if _recorder.profile == 'tracemalloc':
+            import tracemalloc
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            self.memory = tracemalloc.get_traced_memory()[0]
+        elif _recorder.profile == 'cprofile' and len(_recorder.stack) == 1:
+            import cProfile
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        self.start = timeit.default_timer()
+        return self
+
+    def __exit__(self, *exc):
+        seconds = timeit.default_timer() - self.start
+        record = {'stage': self.path, 'seconds': seconds, 'rows': self.rows,
+                  'memory_delta_mb': None, 'memory_peak_mb': None}
+        if _recorder.profile == 'tracemalloc':
+            import tracemalloc
+            current, peak = tracemalloc.get_traced_memory()
+            record['memory_delta_mb'] = (current - self.memory)/1e6
+            record['memory_peak_mb'] = peak/1e6
+        if self.profiler is not None:
+            self.profiler.disable()
+            record['profile'] = _top_functions(self.profiler)
+        _recorder.stack.pop()
+        _recorder.records.append(record)
+        log.debug('%s: %.4f s, %s rows', self.path, seconds, self.rows)
+        return False
+
+
+def _top_functions(profiler, limit=15):
+    '''Functions with the highest cumulative time in a cProfile run'''
+    import pstats
+    stats = pstats.Stats(profiler).stats
+    rows = []
+    for (filename, line, func), values in stats.items():
+        calls, cumulative = values[1], values[3]
+        rows.append({'function': '{0}:{1}({2})'.format(filename, line, func),
+                     'calls': calls, 'cumulative_s': cumulative})
+    rows.sort(key=lambda x: x['cumulative_s'], reverse=True)
+    return rows[:limit]
+
+
+def stage(name, rows=None):
+    '''Context manager timing a pipeline stage
+
+    Parameters:
+    ___________
+    name: string
+        Stage name. Nested stages are recorded as 'outer/inner'
+    rows: int, default None
+        Number of rows handled, if known up front
+    '''
+    if not _recorder.enabled:
+        return _NULL_STAGE
+    return Stage(name, rows=rows)
+
+
+def enable(profile=None):
+    '''Turn on instrumentation
+
+    Parameters:
+    ___________
+    profile: string, default None
+        None for timings and row counts only, 'cprofile' to also capture
+        the top functions of each outer stage, or 'tracemalloc' to record
+        memory deltas and peaks
+    '''
+    if profile not in PROFILE_MODES:
+        raise ValueError('profile must be one of {0}'.format(PROFILE_MODES))
+    if profile == 'tracemalloc':
+        import tracemalloc
+        tracemalloc.start()
+    _recorder.enabled = True
+    _recorder.profile = profile
+
+
+def disable():
+    '''Turn off instrumentation. Recorded stages are kept until reset.'''
+    if _recorder.profile == 'tracemalloc':
+        import tracemalloc
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+    _recorder.enabled = False
+    _recorder.profile = None
+
+
+def reset():
+    '''Clear all recorded stages'''
+    _recorder.records = []
+    _recorder.stack = []
+
+
+def report():
+    '''Recorded stages, in completion order, as a list of dicts with the
+    keys stage, seconds, rows, memory_delta_mb and memory_peak_mb, plus
+    profile in cprofile mode. memory_peak_mb is the traced peak since
+    instrumentation was enabled.'''
+    return list(_recorder.records)
+
+
+def report_json(path=None):
+    '''Recorded stages as a JSON string, optionally written to path'''
+    text = json.dumps({'profile': _recorder.profile, 'stages': report()},
+                      indent=2)
+    if path is not None:
+        with open(path, 'w') as f:
+            f.write(text)
+    return text
+
+
+def timed(name):
+    '''Decorator running a MetMast method as a stage, with the row count of
+    MetMast.data'''
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            if not _recorder.enabled:
+                return method(self, *args, **kwargs)
+            with Stage(name) as timer:
+                result = method(self, *args, **kwargs)
+                data = getattr(self, 'data', None)
+                timer.rows = len(data) if data is not None else None
+            return result
+        return wrapper
+    return decorator
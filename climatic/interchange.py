@@ -0,0 +1,267 @@
+# -*- coding: utf-8 -*-
+'''
+Interchange
+-------
+
+Apache Arrow interchange for MetMast data and results. Each numeric
+channel becomes an Arrow column over the same memory as the pandas column,
+and the mast metadata (position, height, time zone, interval and the
+(signal, height) column labels) travels in the schema, so a mast can move
+to another process, a Spark job or a dashboard without pickling.
+
+Files are written in the Arrow IPC file format and read back through a
+memory map, so numeric columns are used in place rather than copied.
+pyarrow is only needed for this module.
+
+    >>> mast.arrow_export('mast.arrow')
+    >>> other = climatic.MetMast()
+    >>> other.arrow_import('mast.arrow')
+
+'''
+from __future__ import division
+import json
+import os
+import numpy as np
+import pandas as pd
+
+METADATA_KEY = b'climatic'
+INDEX_FIELD = 'timestamp'
+ATTRIBUTES = ('lat', 'lon', 'height', 'time_zone', 'interval')
+
+
+def _pyarrow():
+    '''Import pyarrow on first use, so the rest of climatic works
+    without it'''
+    try:
+        import pyarrow
+        import pyarrow.ipc
+    except ImportError:
+        raise ImportError('Arrow interchange needs pyarrow: '
+                          'pip install pyarrow')
+    return pyarrow
+
+
+def _encode_label(label):
+    '''JSON-safe column label. Tuples become lists.'''
+    if isinstance(label, tuple):
+        return [_encode_label(x) for x in label]
+    if isinstance(label, np.generic):
+        return label.item()
+    return label
+
+
+def _decode_label(label):
+    if isinstance(label, list):
+        return tuple(_decode_label(x) for x in label)
+    return label
+
+
+def field_names(labels):
+    '''Unique Arrow field names for column labels, e.g. 'WS Mean 1 | 50'
+    for ('WS Mean 1', 50). The exact labels are kept in the metadata.'''
+    names, seen = [], set()
+    for label in labels:
+        if isinstance(label, tuple):
+            name = ' | '.join(str(x) for x in label)
+        else:
+            name = str(label)
+        base, num = name, 1
+        while name in seen or name == INDEX_FIELD:
+            name = '{0} ({1})'.format(base, num)
+            num += 1
+        seen.add(name)
+        names.append(name)
+    return names
+
+
+def _column_array(values):
+    '''Arrow array for a pandas column. Numeric columns share the column
+    buffer, NaNs stay NaNs rather than becoming nulls.'''
+    pa = _pyarrow()
+    if values.dtype.kind in 'fiub':
+        return pa.array(np.ascontiguousarray(values))
+    return pa.array(values, from_pandas=True)
+
+
+def _index_array(index):
+    pa = _pyarrow()
+    if isinstance(index, pd.DatetimeIndex):
+        tz = None
+        if index.tz is not None:
+            tz = str(index.tz)
+            index = index.tz_convert('UTC').tz_localize(None)
+        stamps = np.asarray(index.values, dtype='datetime64[ns]')
+        return pa.array(stamps, type=pa.timestamp('ns', tz=tz)), 'datetime'
+    values = np.asarray(index)
+    if values.dtype.kind in 'fiu':
+        return pa.array(values), 'numeric'
+    return pa.array([str(x) for x in values], type=pa.string()), 'string'
+
+
+def frame_table(frame, metadata=None):
+    '''Arrow Table of a DataFrame, with the index as the first column and
+    the column labels and any extra metadata in the schema
+
+    Parameters:
+    ___________
+    frame: DataFrame or Series
+    metadata: dict, default None
+        JSON-serializable values stored with the table
+
+    Returns:
+    ________
+    pyarrow.Table
+    '''
+    pa = _pyarrow()
+    if isinstance(frame, pd.Series):
+        frame = frame.to_frame(name=frame.name if frame.name is not None
+                               else 'Value')
+    labels = list(frame.columns)
+    index, kind = _index_array(frame.index)
+    arrays = [index] + [_column_array(frame.iloc[:, num].values)
+                        for num in range(len(labels))]
+    info = dict(metadata or {})
+    info.update({'columns': [_encode_label(x) for x in labels],
+                 'index_kind': kind,
+                 'index_name': _encode_label(frame.index.name)})
+    schema_meta = {METADATA_KEY: json.dumps(info).encode('utf-8')}
+    return pa.Table.from_arrays(arrays, names=[INDEX_FIELD] +
+                                field_names(labels), metadata=schema_meta)
+
+
+def table_metadata(table):
+    '''climatic metadata dict of an Arrow Table'''
+    raw = (table.schema.metadata or {}).get(METADATA_KEY)
+    if raw is None:
+        raise ValueError('Arrow table has no climatic metadata')
+    return json.loads(raw.decode('utf-8'))
+
+
+def _column_values(column):
+    '''NumPy values of an Arrow column, without a copy for numeric columns
+    held in one chunk with no nulls'''
+    if column.num_chunks == 1:
+        chunk = column.chunk(0)
+    else:
+        chunk = column.combine_chunks()
+    if chunk.type.id == _pyarrow().string().id or chunk.null_count:
+        return np.asarray(chunk.to_pandas(), dtype=object)
+    return chunk.to_numpy(zero_copy_only=False)
+
+
+def read_frame(table):
+    '''DataFrame from a table written by interchange.frame_table. Numeric
+    columns are views of the Arrow buffers, so they are read-only.'''
+    info = table_metadata(table)
+    index = table.column(0)
+    if info['index_kind'] == 'datetime':
+        index = pd.DatetimeIndex(index.to_pandas())
+    else:
+        index = pd.Index(_column_values(index))
+    index.name = _decode_label(info['index_name'])
+    labels = [_decode_label(x) for x in info['columns']]
+    columns = [_column_values(table.column(num + 1))
+               for num in range(len(labels))]
+    frame = pd.DataFrame(dict(zip(range(len(labels)), columns)),
+                         index=index, copy=False)
+    frame.columns = pd.Index(labels)
+    return frame
+
+
+def mast_table(mast):
+    '''Arrow Table of the mast data, with the mast attributes in the
+    schema metadata'''
+    metadata = dict((x, getattr(mast, x)) for x in ATTRIBUTES)
+    metadata['multidata'] = hasattr(mast, '_multidata')
+    return frame_table(mast.data, metadata=metadata)
+
+
+def results(mast):
+    '''dict of name: DataFrame of the binned results held on a mast, e.g.
+    {'WD1_Max': mast.data_binned_WD1_Max}. The default result is named
+    ''.'''
+    found = {}
+    for attr, value in vars(mast).items():
+        if attr.startswith('data_binned') and isinstance(value, pd.DataFrame):
+            found[attr[len('data_binned_'):]] = value
+    return found
+
+
+def write_table(table, path):
+    '''Write a table as an uncompressed Arrow IPC file, which can be
+    memory mapped when read'''
+    pa = _pyarrow()
+    with pa.OSFile(path, 'wb') as sink:
+        writer = pa.ipc.new_file(sink, table.schema)
+        try:
+            writer.write_table(table)
+        finally:
+            writer.close()
+    return path
+
+
+def read_table(path, memory_map=True):
+    '''Read an Arrow IPC file. With memory_map the columns point into the
+    mapped file, so nothing is copied until the data is changed.'''
+    pa = _pyarrow()
+    source = pa.memory_map(path, 'r') if memory_map else pa.OSFile(path, 'rb')
+    return pa.ipc.open_file(source).read_all()
+
+
+def to_ipc(table):
+    '''Arrow IPC stream of a table, as a pyarrow Buffer, e.g. to send to
+    another process or service'''
+    pa = _pyarrow()
+    sink = pa.BufferOutputStream()
+    writer = pa.ipc.new_stream(sink, table.schema)
+    try:
+        writer.write_table(table)
+    finally:
+        writer.close()
+    return sink.getvalue()
+
+
+def from_ipc(buffer):
+    '''Table from an Arrow IPC stream. Columns reference the buffer
+    without copies.'''
+    pa = _pyarrow()
+    return pa.ipc.open_stream(pa.py_buffer(buffer)).read_all()
+
+
+def result_path(path, name):
+    '''Path of a binned result stored next to a mast file, e.g.
+    mast.binned_WD1_Max.arrow for mast.arrow'''
+    root, ext = os.path.splitext(path)
+    label = 'binned_{0}'.format(name) if name else 'binned'
+    return '{0}.{1}{2}'.format(root, label, ext or '.arrow')
+
+
+def write_mast(mast, path):
+    '''Write the mast data to an Arrow IPC file, and each binned result to
+    its own file next to it. Returns a list of the paths written.'''
+    found = results(mast)
+    table = mast_table(mast)
+    info = table_metadata(table)
+    info['results'] = sorted(found)
+    table = table.replace_schema_metadata(
+        {METADATA_KEY: json.dumps(info).encode('utf-8')})
+    paths = [write_table(table, path)]
+    for name in sorted(found):
+        paths.append(write_table(frame_table(found[name]),
+                                 result_path(path, name)))
+    return paths
+
+
+def apply_table(mast, table):
+    '''Set the data and attributes of a mast from a table written by
+    interchange.mast_table'''
+    info = table_metadata(table)
+    mast.data = read_frame(table)
+    for attr in ATTRIBUTES:
+        if attr in info:
+            setattr(mast, attr, info[attr])
+    if info.get('multidata'):
+        swapped = pd.MultiIndex.from_tuples([(x, y) for y, x in
+                                             mast.data.columns])
+        mast._multidata = pd.DataFrame(mast.data, columns=swapped)
+    return info
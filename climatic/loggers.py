@@ -0,0 +1,327 @@
+# -*- coding: utf-8 -*-
+'''
+Loggers
+-------
+
+A reader specialised for met mast logger exports (NRG, Campbell, Ammonit
+and the USDOE anemometer loan files in examples/). The logger type, header
+row and timestamp format are detected once per file, timestamps are parsed
+with that fixed format, and the numeric channels are read in bulk into a
+preallocated array.
+
+'''
+from __future__ import division
+import re
+import multiprocessing
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+SIGNATURES = (('Campbell TOA5', r'^"?TOA5'),
+              ('NRG Symphonie', r'(Symphonie|SDR|NRG Systems)'),
+              ('NRG 9200', r'(DR Version|Read by)'),
+              ('Ammonit', r'(Ammonit|Meteo-40)'))
+
+TIME_FORMATS = ('%Y-%m-%d %H:%M:%S', '%Y-%m-%d %H:%M', '%Y/%m/%d %H:%M:%S',
+                '%Y/%m/%d %H:%M', '%m/%d/%Y %H:%M:%S', '%m/%d/%Y %H:%M',
+                '%m/%d/%y %H:%M:%S', '%m/%d/%y %H:%M', '%d.%m.%Y %H:%M:%S',
+                '%d.%m.%Y %H:%M', '%d/%m/%Y %H:%M:%S', '%d/%m/%Y %H:%M')
+
+_DATE = re.compile(r'^\s*"?\d{1,4}[-/.]\d{1,2}[-/.]\d{1,4}[ T]\d{1,2}:\d{2}')
+
+#Timestamp formats already detected, keyed by logger and timestamp layout
+_format_cache = {}
+
+
+def _fields(line, delimiter):
+    return [x.strip().strip('"') for x in line.split(delimiter)]
+
+
+def _is_number(text):
+    try:
+        float(text)
+        return True
+    except ValueError:
+        return text == '' or text.upper() in ('NAN', 'NA', '-9999')
+
+
+def _is_data(fields, time_col):
+    '''Timestamped row with mostly numeric values'''
+    if len(fields) <= time_col + 1 or not _DATE.match(fields[time_col]):
+        return False
+    numbers = [_is_number(x) for i, x in enumerate(fields) if i != time_col]
+    return sum(numbers) >= len(numbers)/2
+
+
+def time_format(stamps, logger='Generic'):
+    '''Find the first strptime format that parses every sample timestamp.
+    Formats are cached per logger and timestamp layout, and a cached format
+    is checked against the samples before it is reused.'''
+    key = (logger, re.sub(r'\d+', '9', stamps[0]))
+    candidates = list(TIME_FORMATS)
+    if key in _format_cache:
+        candidates.insert(0, _format_cache[key])
+    for fmt in candidates:
+        try:
+            for stamp in stamps:
+                datetime.strptime(stamp, fmt)
+        except ValueError:
+            continue
+        _format_cache[key] = fmt
+        return fmt
+    raise ValueError('Unrecognised timestamp format: {0}'.format(stamps[0]))
+
+
+def parse_times(stamps, fmt):
+    '''Parse timestamp strings with a known format to int64 nanoseconds.
+
+    Fixed width stamps are parsed directly from their digit bytes, which
+    avoids a strptime call per row. Anything else, or any stamp that does
+    not fit the layout of the first one, goes through pd.to_datetime.'''
+    stamps = np.asarray(stamps, dtype=object)
+    fields = _fixed_fields(stamps, fmt)
+    if fields is None:
+        return pd.to_datetime(stamps, format=fmt).values.astype(
+            'datetime64[ns]').view('i8')
+    return fields
+
+
+def _fixed_fields(stamps, fmt):
+    directives = re.findall(r'%([a-zA-Z])', fmt)
+    if not len(stamps) or set(directives) - set('YymdHMS'):
+        return None
+    try:
+        raw = stamps.astype('S')
+    except (UnicodeEncodeError, ValueError, TypeError):
+        return None
+    width = raw.dtype.itemsize
+    codes = raw.view(np.uint8).reshape(len(raw), width)
+    runs = [m.span() for m in re.finditer(r'\d+', stamps[0])]
+    if len(runs) != len(directives) or len(stamps[0]) != width:
+        return None
+    is_digit = np.zeros(width, dtype=bool)
+    for start, end in runs:
+        is_digit[start:end] = True
+    separators = codes[:, ~is_digit]
+    if not (separators == codes[0, ~is_digit]).all():
+        return None
+    digits = codes[:, is_digit].astype(np.int64) - 48
+    if digits.min() < 0 or digits.max() > 9:
+        return None
+
+    values = {}
+    column = 0
+    for (start, end), directive in zip(runs, directives):
+        size = end - start
+        scale = 10**np.arange(size - 1, -1, -1)
+        values[directive] = digits[:, column:column + size].dot(scale)
+        column += size
+    if 'y' in values:
+        year = values['y']
+        values['Y'] = np.where(year < 69, 2000 + year, 1900 + year)
+    if not set('Ymd') <= set(values):
+        return None
+    zero = np.zeros(len(stamps), dtype=np.int64)
+    hour, minute, second = [values.get(x, zero) for x in 'HMS']
+    month, day = values['m'], values['d']
+    if ((month < 1) | (month > 12) | (day < 1) | (hour > 23) | (minute > 59)
+            | (second > 59)).any():
+        return None
+    months = ((values['Y'] - 1970)*12 + month - 1).astype('datetime64[M]')
+    days = months.astype('datetime64[D]') + (day - 1)
+    if (days.astype('datetime64[M]') != months).any():
+        return None
+    return (days.astype('datetime64[ns]').view('i8') +
+            ((hour*60 + minute)*60 + second)*1000000000)
+
+
+def sniff(path, time_col=0, sample_bytes=262144, sample_rows=500):
+    '''Detect the layout of a logger file
+
+    Parameters:
+    ___________
+    path: string
+        Path to logger file
+    time_col: int, default 0
+        Column with the timestamps
+    sample_bytes: int, default 262144
+        Bytes read from the top of the file for detection
+
+    Returns:
+    ________
+    dict with the logger type, delimiter, header names, the byte offset of
+    the first data row, the non-numeric columns and the timestamp format
+    '''
+    with open(path, 'rb') as f:
+        raw = f.read(sample_bytes)
+    text = raw.decode('latin-1')
+    lines = text.splitlines(True)
+    if len(raw) == sample_bytes and len(lines) > 1:
+        lines = lines[:-1]
+
+    logger = 'Generic'
+    head = ''.join(lines[:5])
+    for name, pattern in SIGNATURES:
+        if re.search(pattern, head, flags=re.MULTILINE):
+            logger = name
+            break
+
+    body = ''.join(lines[:200])
+    counts = [(body.count(x), x) for x in (',', '\t', ';')]
+    delimiter = max(counts)[1]
+
+    offset = 0
+    data_line = None
+    for num, line in enumerate(lines):
+        if _is_data(_fields(line, delimiter), time_col):
+            data_line = num
+            break
+        offset += len(line.encode('latin-1'))
+    if data_line is None:
+        raise ValueError('No timestamped data rows found in {0}'.format(path))
+
+    ncols = len(_fields(lines[data_line], delimiter))
+    if logger == 'Campbell TOA5':
+        header_line = 1
+    else:
+        header_line = None
+        for num in range(data_line - 1, -1, -1):
+            fields = _fields(lines[num], delimiter)
+            if len([x for x in fields if x]) >= 2:
+                header_line = num
+                break
+    if header_line is not None:
+        names = _fields(lines[header_line], delimiter)[:ncols]
+    else:
+        names = []
+    names.extend(['Column {0}'.format(i) for i in range(len(names), ncols)])
+
+    sample = [_fields(x, delimiter) for x in
+              lines[data_line:data_line + sample_rows]]
+    sample = [x for x in sample if _is_data(x, time_col)]
+    stamps = [x[time_col] for x in sample]
+    text = [i for i in range(ncols) if i != time_col and
+            not all(_is_number(x[i]) for x in sample if len(x) > i)]
+    return {'logger': logger, 'delimiter': delimiter, 'names': names,
+            'header_line': header_line, 'data_line': data_line,
+            'offset': offset, 'text_columns': text,
+            'time_format': time_format(stamps, logger)}
+
+
+def _count_rows(path, offset, block=1048576):
+    '''Upper bound on the number of data rows after offset'''
+    newlines = returns = 0
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        while True:
+            chunk = f.read(block)
+            if not chunk:
+                break
+            newlines += chunk.count(b'\n')
+            returns += chunk.count(b'\r')
+    return max(newlines, returns) + 1
+
+
+def read_logger(path, time_col=0, columns=None, chunksize=500000):
+    '''Read a met mast logger file
+
+    Parameters:
+    ___________
+    path: string
+        Path to logger file
+    time_col: int, default 0
+        Column with the timestamps
+    columns: list, default None
+        Names for the data columns, e.g. ('Signal', Height) tuples. Defaults
+        to the names in the file header
+    chunksize: int, default 500000
+        Rows parsed at a time
+
+    Returns:
+    ________
+    DataFrame with a DatetimeIndex. Columns that hold text in the first
+    rows are kept as text, other values that are not numbers are read as
+    NaN.
+    '''
+    info = sniff(path, time_col=time_col)
+    ncols = len(info['names'])
+    text_cols = info['text_columns']
+    data_cols = [i for i in range(ncols)
+                 if i != time_col and i not in text_cols]
+    nrows = _count_rows(path, info['offset'])
+    values = np.empty((nrows, len(data_cols)))
+    stamps = np.empty(nrows, dtype='i8')
+    text = dict((i, []) for i in text_cols)
+
+    filled = 0
+    with open(path, 'rb') as f:
+        f.seek(info['offset'])
+        reader = pd.read_csv(f, sep=info['delimiter'], header=None,
+                             names=list(range(ncols)), usecols=range(ncols),
+                             dtype=dict((i, str) for i in
+                                        [time_col] + text_cols),
+                             chunksize=chunksize,
+                             skip_blank_lines=True, skipinitialspace=True)
+        for chunk in reader:
+            end = filled + len(chunk)
+            stamps[filled:end] = parse_times(chunk[time_col].values,
+                                             info['time_format'])
+            for i, col in enumerate(data_cols):
+                column = chunk[col]
+                if column.dtype == object:
+                    column = pd.to_numeric(column, errors='coerce')
+                values[filled:end, i] = column.values
+            for col in text_cols:
+                text[col].append(chunk[col].values)
+            filled = end
+
+    if columns is None:
+        columns = [x for i, x in enumerate(info['names']) if i != time_col]
+    names = dict(zip([i for i in range(ncols) if i != time_col], columns))
+    index = pd.DatetimeIndex(stamps[:filled].view('datetime64[ns]'))
+    data = pd.DataFrame(values[:filled], index=index,
+                        columns=[names[i] for i in data_cols])
+    if text_cols:
+        for col in text_cols:
+            data[names[col]] = np.concatenate(text[col])
+        data = data[columns]
+    data.columns = pd.Index(columns)
+    return data
+
+
+def _read_args(args):
+    return read_logger(*args)
+
+
+def read_loggers(paths, time_col=0, columns=None, processes=None):
+    '''Read many logger files in parallel and join them in time order
+
+    Parameters:
+    ___________
+    paths: list
+        Paths to logger files with the same channel layout
+    time_col: int, default 0
+        Column with the timestamps
+    columns: list, default None
+        Names for the data columns
+    processes: int, default None
+        Worker processes. Defaults to one per CPU, and files are read in
+        this process when there is only one file or processes=1
+
+    Returns:
+    ________
+    DataFrame with a DatetimeIndex, sorted by time
+    '''
+    args = [(x, time_col, columns) for x in paths]
+    if len(paths) == 1 or processes == 1:
+        frames = [_read_args(x) for x in args]
+    else:
+        pool = multiprocessing.Pool(processes)
+        try:
+            frames = pool.map(_read_args, args)
+        finally:
+            pool.close()
+            pool.join()
+    if len(frames) == 1:
+        return frames[0]
+    return pd.concat(frames).sort_index(kind='mergesort')
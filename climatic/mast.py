@@ -19,6 +19,23 @@ import scipy.stats as spystats
 from header_classifier import features
 import weibull_est as west
 import plottools
+import resample
+import circular
+import mcp
+import turbulence
+import channels
+import qc
+import gapfill
+import loggers
+import extremes
+import density
+import uncertainty
+import timezones
+import export
+import interchange
+import variability
+from instrument import log, stage, timed
+from cache import LRUCache, memoized
 
 
 class MetMast(object):
@@ -47,6 +64,58 @@ class MetMast(object):
         self.lon = lon
         self.height = height
         self.time_zone = time_zone
+        self.interval = None
+        self.qc_rules = []
+        self.qc_flags = None
+        self.tz_report = None
+        self.data_version = 0
+        self._data = None
+        self._cache = None
+
+    @property
+    def data(self):
+        '''Met mast data. Assigning new data bumps MetMast.data_version.
+        The QC flags and rules are cleared when the new data has different
+        rows, as they were evaluated on the old index.'''
+        return self._data
+
+    @data.setter
+    def data(self, frame):
+        old = self._data
+        if old is None or frame is None or not frame.index.equals(old.index):
+            self.qc_rules = []
+            self.qc_flags = None
+        self._data = frame
+        self.touch()
+
+    def touch(self):
+        '''Mark the data as changed. Call this after modifying MetMast.data
+        in place, e.g. mast.data[column] = values, so cached results are
+        not reused.'''
+        self.data_version += 1
+
+    def enable_cache(self, maxsize=128):
+        '''Cache analysis results, keyed by method, arguments and data
+        version, keeping at most maxsize results with least recently used
+        eviction. Each call returns its own copy of a cached result, so
+        results can be modified freely.'''
+        self._cache = LRUCache(maxsize=maxsize)
+
+    def disable_cache(self):
+        '''Stop caching and drop all cached results'''
+        self._cache = None
+
+    def clear_cache(self):
+        '''Drop all cached results'''
+        if self._cache is not None:
+            self._cache.clear()
+
+    def cache_stats(self):
+        '''dict of cache hits, misses, evictions, uncacheable calls, size
+        and maxsize, or None if caching is off'''
+        if self._cache is None:
+            return None
+        return self._cache.stats()
 
     def __repr__(self):
         if self.time_zone:
@@ -59,8 +128,11 @@ class MetMast(object):
                                          self.height,
                                          zone_or_none)
 
+    @timed('wind_import')
     def wind_import(self, path, columns=None, header_row=None, time_col=None,
-                    delimiter=',', smart_headers=False, subs=None, **kwargs):
+                    delimiter=',', smart_headers=False, subs=None,
+                    localize=None, ambiguous='infer', nonexistent='NaT',
+                    **kwargs):
         '''Wind data import. This is a very thin wrapper on the pandas
         read_table method, with the option to pass keyword arguments to
         pandas read_table if needed.
@@ -82,6 +154,19 @@ class MetMast(object):
             Ex: subs = {'Ch1': 'WS', 'Ch2': WD}
         smart_headers: boolean, default False
             Uses NLTK text classifier to predict column headers
+        localize: string, default None
+            Localise the timestamps to MetMast.time_zone. 'standard' for
+            loggers on local standard time all year, 'observed' for loggers
+            that follow daylight saving changes. None leaves the index
+            naive.
+        ambiguous: string, default 'infer'
+            Handling of the repeated autumn hour with localize='observed':
+            'infer', 'first', 'last', 'NaT' or 'raise'
+        nonexistent: string, default 'NaT'
+            Handling of the skipped spring hour with localize='observed':
+            'NaT', 'shift_forward', 'shift_backward' or 'raise'. Rows left
+            as NaT are dropped, and MetMast.tz_report lists the affected
+            timestamps.
 
         Returns:
         --------
@@ -92,98 +177,271 @@ class MetMast(object):
             raise ValueError('Please enter a value for time_col')
 
         if columns and smart_headers:
-            print(('Warning: MetMast will default to user defined columns if '
-                   'both the columns argument and smart_headers=True are '
-                   'passed to wind_import'))
-
-        print('Importing data...')
-        self.data = pd.read_table(path, header=header_row, index_col=time_col,
-                                  parse_dates=True, delimiter=delimiter,
-                                  names=columns, **kwargs)
-          
-                                  
-        if not isinstance(self.data.index, pd.DatetimeIndex):
-            try: 
-                self.data.index = self.data.index.to_datetime()
-            except ValueError: 
-                print(('Timestamp column not converting correctly. Iterating'
-                       ' through index to check timestamp validity...'))
-                for num, index in enumerate(self.data.index): 
-                    try: 
-                        pd.Timestamp(index)
-                    except ValueError: 
-                        stamps = (index, 
-                                  self.data.index[num-1], 
-                                  self.data.index[num+1])
-                        print(('Cannot parse {0}. Previous timestamp is {1}. ' 
-                               'Next timestamp is {2}.').format(stamps[0],
-                                                                stamps[1],
-                                                                stamps[2]))
-                
+            log.warning(('MetMast will default to user defined columns if '
+                         'both the columns argument and smart_headers=True '
+                         'are passed to wind_import'))
+
+        log.info('Importing data...')
+        with stage('read') as read:
+            self.data = pd.read_table(path, header=header_row,
+                                      index_col=time_col, parse_dates=True,
+                                      delimiter=delimiter, names=columns,
+                                      **kwargs)
+            read.rows = len(self.data)
+
+        with stage('timestamps', rows=len(self.data)):
+            if not isinstance(self.data.index, pd.DatetimeIndex):
+                try: 
+                    self.data.index = self.data.index.to_datetime()
+                except ValueError: 
+                    log.warning(('Timestamp column not converting correctly. '
+                                 'Iterating through index to check timestamp '
+                                 'validity...'))
+                    for num, index in enumerate(self.data.index): 
+                        try: 
+                            pd.Timestamp(index)
+                        except ValueError: 
+                            stamps = (index, 
+                                      self.data.index[num-1], 
+                                      self.data.index[num+1])
+                            log.warning(('Cannot parse {0}. Previous timestamp '
+                                         'is {1}. Next timestamp is '
+                                         '{2}.').format(stamps[0], stamps[1],
+                                                        stamps[2]))
+
+            if localize is not None:
+                self._localize(localize, ambiguous, nonexistent)
+            try:
+                self.interval = resample.infer_interval(self.data.index)
+            except ValueError:
+                self.interval = None
+
         if smart_headers and not columns:
             '''Smart parse columns for Parameters'''
 
-            print('Parsing headers with smart_headers...')
-            data_columns = self.data.columns.tolist()
-            #Replace with sub'd values if given
-            if subs: 
-            #Need to refactor this at some point...
-                temp = []
-                for col in data_columns: 
-                    for key, value in subs.iteritems(): 
-                        if re.match(key, col):
-                            temp.append(re.sub(key, value, col))  
-                data_columns = temp       
+            log.info('Parsing headers with smart_headers...')
+            with stage('headers', rows=len(self.data)):
+                data_columns = self.data.columns.tolist()
+                #Replace with sub'd values if given
+                if subs: 
+                #Need to refactor this at some point...
+                    temp = []
+                    for col in data_columns: 
+                        for key, value in subs.iteritems(): 
+                            if re.match(key, col):
+                                temp.append(re.sub(key, value, col))  
+                    data_columns = temp       
             
-            data_columns = [x.strip().lower() for x in data_columns]
-
-            #Import NLTK classifier (see header_classifier.py)
-            pkg_dir, filename = os.path.split(__file__)
-            classifier_path = os.path.join(pkg_dir, 'classifier.pickle')
-            with open(classifier_path, 'r') as f:
-                classifier = pickle.load(f)
-
-            #Search dict for parameter match, rename column
-            sigs = ['WS', 'WD', 'TI', 'Temp', 'Rho']
-            atts = ['Max', 'Min', 'Mean', 'StdDev']
-            combine = [' '.join([x, y]) for x in sigs for y in atts]
-            iter_dict = {}
-            for sigs in combine:
-                iter_dict.setdefault(sigs, 1)
-
-            columns = []
-            for x, cols in enumerate(data_columns):
-                get_col = classifier.classify(features(cols))
-                get_height = re.search(r'([0-9.]+\s*m)|([0-9.]+\s*ft)',
-                                       cols)
-                if get_height:
-                    height = float(re.split(r'm|ft', get_height.group())[0])
-                elif self.height:
-                    print(('Smart Headers could not find a height in the '
-                           'header string. Defaulting to met mast "height" '
-                           'attribute'))
-                    height = self.height
-                else:
-                    print(('Smart headers could not find a height.'
-                           ' Defaulting to integers.'))
-                    height = iter_dict[get_col]
-                new_col = '{0} {1}'.format(get_col, str(iter_dict[get_col]))
-                columns.append((new_col, height))
-                iter_dict[get_col] += 1
-            self.data.columns = columns
-            print(('The following column headers have been generated by '
-                   'smart_headers:\n'))
+                data_columns = [x.strip().lower() for x in data_columns]
+
+                #Import NLTK classifier (see header_classifier.py)
+                pkg_dir, filename = os.path.split(__file__)
+                classifier_path = os.path.join(pkg_dir, 'classifier.pickle')
+                with open(classifier_path, 'r') as f:
+                    classifier = pickle.load(f)
+
+                #Search dict for parameter match, rename column
+                sigs = ['WS', 'WD', 'TI', 'Temp', 'Rho']
+                atts = ['Max', 'Min', 'Mean', 'StdDev']
+                combine = [' '.join([x, y]) for x in sigs for y in atts]
+                iter_dict = {}
+                for sigs in combine:
+                    iter_dict.setdefault(sigs, 1)
+
+                columns = []
+                for x, cols in enumerate(data_columns):
+                    get_col = classifier.classify(features(cols))
+                    get_height = re.search(r'([0-9.]+\s*m)|([0-9.]+\s*ft)',
+                                           cols)
+                    if get_height:
+                        height = float(re.split(r'm|ft',
+                                                get_height.group())[0])
+                    elif self.height:
+                        log.warning(('Smart Headers could not find a height '
+                                     'in the header string. Defaulting to '
+                                     'met mast "height" attribute'))
+                        height = self.height
+                    else:
+                        log.warning(('Smart headers could not find a height.'
+                                     ' Defaulting to integers.'))
+                        height = iter_dict[get_col]
+                    new_col = '{0} {1}'.format(get_col,
+                                               str(iter_dict[get_col]))
+                    columns.append((new_col, height))
+                    iter_dict[get_col] += 1
+                self.data.columns = columns
+            log.info(('The following column headers have been generated by '
+                      'smart_headers:\n'))
             col_print = [x+' --> '+str(y) for x, y in zip(data_columns,
                                                           columns)]
             for x in col_print:
-                print(x)
+                log.info(x)
 
             #Set up data as MultiIndex for height processing
             swp_cols = pd.MultiIndex.from_tuples([(x, y) for y, x in columns])
             self._multidata = pd.DataFrame(self.data, columns=swp_cols)
 
+    @timed('logger_import')
+    def logger_import(self, paths, columns=None, time_col=0, processes=None,
+                      localize=None, ambiguous='infer', nonexistent='NaT'):
+        '''Fast import of raw logger exports. The logger type, header row,
+        delimiter and timestamp format are detected from each file, so no
+        header_row or read_table arguments are needed.
+
+        Parameters:
+        ----------
+        paths: string or list
+            Path, or list of paths, to logger files with the same channels.
+            Several files are read in parallel and joined in time order.
+        columns: list, default None
+            Column headers of the form ('Signal', 'Height'), one for each
+            column except the timestamps. Defaults to the file header.
+        time_col: int, default 0
+            Column with the timestamps
+        processes: int, default None
+            Worker processes for reading several files
+        localize, ambiguous, nonexistent: string
+            Time zone localisation, as in MetMast.wind_import
+        '''
+        if not isinstance(paths, (list, tuple)):
+            paths = [paths]
+        log.info('Importing data...')
+        with stage('read') as read:
+            self.data = loggers.read_loggers(paths, time_col=time_col,
+                                             columns=columns,
+                                             processes=processes)
+            read.rows = len(self.data)
+        if localize is not None:
+            self._localize(localize, ambiguous, nonexistent)
+        try:
+            self.interval = resample.infer_interval(self.data.index)
+        except ValueError:
+            self.interval = None
+
+    def _localize(self, mode, ambiguous, nonexistent):
+        '''Localise the index to MetMast.time_zone and keep the report'''
+        if not self.time_zone:
+            raise ValueError('Localising timestamps needs a MetMast '
+                             'time_zone')
+        with stage('localize', rows=len(self.data)):
+            index, report = timezones.localize(self.data.index,
+                                               self.time_zone, mode=mode,
+                                               ambiguous=ambiguous,
+                                               nonexistent=nonexistent)
+            placed = np.asarray(index.notnull())
+            data = self.data
+            data.index = index
+            if not placed.all():
+                data = data[placed]
+            self.data = data
+        self.tz_report = report
+        if len(report['ambiguous']) or len(report['nonexistent']):
+            log.warning(('{0} ambiguous and {1} nonexistent local timestamps '
+                         'around daylight saving changes, {2} rows '
+                         'dropped. See MetMast.tz_report.').format(
+                             len(report['ambiguous']),
+                             len(report['nonexistent']),
+                             report['unplaced']))
+
+    @timed('arrow_import')
+    def arrow_import(self, source, memory_map=True):
+        '''Import mast data, attributes and binned results from Arrow.
+        Numeric columns are used in place in the Arrow buffers, so they are
+        read-only until replaced. Binned results of earlier imports or
+        analyses are cleared. Needs pyarrow.
+
+        Parameters:
+        ----------
+        source: string, pyarrow.Table or buffer
+            Path to a file from MetMast.arrow_export, a table from
+            MetMast.to_arrow, or an IPC stream from interchange.to_ipc
+        memory_map: boolean, default True
+            Memory map files rather than reading them
+        '''
+        path = None
+        if isinstance(source, str):
+            path = source
+            table = interchange.read_table(path, memory_map=memory_map)
+        elif hasattr(source, 'schema'):
+            table = source
+        else:
+            table = interchange.from_ipc(source)
+        info = interchange.apply_table(self, table)
+        for attr in [x for x in vars(self) if x.startswith('data_binned')]:
+            delattr(self, attr)
+        if path is not None:
+            for name in info.get('results', []):
+                result = interchange.read_table(
+                    interchange.result_path(path, name),
+                    memory_map=memory_map)
+                attr = 'data_binned_{0}'.format(name) if name else \
+                    'data_binned'
+                setattr(self, attr, interchange.read_frame(result))
+
+    @timed('arrow_export')
+    def arrow_export(self, path):
+        '''Write the mast data and attributes to an Arrow IPC file, with
+        any binned results in files next to it, e.g. mast.binned.arrow.
+        Needs pyarrow.
+
+        Returns:
+        ________
+        List of the paths written
+        '''
+        return interchange.write_mast(self, path)
+
+    def to_arrow(self):
+        '''Mast data as a pyarrow Table, sharing the numeric column
+        buffers, with the mast attributes in the schema metadata'''
+        return interchange.mast_table(self)
+
+    def hours_per_record(self):
+        '''Hours represented by a single record, from the sampling interval
+        detected on import. Falls back to 10 minute data if no interval
+        could be detected.'''
+        if self.interval is None:
+            return 1/6
+        return self.interval/3600
+
+    @timed('resample')
+    def resample(self, freq='10Min', directions=None, min_coverage=0,
+                 chunksize=1000000):
+        '''Average the mast data into fixed time blocks, replacing
+        MetMast.data. Wind directions are vector averaged, and all other
+        numeric channels are scalar averaged.
+
+        Parameters:
+        ___________
+        freq: string or float, default '10Min'
+            Block length, either a pandas time string or a number of seconds
+        directions: list, default None
+            Columns to vector average. Defaults to all columns whose signal
+            name looks like a direction (WD, Dir, Direction)
+        min_coverage: float, default 0
+            Fraction of the expected records per block needed for a valid
+            average
+        chunksize: int, default 1000000
+            Number of rows reduced at a time, to bound memory on 1 Hz data
+
+        Examples:
+        _________
+        >>> mast.resample('10Min', min_coverage=0.9)
+        >>> mast.interval
+        600.0
+        '''
+        self.data = resample.block_average(self.data, freq,
+                                           directions=directions,
+                                           min_coverage=min_coverage,
+                                           chunksize=chunksize)
+        self.interval = resample.freq_seconds(freq)
+        if hasattr(self, '_multidata'):
+            swapped = pd.MultiIndex.from_tuples([(x, y) for y, x in
+                                                 self.data.columns])
+            self._multidata = pd.DataFrame(self.data, columns=swapped)
+
+    @timed('weibull')
     def weibull(self, column=None, ws_intervals=1, method='EuroAtlas',
-                plot='matplotlib'):
+                plot='matplotlib', mask=None, rho=1.225):
         '''Calculate distribution and weibull parameters from data
 
         Parameters:
@@ -198,42 +456,68 @@ class MetMast(object):
             Choose whether or not to plot your data, and what method.
             Currently only supporting matplotlib, but hoping to add
             Bokeh as that library evolves.
+        mask: array of bool, default None
+            Rows to include, e.g. from MetMast.qc_mask
+        rho: float, default 1.225
+            Mean air density for the power density, e.g. from
+            MetMast.power_density
 
         Returns:
         ________
-        DataFrame with hourly data distributions
+        dict with the Weibull A and k, 'Dist', a DataFrame with the record
+        counts and hourly data distributions, and 'Power Density', the mean
+        wind power density in W/m^2 from the same third moment used by the
+        EuroAtlas fit. The record column is labeled with the sampling
+        interval, e.g. 'Binned: 10Min'
         '''
+        result = self._weibull_fit(column, ws_intervals, method, mask, rho)
+
+        if plot == 'matplotlib':
+            A, k, dist = result['Weibull A'], result['Weibull k'], \
+                result['Dist']
+            rv = spystats.exponweib(1, k, scale=A, floc=0)
+            x = np.arange(0, len(dist), ws_intervals)
+            with stage('plot'):
+                smooth = np.arange(0, 100, 0.1)
+                plottools.weibull(smooth, rv.pdf(smooth), binned=True,
+                                  binned_x=x,
+                                  binned_data=dist['Binned: Hourly'],
+                                  align='edge')
+        return dict(result)
 
+    @memoized
+    def _weibull_fit(self, column, ws_intervals, method, mask, rho):
+        '''Weibull distribution and fit, without plotting'''
         ws_data = self.data[column]
+        if mask is not None:
+            ws_data = ws_data[np.asarray(mask, dtype=bool)]
         ws_range = np.arange(0, ws_data.max()+ws_intervals,
                              ws_intervals)
         binned = pd.cut(ws_data, ws_range)
-        dist_10min = pd.value_counts(binned).reindex(binned.levels)
-        dist = pd.DataFrame({'Binned: 10Min': dist_10min})
-        dist['Binned: Hourly'] = dist['Binned: 10Min']/6
+        dist_records = pd.value_counts(binned).reindex(binned.levels)
+        records = 'Binned: {0}'.format(resample.interval_label(
+            self.hours_per_record()*3600))
+        dist = pd.DataFrame({records: dist_records})
+        dist['Binned: Hourly'] = dist[records]*self.hours_per_record()
         dist = dist.fillna(0)
-        normed = dist['Binned: 10Min']/dist['Binned: 10Min'].sum()
+        normed = dist[records]/dist[records].sum()
         ws_normed = normed.values
         x = np.arange(0, len(ws_normed), ws_intervals)
 
+        moments = west.sample_moments(ws_data)
         if method == 'EuroAtlas':
-            A, k = west.euro_atlas(ws_data)
+            A, k = west.euro_atlas(moments=moments)
         elif method == 'LeastSq':
             A, k = west.least_sq(ws_normed, x)
 
         A = round(A, 3)
         k = round(k, 3)
-        rv = spystats.exponweib(1, k, scale=A, floc=0)
-
-        if plot == 'matplotlib':
-            smooth = np.arange(0, 100, 0.1)
-            plottools.weibull(smooth, rv.pdf(smooth), binned=True,
-                              binned_x=x, binned_data=dist['Binned: Hourly'],
-                              align='edge')
+        return {'Weibull A': A, 'Weibull k': k, 'Dist': dist,
+                'Power Density': 0.5*rho*moments['a3']}
 
-        return {'Weibull A': A, 'Weibull k': k, 'Dist': dist}
-
-    def sectorwise(self, column=None, sectors=12, plot='matplotlib', **kwargs):
+    @timed('sectorwise')
+    def sectorwise(self, column=None, sectors=12, plot='matplotlib', mask=None,
+                   speed=None, **kwargs):
         '''Bin and plot the data sectorwise
         
         Parameters:
@@ -246,36 +530,681 @@ class MetMast(object):
             Choose whether or not to plot your data, and what method.
             Currently only supporting matplotlib, but hoping to add
             Bokeh as that library evolves.
+        mask: array of bool, default None
+            Rows to include, e.g. from MetMast.qc_mask
+        speed: tuple, default None
+            Wind speed column. If given, the mean wind speed and the speed
+            weighted vector mean direction of each sector are added.
 
         Returns:
         ________
         DataFrame with sectorwise distribution
         
         '''
-        cuts = 360/sectors
-        bins = [0, cuts/2]
-        bins.extend(np.arange(cuts*1.5, 360-cuts, cuts))
-        bins.extend([360-cuts/2, 360])
-        zeroed = lambda x: 0 if x == 360 else x
-        self.data[column] = self.data[column].apply(zeroed)
-        cats = pd.cut(self.data[column], bins, right=False)
-        array = pd.value_counts(cats).reindex(cats.levels).fillna(0)
-        wind_rose = pd.Series({'[{0}, {1})'.format(360-cuts/2, 0+cuts/2):
-                               array.ix[-1] + array.ix[0]})
-        array = array.drop([array.index[0], array.index[-1]], axis=0)
-        wind_rose = wind_rose.append(array)
-        new_index = {x: y for x, y in zip(wind_rose.index,
-                                          np.arange(0, 360, cuts))}
-        wind_rose = wind_rose.rename(new_index)
+        freq_frame = self._sector_frame(column, sectors, mask, speed)
+
+        if plot == 'matplotlib':
+            with stage('plot'):
+                plottools.wind_rose(freq_frame['Frequencies'].values,
+                                    sectors=sectors, **kwargs)
+        return freq_frame
+
+    @memoized
+    def _sector_frame(self, column, sectors, mask, speed):
+        '''Sectorwise distribution, without plotting'''
+        codes = circular.sector_codes(self.data[column].values, sectors)
+        if mask is not None:
+            codes[~np.asarray(mask, dtype=bool)] = -1
+        counts = np.bincount(codes[codes >= 0], minlength=sectors)
+        wind_rose = pd.Series(counts.astype(float),
+                              index=circular.sector_centers(sectors))
         freq_frame = pd.DataFrame({'Counts': wind_rose,
                                    'Frequencies': wind_rose/wind_rose.sum()},
                                   index=wind_rose.index)
-
-        if plot == 'matplotlib':
-            plottools.wind_rose(freq_frame['Frequencies'].values,
-                                sectors=sectors, **kwargs)
+        if speed is not None:
+            speeds = self.data[speed].values.astype(float)
+            directions = self.data[column].values.astype(float)
+            codes[np.isnan(speeds)] = -1
+            weighted = circular.group_stats(directions, codes, sectors,
+                                            weights=speeds)
+            used = np.where(codes >= 0, speeds, 0)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                freq_frame['Mean Speed'] = (np.bincount(
+                    codes[codes >= 0], weights=used[codes >= 0],
+                    minlength=sectors)/weighted['Count'])
+            freq_frame['Mean Direction'] = weighted['Mean']
         return freq_frame
 
+    @timed('wind_roses')
+    def wind_roses(self, directory, columns=None, sectors=12, mask=None,
+                   fmt='png', processes=None, **kwargs):
+        '''Write a wind rose image for every direction column
+
+        Parameters:
+        ___________
+        directory: string
+            Output directory
+        columns: list, default None
+            Direction columns. Defaults to every direction channel
+        sectors: int, default 12
+            Number of sectors
+        mask: array of bool, default None
+            Rows to include, e.g. from MetMast.qc_mask
+        fmt: string, default 'png'
+            Image format
+        processes: int, default None
+            Worker processes for rendering
+        kwargs:
+            color, all_ticks, figsize and dpi, passed to
+            plottools.RoseRenderer
+
+        Returns:
+        ________
+        dict of column: image path
+        '''
+        if columns is None:
+            numeric = self.data.select_dtypes(include=[np.number]).columns
+            columns = [x for x in numeric if channels.is_direction(x)]
+        roses = []
+        for column in columns:
+            freqs = self._sector_frame(column, sectors, mask,
+                                       None)['Frequencies']
+            roses.append((column, freqs.values))
+        with stage('plot'):
+            paths = plottools.wind_roses(roses, directory, fmt=fmt,
+                                         processes=processes, **kwargs)
+        return dict(zip(columns, paths))
+
+    @timed('export_tabs')
+    def export_tabs(self, directory, columns=None, sectors=12,
+                    ws_intervals=1, mask=None, name=None, processes=None):
+        '''Write a WAsP .tab observed wind climate for every wind speed
+        height. WindPRO imports the same files.
+
+        Parameters:
+        ___________
+        directory: string
+            Output directory
+        columns: list, default None
+            (speed, direction) column pairs. Defaults to every mean wind
+            speed channel with the direction channel closest in height
+        sectors: int, default 12
+            Number of sectors
+        ws_intervals: float, default 1
+            Width of the wind speed bins
+        mask: array of bool, default None
+            Rows to include, e.g. from MetMast.qc_mask
+        name: string, default None
+            Mast name for file names and titles
+        processes: int, default None
+            Worker processes for writing
+
+        Returns:
+        ________
+        dict of wind speed column: path
+
+        Examples:
+        _________
+        >>> paths = mast.export_tabs('owc/', name='North')
+        >>> owc = climatic.export.read_tab(paths[('WS Mean 1', 50)])
+        '''
+        if columns is None:
+            numeric = self.data.select_dtypes(include=[np.number]).columns
+            columns = export.pairs(list(numeric))
+        if not columns:
+            raise ValueError('No wind speed and direction columns found. '
+                             'Please pass columns.')
+        tables = export.mast_tables(self, directory, name=name,
+                                    columns=columns, mask=mask)
+        paths = export.write_tabs(tables, sectors=sectors,
+                                  ws_intervals=ws_intervals,
+                                  processes=processes)
+        return dict(zip([x[0] for x in columns], paths))
+
+    @timed('mcp')
+    @memoized
+    def mcp(self, ref, column=None, ref_column=None, ref_direction=None,
+            method='LinReg', sectors=12, mask=None, **kwargs):
+        '''Long-term correct a wind speed column against a reference record
+        with measure-correlate-predict. If the reference has a longer
+        sampling interval than the mast, the mast data is first block
+        averaged to the reference interval.
+
+        Parameters:
+        ___________
+        ref: DataFrame
+            Reference data with a DatetimeIndex, e.g. reanalysis, an airport
+            record or the data of another MetMast
+        column: tuple, default None
+            Mast wind speed column to correct
+        ref_column: tuple or string, default None
+            Reference wind speed column
+        ref_direction: tuple or string, default None
+            Reference wind direction column, used for the sector binning of
+            the 'Sectorwise' and 'Matrix' methods
+        method: string, default 'LinReg'
+            'LinReg', 'VarRatio', 'Sectorwise' or 'Matrix'. See mcp.fit
+        sectors: int, default 12
+            Number of direction sectors
+        mask: array of bool, default None
+            Mast rows to include, e.g. from MetMast.qc_mask
+
+        Returns:
+        ________
+        dict with the fit parameters, the number of concurrent records with
+        both values present, the concurrent correlation coefficient and the
+        long-term predicted series
+
+        Examples:
+        _________
+        >>> lt = mast.mcp(merra.data, column=('WS Mean 1', 50),
+                          ref_column=('WS Mean 1', 50),
+                          ref_direction=('WD Mean 1', 50),
+                          method='Sectorwise')
+        >>> lt['Long Term'].mean()
+        '''
+        site = self.data[[column]]
+        if mask is not None:
+            site = site.where(np.asarray(mask, dtype=bool)[:, None])
+        ref_interval = resample.infer_interval(ref.index)
+        if self.interval is not None and ref_interval > self.interval:
+            site = resample.block_average(site, ref_interval)
+        site_pos, ref_pos = mcp.align(site.index, ref.index)
+        if not len(site_pos):
+            raise ValueError('The mast and reference have no concurrent data')
+
+        site_ws = site[column].values[site_pos]
+        ref_ws = ref[ref_column].values
+        ref_wd = None
+        concurrent_wd = None
+        if ref_direction is not None:
+            ref_wd = ref[ref_direction].values
+            concurrent_wd = ref_wd[ref_pos]
+        params = mcp.fit(site_ws, ref_ws[ref_pos], ref_wd=concurrent_wd,
+                         method=method, sectors=sectors, **kwargs)
+        valid = ~np.isnan(site_ws) & ~np.isnan(ref_ws[ref_pos])
+        r = np.corrcoef(site_ws[valid], ref_ws[ref_pos][valid])[0, 1]
+        long_term = pd.Series(mcp.predict(params, ref_ws, ref_wd),
+                              index=ref.index, name=column)
+
+        return {'Params': params, 'Concurrent': int(valid.sum()), 'R': r,
+                'Long Term': long_term}
+
+    @timed('turbulence')
+    @memoized
+    def turbulence(self, pairs=None, bin_width=1, min_count=10, min_ws=5,
+                   mask=None):
+        '''Turbulence intensity per wind speed bin for all heights at once,
+        with the IEC 61400-1 turbulence category of each sensor
+
+        Parameters:
+        ___________
+        pairs: list, default None
+            List of (mean column, standard deviation column) tuples. Defaults
+            to pairing the mean and standard deviation channels of each
+            sensor by height and sensor number
+        bin_width: float, default 1
+            Wind speed bin width. Bins are centered on multiples of bin_width
+        min_count: int, default 10
+            Minimum records in a bin for it to count toward the IEC category
+        min_ws: float, default 5
+            Minimum bin wind speed counted toward the IEC category
+        mask: array of bool, default None
+            Rows to include, e.g. from MetMast.qc_mask
+
+        Returns:
+        ________
+        dict with 'TI', a DataFrame of count, mean, standard deviation, 90th
+        percentile and representative TI per bin for each column,
+        'Bin Category' with the IEC category per bin, and 'IEC Category'
+        with the category of each column
+
+        Examples:
+        _________
+        >>> ti = mast.turbulence()
+        >>> ti['TI'][('WS Mean 1', 50, 'TI Rep')]
+        >>> ti['IEC Category']
+        '''
+        if pairs is None:
+            pairs = channels.ws_pairs(self.data.columns.tolist())
+        if not pairs:
+            raise ValueError(('No wind speed mean and standard deviation '
+                              'columns found. Please pass pairs.'))
+        return turbulence.turbulence(self.data, pairs, bin_width=bin_width,
+                                     min_count=min_count, min_ws=min_ws,
+                                     mask=mask)
+
+    @timed('extremes')
+    @memoized
+    def extremes(self, columns=None, freq='A', dist='gumbel', period=50,
+                 min_coverage=0, samples=0, ci=0.9, processes=None, seed=0):
+        '''Extreme wind estimation from block maxima, e.g. the 50 year
+        wind speed (Vref) or gust for IEC class selection
+
+        Parameters:
+        ___________
+        columns: list, default None
+            Columns to analyse. Defaults to the maximum/gust channels, or to
+            the mean wind speed channels if there are none
+        freq: string, default 'A'
+            'A' for annual or 'M' for monthly maxima
+        dist: string, default 'gumbel'
+            'gumbel' or 'gev'
+        period: float, default 50
+            Return period in years
+        min_coverage: float, default 0
+            Fraction of the expected records per block required for a valid
+            maximum
+        samples: int, default 0
+            Bootstrap resamples for confidence intervals. 0 skips the
+            bootstrap.
+        ci: float, default 0.9
+            Confidence level of the bootstrap intervals
+        processes: int, default None
+            Worker processes for the bootstrap
+        seed: int, default 0
+            Bootstrap random seed
+
+        Returns:
+        ________
+        dict with 'Maxima', a DataFrame of block maxima, and 'Params', a
+        DataFrame of the fitted location, scale, shape and return level of
+        each column, plus the confidence bounds when samples > 0
+
+        Examples:
+        _________
+        >>> vref = mast.extremes(dist='gev', samples=1000)
+        >>> vref['Params']['Return Level']
+        '''
+        if columns is None:
+            numeric = self.data.select_dtypes(include=[np.number]).columns
+            columns = [x for x in numeric if channels.is_maximum(x)]
+            if not columns:
+                columns = [x for x in numeric if channels.is_speed(x)]
+        if not columns:
+            raise ValueError('No wind speed columns found. Please pass '
+                             'columns.')
+        maxima = extremes.block_maxima(self.data[columns], freq=freq,
+                                       min_coverage=min_coverage,
+                                       interval=self.interval)
+        blocks_per_year = 12 if freq == 'M' else 1
+        params = extremes.fit(maxima.values, dist=dist)
+        frame = pd.DataFrame({'Location': params['loc'],
+                              'Scale': params['scale'],
+                              'Shape': params['shape']}, index=maxima.columns,
+                             columns=['Location', 'Scale', 'Shape'])
+        frame['Return Level'] = extremes.return_level(
+            params, period=period, blocks_per_year=blocks_per_year)
+        if samples:
+            lower, upper = extremes.bootstrap(
+                maxima.values, dist=dist, period=period,
+                blocks_per_year=blocks_per_year, samples=samples, ci=ci,
+                processes=processes, seed=seed)
+            frame['Lower'] = lower
+            frame['Upper'] = upper
+        return {'Maxima': maxima, 'Params': frame}
+
+    @timed('uncertainty')
+    @memoized
+    def uncertainty(self, column=None, direction=None, block='D',
+                    samples=1000, method='EuroAtlas', ci=0.9, sectors=12,
+                    ws_intervals=1, mask=None, processes=None, seed=0):
+        '''Block bootstrap confidence intervals of the Weibull parameters
+        and sector frequencies. Whole days or months of data are resampled,
+        so the autocorrelation of the record is kept.
+
+        Parameters:
+        ___________
+        column: tuple, default None
+            Wind speed column
+        direction: tuple, default None
+            Wind direction column. Sector frequencies are skipped if not
+            given.
+        block: string, default 'D'
+            'D' for days, 'W' for weeks or 'M' for months
+        samples: int, default 1000
+            Bootstrap replicates
+        method: string, default 'EuroAtlas'
+            Weibull calculation method, 'EuroAtlas' or 'LeastSq'
+        ci: float, default 0.9
+            Confidence level
+        sectors: int, default 12
+            Number of sectors
+        ws_intervals: float, default 1
+            Wind speed bins for the 'LeastSq' method
+        mask: array of bool, default None
+            Rows to include, e.g. from MetMast.qc_mask
+        processes: int, default None
+            Worker processes for the bootstrap
+        seed: int, default 0
+            Bootstrap random seed
+
+        Returns:
+        ________
+        dict with 'Weibull', a DataFrame of the Weibull A and k, and with a
+        direction column 'Sectorwise', a DataFrame of sector frequencies.
+        Both have the estimate from the full record, the lower and upper
+        bounds and the standard deviation of the replicates. The estimate
+        uses the same block summaries and fit as the replicates, so the
+        interval is centred on it. Its EuroAtlas A and k can differ from
+        MetMast.weibull by around 0.1%, see uncertainty.block_stats.
+
+        Examples:
+        _________
+        >>> spread = mast.uncertainty(column=('WS Mean', 50),
+        ...                           direction=('WD Mean', 50), block='M')
+        >>> spread['Weibull']
+        '''
+        if column is None:
+            raise ValueError('Please pass a wind speed column.')
+        codes, nblocks = uncertainty.block_codes(self.data.index, block=block)
+        if mask is not None:
+            codes = np.where(np.asarray(mask, dtype=bool), codes, -1)
+        directions = None
+        if direction is not None:
+            directions = self.data[direction].values
+        stats = uncertainty.block_stats(self.data[column].values, codes,
+                                        nblocks, ws_intervals=ws_intervals,
+                                        directions=directions,
+                                        sectors=sectors)
+        full = uncertainty.estimate(stats, np.ones(nblocks), method=method)
+        replicates = uncertainty.bootstrap(stats, samples=samples,
+                                           method=method,
+                                           processes=processes, seed=seed)
+
+        def summary(key, index):
+            lower, upper = uncertainty.intervals(replicates[key], ci=ci)
+            with np.errstate(invalid='ignore'):
+                std = np.nanstd(replicates[key], axis=0, ddof=1)
+            return pd.DataFrame({'Estimate': full[key].ravel(),
+                                 'Lower': np.ravel(lower),
+                                 'Upper': np.ravel(upper),
+                                 'Std': np.ravel(std)}, index=index,
+                                columns=['Estimate', 'Lower', 'Upper',
+                                         'Std'])
+
+        weibull = pd.concat([summary('A', ['Weibull A']),
+                             summary('k', ['Weibull k'])])
+        result = {'Weibull': weibull}
+        if direction is not None:
+            result['Sectorwise'] = summary(
+                'Frequencies', circular.sector_centers(sectors))
+        return result
+
+    @timed('variability')
+    @memoized
+    def variability(self, columns=None, directions=None, window=12,
+                    method='EuroAtlas', sectors=12, ws_intervals=1,
+                    min_coverage=0, iav_coverage=0.9, mask=None):
+        '''Rolling and calendar year mean wind speed, Weibull parameters
+        and sector frequencies, and interannual variability, for every
+        height. Each month is summarised once and windows are combined from
+        prefix sums of the months, so all windows come from one pass over
+        the data.
+
+        Parameters:
+        ___________
+        columns: list, default None
+            Wind speed columns. Defaults to every mean wind speed channel
+        directions: dict, default None
+            dict of wind speed column: direction column for sector
+            frequencies. Defaults to the direction channel closest in
+            height to each wind speed column
+        window: int, default 12
+            Months in each rolling window
+        method: string, default 'EuroAtlas'
+            Weibull calculation method, 'EuroAtlas' or 'LeastSq'
+        sectors: int, default 12
+            Number of sectors
+        ws_intervals: float, default 1
+            Wind speed bins for the 'LeastSq' method
+        min_coverage: float, default 0
+            Fraction of the expected records a window needs. Windows below
+            it are NaN.
+        iav_coverage: float, default 0.9
+            Coverage a calendar year needs to count towards the
+            interannual variability
+        mask: array of bool, default None
+            Rows to include, e.g. from MetMast.qc_mask
+
+        Returns:
+        ________
+        dict with 'Rolling' and 'Annual', each a dict of 'Mean',
+        'Weibull A', 'Weibull k', 'Records' and 'Coverage' DataFrames with
+        one column per height and 'Sectorwise', a dict of column: DataFrame
+        of sector frequencies per window, and 'IAV', a Series of the
+        interannual variability of the mean wind speed per height. Rolling
+        windows are labelled by their last month.
+
+        Examples:
+        _________
+        >>> var = mast.variability(min_coverage=0.8)
+        >>> var['Rolling']['Mean']
+        >>> var['IAV']
+        '''
+        numeric = self.data.select_dtypes(include=[np.number]).columns
+        if columns is None:
+            columns = [x for x in numeric if channels.is_speed(x)]
+        if not columns:
+            raise ValueError('No wind speed columns found. Please pass '
+                             'columns.')
+        if directions is None:
+            found = [x for x in numeric if channels.is_direction(x)]
+            directions = dict(export.pairs(list(columns) + found))
+        codes, months = variability.month_codes(self.data.index)
+        if mask is not None:
+            codes = np.where(np.asarray(mask, dtype=bool), codes, -1)
+
+        found = {}
+        for column in columns:
+            wd = directions.get(column)
+            found[column] = variability.windows(
+                self.data[column].values, codes, months,
+                directions=None if wd is None else self.data[wd].values,
+                window=window, method=method, sectors=sectors,
+                ws_intervals=ws_intervals, interval=self.interval,
+                min_coverage=min_coverage)
+        result = variability.frames(found, columns, sectors=sectors)
+        result['IAV'] = pd.Series(
+            [variability.interannual(found[x]['Annual'],
+                                     min_coverage=iav_coverage)
+             for x in columns], index=pd.Index(columns))
+        return result
+
+    @timed('power_density')
+    @memoized
+    def power_density(self, columns=None, temperature=None, pressure=None,
+                      elevation=0, pressure_units='hPa', direction=None,
+                      sectors=12, mask=None):
+        '''Air density and wind power density (1/2 rho v^3) for all wind
+        speed heights at once
+
+        Density comes from a Rho channel, or from temperature and pressure,
+        moved to each wind speed height. Without a pressure channel the ISA
+        pressure at the sensor altitude is used, and without a temperature
+        channel the ISA density at each height.
+
+        Parameters:
+        ___________
+        columns: list, default None
+            Wind speed columns. Defaults to every mean wind speed channel
+        temperature: tuple, default None
+            Temperature column in degrees C. Defaults to the first Temp
+            channel
+        pressure: tuple, default None
+            Pressure column. Defaults to the first pressure channel (Press,
+            Baro, BP)
+        elevation: float, default 0
+            Ground elevation above sea level in m
+        pressure_units: string, default 'hPa'
+            'Pa', 'hPa', 'mbar' or 'kPa'
+        direction: tuple, default None
+            Direction column for the sectorwise power density. Defaults to
+            the first direction channel
+        sectors: int, default 12
+            Number of sectors
+        mask: array of bool, default None
+            Rows to include, e.g. from MetMast.qc_mask
+
+        Returns:
+        ________
+        dict with 'Density' and 'Time Series' DataFrames per wind speed
+        column, 'Mean' power density per column, and 'Sectorwise',
+        'Monthly' and 'Diurnal' DataFrames of mean power density
+
+        Examples:
+        _________
+        >>> wpd = mast.power_density(elevation=450)
+        >>> wpd['Monthly']
+        '''
+        numeric = self.data.select_dtypes(include=[np.number]).columns
+        signals = dict((x, channels.signal(x).lower()) for x in numeric)
+        if columns is None:
+            columns = [x for x in numeric if channels.is_speed(x)]
+        if not columns:
+            raise ValueError('No wind speed columns found. Please pass '
+                             'columns.')
+
+        def first(names):
+            found = [x for x in numeric if not channels.is_stddev(x) and
+                     any(y in signals[x].split() or signals[x].startswith(y)
+                         for y in names)]
+            return found[0] if found else None
+        if temperature is None:
+            temperature = first(['temp'])
+        if pressure is None:
+            pressure = first(['press', 'baro', 'bp'])
+        heights = [channels.height(x) or 0 for x in columns]
+
+        rho_column = first(['rho'])
+        if temperature is None and rho_column is not None:
+            measured = self.data[rho_column].values.astype(float)
+            rho = np.repeat(measured[:, None], len(columns), axis=1)
+        elif temperature is not None:
+            sensor_height = channels.height(temperature) or 0
+            if pressure is not None:
+                pressure = self.data[pressure].values
+            rho = density.air_density(self.data[temperature].values,
+                                      pressure=pressure,
+                                      sensor_height=sensor_height,
+                                      heights=heights, elevation=elevation,
+                                      pressure_units=pressure_units)
+        else:
+            log.warning(('No temperature or density channel found. Using '
+                         'the ISA density at each height.'))
+            rho = np.ones((len(self.data), 1))*density.air_density(
+                [15 - density.LAPSE_RATE*elevation], heights=heights,
+                elevation=elevation)
+
+        ws = self.data[columns].values.astype(float)
+        if mask is not None:
+            ws = np.where(np.asarray(mask, dtype=bool)[:, None], ws, np.nan)
+        wpd = density.power_density(ws, rho)
+        index = self.data.index
+        result = {'Density': pd.DataFrame(rho, index=index, columns=columns),
+                  'Time Series': pd.DataFrame(wpd, index=index,
+                                              columns=columns)}
+        everything = np.zeros(len(index), dtype=np.intp)
+        result['Mean'] = pd.Series(density.grouped(ws, rho, everything,
+                                                   1)[0][0], index=columns)
+
+        if direction is None:
+            found = [x for x in numeric if channels.is_direction(x)]
+            direction = found[0] if found else None
+        if direction is not None:
+            codes = circular.sector_codes(self.data[direction].values,
+                                          sectors)
+            result['Sectorwise'] = pd.DataFrame(
+                density.grouped(ws, rho, codes, sectors)[0],
+                index=circular.sector_centers(sectors), columns=columns)
+        for by, name, labels in (('month', 'Monthly', np.arange(1, 13)),
+                                 ('hour', 'Diurnal', np.arange(24))):
+            codes, ngroups = density.time_codes(index, by)
+            result[name] = pd.DataFrame(
+                density.grouped(ws, rho, codes, ngroups)[0], index=labels,
+                columns=columns)
+        return result
+
+    @timed('qc')
+    def qc(self, rules):
+        '''Evaluate data quality rules against the mast data. The result is
+        stored as a per-row bitmask in MetMast.qc_flags, with bit i set where
+        rules[i] fired, and the rules in MetMast.qc_rules.
+
+        Parameters:
+        ___________
+        rules: list
+            List of qc.Rule, e.g. from qc.out_of_range, qc.flat_line,
+            qc.icing or qc.tower_shadow
+
+        Returns:
+        ________
+        Series with the number of rows flagged by each rule
+
+        Examples:
+        _________
+        >>> from climatic import qc
+        >>> mast.qc([qc.out_of_range(('WS Mean 1', 50), 0, 75),
+                     qc.icing(('Temp Mean 1', 2), ('WD Mean 1', 50)),
+                     qc.tower_shadow(('WD Mean 1', 50), [(300, 330)],
+                                     columns=[('WS Mean 1', 50)])])
+        >>> mast.weibull(column=('WS Mean 1', 50),
+                         mask=mast.qc_mask(('WS Mean 1', 50)))
+        '''
+        self.qc_rules = list(rules)
+        flags = qc.evaluate(self.data, self.qc_rules)
+        self.qc_flags = pd.Series(flags, index=self.data.index)
+        fired = [int(np.count_nonzero(flags & flags.dtype.type(1 << bit)))
+                 for bit in range(len(self.qc_rules))]
+        return pd.Series(fired, index=[x.name for x in self.qc_rules])
+
+    def qc_mask(self, column=None, names=None):
+        '''Boolean mask of rows passing the QC rules, for the mask argument
+        of the analysis methods
+
+        Parameters:
+        ___________
+        column: tuple, default None
+            Only consider the rules that invalidate this column. None
+            considers every rule.
+        names: list, default None
+            Only consider the rules with these names
+        '''
+        if self.qc_flags is None:
+            return np.ones(len(self.data), dtype=bool)
+        return qc.valid(self.qc_flags.values, self.qc_rules, column=column,
+                        names=names)
+
+    @timed('fill_gaps')
+    def fill_gaps(self, pairs=None, shear=True, min_points=100, mask=None):
+        '''Fill gaps in MetMast.data from redundant sensors at the same
+        height, then extrapolate the remaining wind speed gaps from the
+        nearest other height with a power law shear exponent. Fits are made
+        on concurrent data for all columns at once.
+
+        Parameters:
+        ___________
+        pairs: list, default None
+            List of (target column, source column) tuples, tried in order.
+            Defaults to all pairs of columns sharing a signal type and
+            height, e.g. ('WS Mean 1', 50) and ('WS Mean 2', 50)
+        shear: boolean, default True
+            Extrapolate the remaining wind speed gaps from other heights
+        min_points: int, default 100
+            Minimum concurrent points needed for a fit to be used
+        mask: array of bool, default None
+            Rows to use, e.g. from MetMast.qc_mask. Flagged rows are left
+            out of the fits, are not used as sources and are not filled.
+
+        Returns:
+        ________
+        DataFrame with the missing values in each column and how many were
+        filled from redundant sensors and by shear extrapolation
+        '''
+        self.data, report = gapfill.fill(self.data, pairs=pairs, shear=shear,
+                                         min_points=min_points, mask=mask)
+        return report
+
     def wind_shear(self):
         '''Calculate the wind shear across all met mast heights'''
 
@@ -287,16 +1216,18 @@ class MetMast(object):
             filtered = self._multidata.filter(regex='Mean')
             shear_dict.setdefault(x, filtered)
             
+    @timed('data_overlap')
     def data_overlap(self):
         '''Check for duplicated timestamps'''
         repeated = [date for date, count in \
                      Counter(self.data.index).iteritems() if count > 1]
         for x in repeated: 
-            print('The timestamp {0} repeats in this dataset.'.format(x))
+            log.warning('The timestamp {0} repeats in this dataset.'.format(x))
         return repeated
         
+    @timed('binned')
     def binned(self, column=None, bins=None, stat='mean', name=None, 
-               plot=None):
+               plot=None, mask=None, directions=None):
         '''Bin all data based on a single column. 
         
         Parameters: 
@@ -313,6 +1244,14 @@ class MetMast(object):
         plot: tuple, default None
             If you are binning by wind direction, plot=column_name will pass the 
             data to plottools.wind_rose
+        mask: array of bool, default None
+            Rows to include, e.g. from MetMast.qc_mask. Rows with a missing
+            value in the binned column are always excluded.
+        directions: list, default None
+            Columns holding wind directions. For stat='mean' and stat='std'
+            these get the unit vector mean and the Yamartino standard
+            deviation instead of linear statistics. Defaults to every
+            numeric direction channel found by channels.is_direction
             
         Returns: 
         ________
@@ -329,24 +1268,7 @@ class MetMast(object):
         
         
         '''
-        print('Mapping bins to data...')
-        def map_bin(x, bins):
-            kwargs = {}
-            if x == max(bins):
-                kwargs['right'] = True
-            bin = bins[np.digitize([x], bins, **kwargs)[0]]
-            bin_lower = bins[np.digitize([x], bins, **kwargs)[0]-1]
-            return '[{0}-{1}]'.format(bin_lower, bin)
-    
-        step = bins[1]-bins[0]
-        new_index = ['[{0}-{1}]'.format(x, x+step) for x in bins]
-        new_index.pop(-1)
-    
-        temp_df = self.data.dropna()
-        temp_df['Binned'] = temp_df[column].apply(map_bin, bins=bins)
-        grouped = temp_df.groupby('Binned')
-        grouped_stat = getattr(grouped, stat)()
-        grouped_stat = grouped_stat.reindex(new_index)
+        grouped_stat = self._binned_stat(column, bins, stat, mask, directions)
         if name is not None: 
             attr_name = 'data_binned_{0}'.format(name)
         else: 
@@ -354,6 +1276,42 @@ class MetMast(object):
         setattr(self, attr_name, grouped_stat)
         
         if plot: 
-            sect = len(new_index)
-            plottools.wind_rose(grouped_stat[plot].tolist(), sectors=sect)
+            sect = len(grouped_stat)
+            with stage('plot'):
+                plottools.wind_rose(grouped_stat[plot].tolist(), sectors=sect)
+
+    @memoized
+    def _binned_stat(self, column, bins, stat, mask, directions):
+        '''Binned statistics of all columns, without plotting'''
+        log.info('Mapping bins to data...')
+        step = bins[1]-bins[0]
+        new_index = ['[{0}-{1}]'.format(x, x+step) for x in bins]
+        new_index.pop(-1)
+
+        #Bin i covers [bins[i], bins[i+1]), with the top edge included
+        values = self.data[column].values.astype(float)
+        codes = np.digitize(values, bins) - 1
+        codes[values == bins[-1]] = len(new_index) - 1
+        keep = (codes >= 0) & (codes < len(new_index))
+        if mask is not None:
+            keep &= np.asarray(mask, dtype=bool)
+        labels = np.empty(len(values), dtype=object)
+        labels[:] = np.nan
+        labels[keep] = np.array(new_index, dtype=object)[codes[keep]]
+        grouped = self.data.groupby(labels)
+        grouped_stat = getattr(grouped, stat)()
+        grouped_stat = grouped_stat.reindex(new_index)
+        if stat in ('mean', 'std'):
+            if directions is None:
+                numeric = self.data.select_dtypes(include=[np.number])
+                directions = [x for x in numeric.columns
+                              if channels.is_direction(x)]
+            if directions:
+                circ = circular.group_stats(self.data[directions].values,
+                                            np.where(keep, codes, -1),
+                                            len(new_index))
+                circ = circ['Mean' if stat == 'mean' else 'StdDev']
+                for num, col in enumerate(directions):
+                    grouped_stat[col] = circ[:, num]
+        return grouped_stat
             
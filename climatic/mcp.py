@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+'''
+MCP
+-------
+
+Measure-correlate-predict tools for long-term correction of met mast
+data against a reference series (reanalysis, airport or a long-term mast)
+
+'''
+from __future__ import division
+import numpy as np
+import circular
+import resample
+
+METHODS = ('LinReg', 'VarRatio', 'Sectorwise', 'Matrix')
+
+
+def align(site_index, ref_index):
+    '''Positions of the concurrent timestamps in two DatetimeIndexes. If a
+    timestamp repeats, the first occurrence is used.
+
+    Returns:
+    ________
+    Tuple of integer arrays (site_positions, ref_positions)
+    '''
+    site_stamps = resample.epoch_ns(site_index)
+    ref_stamps = resample.epoch_ns(ref_index)
+    order = np.argsort(ref_stamps, kind='mergesort')
+    sorted_ref = ref_stamps[order]
+    found = np.searchsorted(sorted_ref, site_stamps)
+    found[found == len(sorted_ref)] = 0
+    matched = sorted_ref[found] == site_stamps
+    site_pos = np.nonzero(matched)[0]
+    ref_pos = order[found[matched]]
+    _, first = np.unique(site_stamps[site_pos], return_index=True)
+    return site_pos[first], ref_pos[first]
+
+
+def _linear(x, y, groups, ngroups):
+    '''Least squares slope and offset for each group, from bincount sums'''
+    n = np.bincount(groups, minlength=ngroups).astype(float)
+    sx = np.bincount(groups, weights=x, minlength=ngroups)
+    sy = np.bincount(groups, weights=y, minlength=ngroups)
+    sxx = np.bincount(groups, weights=x*x, minlength=ngroups)
+    sxy = np.bincount(groups, weights=x*y, minlength=ngroups)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        slope = (n*sxy - sx*sy)/(n*sxx - sx**2)
+        offset = (sy - slope*sx)/n
+    return slope, offset, n
+
+
+def fit(site_ws, ref_ws, ref_wd=None, method='LinReg', sectors=12,
+        ws_bins=None, min_points=10):
+    '''Fit a transfer function from concurrent reference to site data
+
+    Parameters:
+    ___________
+    site_ws: array of float
+        Concurrent site wind speeds
+    ref_ws: array of float
+        Concurrent reference wind speeds
+    ref_wd: array of float, default None
+        Concurrent reference wind directions. Required for the 'Sectorwise'
+        and 'Matrix' methods
+    method: string, default 'LinReg'
+        'LinReg' for linear regression, 'VarRatio' for the variance ratio
+        method, 'Sectorwise' for a linear regression in each direction
+        sector, or 'Matrix' for a speed-up ratio in each sector and
+        reference wind speed bin
+    sectors: int, default 12
+        Number of direction sectors, binned as in MetMast.sectorwise
+    ws_bins: array, default None
+        Reference wind speed bins for the 'Matrix' method. Defaults to
+        1 m/s bins
+    min_points: int, default 10
+        Sectors or matrix cells with fewer concurrent points fall back to
+        the all-sector fit
+
+    Returns:
+    ________
+    dict of fit parameters, to be passed to mcp.predict
+    '''
+    if method not in METHODS:
+        raise ValueError('method must be one of {0}'.format(METHODS))
+
+    site_ws = np.asarray(site_ws, dtype=float)
+    ref_ws = np.asarray(ref_ws, dtype=float)
+    valid = ~np.isnan(site_ws) & ~np.isnan(ref_ws)
+    if ref_wd is not None:
+        codes = circular.sector_codes(ref_wd, sectors)
+        valid &= codes >= 0
+        codes = codes[valid]
+    elif method in ('Sectorwise', 'Matrix'):
+        raise ValueError('ref_wd is required for the {0} method'.format(
+            method))
+    site_ws = site_ws[valid]
+    ref_ws = ref_ws[valid]
+
+    params = {'Method': method, 'Points': len(site_ws)}
+    overall = np.zeros(len(site_ws), dtype=np.intp)
+    if method == 'VarRatio':
+        params['Slope'] = site_ws.std()/ref_ws.std()
+        params['Offset'] = site_ws.mean() - params['Slope']*ref_ws.mean()
+        return params
+
+    slope, offset, _ = _linear(ref_ws, site_ws, overall, 1)
+    params['Slope'], params['Offset'] = slope[0], offset[0]
+    if method == 'Sectorwise':
+        slope, offset, n = _linear(ref_ws, site_ws, codes, sectors)
+        sparse = n < min_points
+        slope[sparse], offset[sparse] = params['Slope'], params['Offset']
+        params.update({'Sectors': sectors, 'Sector Slope': slope,
+                       'Sector Offset': offset, 'Sector Points': n})
+    elif method == 'Matrix':
+        if ws_bins is None:
+            ws_bins = np.arange(0, np.ceil(ref_ws.max()) + 2, 1)
+        nbins = len(ws_bins) + 1
+        cells = codes*nbins + np.digitize(ref_ws, ws_bins)
+        n = np.bincount(cells, minlength=sectors*nbins)
+        site_sum = np.bincount(cells, weights=site_ws,
+                               minlength=sectors*nbins)
+        ref_sum = np.bincount(cells, weights=ref_ws, minlength=sectors*nbins)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            ratio = site_sum/ref_sum
+        fallback = site_ws.sum()/ref_ws.sum()
+        ratio[(n < min_points) | ~np.isfinite(ratio)] = fallback
+        params.update({'Sectors': sectors, 'WS Bins': np.asarray(ws_bins),
+                       'Ratio': ratio.reshape(sectors, nbins),
+                       'Cell Points': n.reshape(sectors, nbins)})
+    return params
+
+
+def predict(params, ref_ws, ref_wd=None):
+    '''Apply a fitted transfer function to a reference record in bulk
+
+    Parameters:
+    ___________
+    params: dict
+        Fit parameters from mcp.fit
+    ref_ws: array of float
+        Reference wind speeds
+    ref_wd: array of float, default None
+        Reference wind directions, for sectorwise and matrix fits
+
+    Returns:
+    ________
+    Array of predicted site wind speeds. Negative predictions are set to 0.
+    '''
+    ref_ws = np.asarray(ref_ws, dtype=float)
+    method = params['Method']
+    if method in ('LinReg', 'VarRatio'):
+        predicted = params['Slope']*ref_ws + params['Offset']
+    else:
+        codes = circular.sector_codes(ref_wd, params['Sectors'])
+        missing = codes < 0
+        codes[missing] = 0
+        if method == 'Sectorwise':
+            predicted = (params['Sector Slope'][codes]*ref_ws +
+                         params['Sector Offset'][codes])
+        else:
+            ws_codes = np.digitize(ref_ws, params['WS Bins'])
+            predicted = params['Ratio'][codes, ws_codes]*ref_ws
+        predicted[missing] = np.nan
+    return np.where(predicted < 0, 0, predicted)
@@ -8,7 +8,12 @@ A micro toolbox of wind data plotting tools with matplotlib
 '''
 from __future__ import division
 import math
+import multiprocessing
+import os
+import re
 import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 import numpy as np
 import stylers
 import husl
@@ -48,6 +53,13 @@ def wind_rose(freqs, sectors=12, title='Wind Rose', color=None,
     Wind rose plot
     '''
 
+    fig = plt.figure(figsize=(8, 8))
+    _rose_bars(fig, freqs, sectors, title, color, all_ticks)
+
+
+def _rose_bars(fig, freqs, sectors, title, color, all_ticks):
+    '''Styled polar axes and wind rose bars on fig'''
+
     #Set up binned frequencies and labels
     bins = 360/sectors
     theta = np.arange(0, 360, bins)
@@ -59,7 +71,6 @@ def wind_rose(freqs, sectors=12, title='Wind Rose', color=None,
         ticklabs, ticks = np.arange(0, 360, 30), np.arange(0, 360, 30)
 
     #Plot, with N correctly oriented
-    fig = plt.figure(figsize=(8, 8))
     ax = fig.add_axes([0.1, 0.1, 0.8, 0.8], polar=True)
     ax.set_theta_zero_location('N')
     ax.set_theta_direction(-1)
@@ -70,8 +81,128 @@ def wind_rose(freqs, sectors=12, title='Wind Rose', color=None,
     ax.set_axisbelow(True)
     width = bins*math.pi/180
     adj_theta = theta_rad-width/2
-    stylers.rbar(ax, adj_theta, freqs, width=width, bottom=0.0, alpha=0.7,
-                 color=color)
+    bars = stylers.rbar(ax, adj_theta, freqs, width=width, bottom=0.0,
+                        alpha=0.7, color=color)
+    return ax, bars
+
+
+class RoseRenderer(object):
+    '''Wind rose figure that is styled once and reused. Each render only
+    updates the bar heights, radial limit and title, then writes the image
+    with the Agg canvas, so no pyplot figure is created.'''
+
+    def __init__(self, sectors=12, color=None, all_ticks=False,
+                 figsize=(8, 8), dpi=80):
+        self.sectors = sectors
+        self.dpi = dpi
+        self.fig = Figure(figsize=figsize)
+        self.canvas = FigureCanvasAgg(self.fig)
+        self.ax, self.bars = _rose_bars(self.fig, np.zeros(sectors),
+                                        sectors, '', color, all_ticks)
+
+    def render(self, freqs, path, title='Wind Rose', rmax=None):
+        '''Draw one wind rose and save it to path
+
+        Parameters:
+        ___________
+        freqs: array of float
+            Sectorwise frequencies, one per sector
+        path: string
+            Image path. The format follows the file extension.
+        title: string, default 'Wind Rose'
+            Plot title
+        rmax: float, default None
+            Radial limit. Defaults to just above the largest frequency
+
+        Returns:
+        ________
+        path
+        '''
+        freqs = np.nan_to_num(np.asarray(freqs, dtype=float))
+        if len(freqs) != self.sectors:
+            raise ValueError('Expected {0} frequencies, got {1}'.format(
+                self.sectors, len(freqs)))
+        for bar, height in zip(self.bars, freqs):
+            bar.set_height(height)
+        if rmax is None:
+            rmax = freqs.max()*1.05 if freqs.max() > 0 else 1
+        self.ax.set_ylim(0, rmax)
+        self.ax.set_title(title)
+        self.fig.savefig(path, dpi=self.dpi)
+        return path
+
+
+def _file_name(name):
+    '''File system safe name for a rose, e.g. WD_Mean_1_50 for
+    ('WD Mean 1', 50)'''
+    if isinstance(name, tuple):
+        name = '_'.join(str(x) for x in name)
+    return re.sub(r'[^A-Za-z0-9.-]+', '_', str(name)).strip('_')
+
+
+def _render_chunk(args):
+    '''Render a list of (name, freqs) roses, reusing one figure per sector
+    count'''
+    roses, directory, fmt, options = args
+    renderers = {}
+    paths = []
+    for name, freqs in roses:
+        sectors = len(freqs)
+        if sectors not in renderers:
+            renderers[sectors] = RoseRenderer(sectors=sectors, **options)
+        path = os.path.join(directory,
+                            '{0}.{1}'.format(_file_name(name), fmt))
+        if isinstance(name, tuple) and len(name) == 2:
+            title = '{0} {1}m'.format(*name)
+        else:
+            title = str(name)
+        paths.append(renderers[sectors].render(freqs, path, title=title))
+    return paths
+
+
+def wind_roses(roses, directory, fmt='png', processes=None, **kwargs):
+    '''Render many wind roses straight to image files
+
+    Parameters:
+    ___________
+    roses: dict or list
+        dict of name: sectorwise frequencies, or a list of (name,
+        frequencies) tuples. Names become the titles and file names.
+    directory: string
+        Output directory
+    fmt: string, default 'png'
+        Image format
+    processes: int, default None
+        Worker processes. Defaults to one per CPU. Roses are rendered in
+        this process with processes=1.
+    kwargs:
+        color, all_ticks, figsize and dpi, passed to RoseRenderer
+
+    Returns:
+    ________
+    List of image paths, in the order of roses
+    '''
+    if isinstance(roses, dict):
+        roses = sorted(roses.items(), key=lambda x: str(x[0]))
+    roses = [(name, np.asarray(freqs, dtype=float)) for name, freqs in roses]
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+    processes = max(1, min(processes, len(roses)))
+    if processes == 1:
+        return _render_chunk((roses, directory, fmt, kwargs))
+    chunks = [(roses[x::processes], directory, fmt, kwargs)
+              for x in range(processes)]
+    pool = multiprocessing.Pool(processes)
+    try:
+        rendered = pool.map(_render_chunk, chunks)
+    finally:
+        pool.close()
+        pool.join()
+    #Undo the round robin split
+    paths = [None]*len(roses)
+    for x, chunk in enumerate(rendered):
+        paths[x::processes] = chunk
+    return paths
 
 
 def weibull(x, dist, binned=False, binned_x=None, binned_data=None, **kwargs):
@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+'''
+QC
+-------
+
+Data quality rules for met mast data. Each rule evaluates to a boolean
+mask of flagged rows, and a list of rules is evaluated into a compact
+per-row bitmask recording which rules fired.
+
+'''
+from __future__ import division
+import numpy as np
+
+
+class Rule(object):
+    '''A single data quality rule.'''
+
+    def __init__(self, name, test, columns=None):
+        '''
+        Parameters
+        ----------
+        name: string
+            Rule name, used in QC reports
+        test: function
+            Function taking the mast DataFrame and returning a boolean
+            array, True where a row is flagged
+        columns: list, default None
+            Columns invalidated when the rule fires. None invalidates every
+            column of the row.
+        '''
+        self.name = name
+        self.test = test
+        self.columns = columns
+
+    def __repr__(self):
+        return "climatic.qc.Rule(name='{0}', columns={1})".format(
+            self.name, self.columns)
+
+    def __call__(self, data):
+        return np.asarray(self.test(data), dtype=bool)
+
+    def applies_to(self, column):
+        '''True if the rule invalidates the given column'''
+        if self.columns is None or column is None:
+            return True
+        return column in self.columns
+
+
+def _flat(values, window, tolerance):
+    '''Rows belonging to a run of at least window values that vary by no
+    more than tolerance from one record to the next'''
+    values = np.asarray(values, dtype=float)
+    flagged = np.zeros(len(values), dtype=bool)
+    if window < 2 or len(values) < window:
+        return flagged
+    with np.errstate(invalid='ignore'):
+        small = np.abs(np.diff(values)) <= tolerance
+    steps = np.concatenate(([0], np.cumsum(small)))
+    #A window starting at row i is flat if all of its window-1 steps are
+    #small, and every row inside a flat window is flagged
+    starts = (steps[window-1:] - steps[:-(window-1)]) == window - 1
+    edges = np.zeros(len(values) + 1, dtype=int)
+    start_rows = np.nonzero(starts)[0]
+    np.add.at(edges, start_rows, 1)
+    np.add.at(edges, start_rows + window, -1)
+    return np.cumsum(edges[:-1]) > 0
+
+
+def out_of_range(column, low=None, high=None, columns=None, name=None):
+    '''Flag rows where column is below low or above high. By default the
+    rule invalidates only the tested column.'''
+    def test(data):
+        values = data[column].values
+        flagged = np.zeros(len(values), dtype=bool)
+        with np.errstate(invalid='ignore'):
+            if low is not None:
+                flagged |= values < low
+            if high is not None:
+                flagged |= values > high
+        return flagged
+    if columns is None:
+        columns = [column]
+    return Rule(name or 'Range {0}'.format(column), test, columns)
+
+
+def flat_line(column, window=6, tolerance=0.0, columns=None, name=None):
+    '''Flag runs of at least window records where column changes by no more
+    than tolerance between records, e.g. a stuck vane or a frozen
+    anemometer. By default the rule invalidates only the tested column.'''
+    def test(data):
+        return _flat(data[column].values, window, tolerance)
+    if columns is None:
+        columns = [column]
+    return Rule(name or 'Flat {0}'.format(column), test, columns)
+
+
+def icing(temperature, direction, temp_max=2, window=6, tolerance=0.5,
+          columns=None, name='Icing'):
+    '''Flag likely icing: temperature at or below temp_max while the vane
+    is stuck for at least window records. By default the whole row is
+    invalidated.'''
+    def test(data):
+        with np.errstate(invalid='ignore'):
+            cold = data[temperature].values <= temp_max
+        return cold & _flat(data[direction].values, window, tolerance)
+    return Rule(name, test, columns)
+
+
+def tower_shadow(direction, sectors, columns, name=None):
+    '''Flag rows where direction falls in a tower shadow sector
+
+    Parameters:
+    ___________
+    direction: tuple
+        Wind direction column
+    sectors: list
+        List of (start, end) directions in degrees. Sectors may wrap
+        through north, e.g. (350, 10)
+    columns: list
+        Columns in the shadow, typically a single anemometer
+    '''
+    def test(data):
+        values = data[direction].values % 360
+        flagged = np.zeros(len(values), dtype=bool)
+        with np.errstate(invalid='ignore'):
+            for start, end in sectors:
+                if start <= end:
+                    flagged |= (values >= start) & (values <= end)
+                else:
+                    flagged |= (values >= start) | (values <= end)
+        return flagged
+    return Rule(name or 'Shadow {0}'.format(columns), test, columns)
+
+
+def flag_dtype(rules):
+    '''Smallest unsigned integer type with a bit for each rule'''
+    for dtype in (np.uint8, np.uint16, np.uint32, np.uint64):
+        if len(rules) <= np.iinfo(dtype).bits:
+            return dtype
+    raise ValueError('A maximum of 64 QC rules can be evaluated at once')
+
+
+def evaluate(data, rules):
+    '''Evaluate rules against a DataFrame
+
+    Returns:
+    ________
+    Array with one unsigned integer per row. Bit i is set where rules[i]
+    fired.
+    '''
+    dtype = flag_dtype(rules)
+    flags = np.zeros(len(data), dtype=dtype)
+    for bit, rule in enumerate(rules):
+        flags |= rule(data).astype(dtype) << dtype(bit)
+    return flags
+
+
+def valid(flags, rules, column=None, names=None):
+    '''Boolean mask of rows that pass the rules applying to a column
+
+    Parameters:
+    ___________
+    flags: array
+        Bitmask from qc.evaluate
+    rules: list
+        Rules used to build the bitmask
+    column: tuple, default None
+        Only rules invalidating this column are considered. None considers
+        every rule.
+    names: list, default None
+        Only consider the rules with these names
+    '''
+    flags = np.asarray(flags)
+    bits = 0
+    for bit, rule in enumerate(rules):
+        if names is not None and rule.name not in names:
+            continue
+        if rule.applies_to(column):
+            bits |= 1 << bit
+    return (flags & flags.dtype.type(bits)) == 0
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+'''
+Resample
+-------
+
+Sampling interval detection and block averaging of met mast records.
+Directions are vector averaged, all other numeric channels are scalar
+averaged.
+
+'''
+from __future__ import division
+import numpy as np
+import pandas as pd
+import channels
+import circular
+
+
+def epoch_ns(index):
+    '''Integer nanoseconds since the epoch (UTC) for a DatetimeIndex'''
+    values = np.asarray(index.values).astype('datetime64[ns]')
+    return values.view('i8')
+
+
+def infer_interval(index):
+    '''Infer the sampling interval of a DatetimeIndex, in seconds. The
+    median of the positive timestep differences is used, so duplicated
+    timestamps and gaps in the record do not affect the result.
+    '''
+    steps = np.diff(np.sort(epoch_ns(index)))
+    steps = steps[steps > 0]
+    if not len(steps):
+        raise ValueError(('Cannot infer a sampling interval from fewer than '
+                          'two unique timestamps'))
+    return np.median(steps)/1e9
+
+
+def interval_label(seconds):
+    '''Short label for a sampling interval, e.g. '10Min', '1H' or '1S' '''
+    if seconds >= 3600 and seconds % 3600 == 0:
+        return '{0}H'.format(int(seconds//3600))
+    elif seconds >= 60 and seconds % 60 == 0:
+        return '{0}Min'.format(int(seconds//60))
+    elif seconds == int(seconds):
+        return '{0}S'.format(int(seconds))
+    return '{0}S'.format(seconds)
+
+
+def freq_seconds(freq):
+    '''Block length in seconds, from a pandas time string or a number of
+    seconds'''
+    if isinstance(freq, (int, float)):
+        return float(freq)
+    return pd.Timedelta(freq).value/1e9
+
+
+def block_average(data, freq, directions=None, min_coverage=0,
+                  chunksize=1000000):
+    '''Average a record into fixed time blocks. Blocks are aligned to
+    multiples of freq since the epoch, and the data is reduced in chunks of
+    rows so long 1 Hz records never need a full grouped copy in memory.
+
+    Parameters:
+    ___________
+    data: DataFrame
+        Data with a DatetimeIndex. Non-numeric columns are dropped.
+    freq: string or float
+        Block length, either a pandas time string ('10Min', '1H') or a
+        number of seconds
+    directions: list, default None
+        Columns to vector average. Defaults to every direction channel
+        found by channels.is_direction
+    min_coverage: float, default 0
+        Fraction of the expected records per block required for a valid
+        average. Blocks below this fraction are set to NaN.
+    chunksize: int, default 1000000
+        Number of rows reduced at a time
+
+    Returns:
+    ________
+    DataFrame of block averages, indexed by block start
+    '''
+    period = int(round(freq_seconds(freq)*1e9))
+
+    numeric = data.select_dtypes(include=[np.number])
+    columns = numeric.columns.tolist()
+    if directions is None:
+        directions = [x for x in columns if channels.is_direction(x)]
+    is_dir = np.array([x in directions for x in columns], dtype=bool)
+    ncols = len(columns)
+
+    stamps = epoch_ns(data.index)
+    origin = stamps.min()//period*period
+    nblocks = int((stamps.max() - origin)//period) + 1
+    offsets = np.arange(ncols)
+
+    #Column arrays are taken once, as .values of a mixed dtype frame
+    #copies the whole frame
+    arrays = [numeric.iloc[:, x].values for x in range(ncols)]
+    sums = np.zeros(nblocks*ncols)
+    cos_sums = np.zeros(nblocks*ncols)
+    counts = np.zeros(nblocks*ncols)
+    for start in range(0, len(stamps), chunksize):
+        keys = (stamps[start:start+chunksize] - origin)//period
+        values = np.column_stack([x[start:start+chunksize]
+                                  for x in arrays]).astype(float)
+        flat_keys = (keys[:, None]*ncols + offsets).ravel()
+        valid = ~np.isnan(values)
+        counts += np.bincount(flat_keys, weights=valid.ravel(),
+                              minlength=nblocks*ncols)
+        values = np.where(valid, values, 0)
+        radians = np.radians(values[:, is_dir])
+        scalar = values.copy()
+        scalar[:, is_dir] = np.sin(radians)
+        cosines = np.zeros_like(values)
+        cosines[:, is_dir] = np.where(valid[:, is_dir], np.cos(radians), 0)
+        sums += np.bincount(flat_keys, weights=scalar.ravel(),
+                            minlength=nblocks*ncols)
+        cos_sums += np.bincount(flat_keys, weights=cosines.ravel(),
+                                minlength=nblocks*ncols)
+
+    sums = sums.reshape(nblocks, ncols)
+    cos_sums = cos_sums.reshape(nblocks, ncols)
+    counts = counts.reshape(nblocks, ncols)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        averaged = sums/counts
+    vector = circular.direction(sums[:, is_dir], cos_sums[:, is_dir])
+    averaged[:, is_dir] = np.where(counts[:, is_dir] > 0, vector, np.nan)
+
+    if min_coverage:
+        expected = period/(infer_interval(data.index)*1e9)
+        averaged[counts < min_coverage*expected] = np.nan
+
+    block_stamps = origin + np.arange(nblocks, dtype='i8')*period
+    if getattr(data.index, 'tz', None) is not None:
+        index = pd.to_datetime(block_stamps, utc=True)
+        index = index.tz_convert(data.index.tz)
+    else:
+        index = pd.to_datetime(block_stamps)
+    return pd.DataFrame(averaged, index=index, columns=numeric.columns)
@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+'''
+Time Zones
+-------
+
+Localisation of met mast timestamps. Loggers either keep local standard
+time all year, or follow the clock through daylight saving changes, which
+repeats an hour in autumn and skips one in spring. Both are turned into a
+time zone aware index in bulk, with a report of the rows that needed
+special handling.
+
+    >>> index, report = timezones.localize(data.index, 'US/Eastern',
+    ...                                    mode='standard')
+
+'''
+from __future__ import division
+import numpy as np
+import pandas as pd
+
+MODES = ('standard', 'observed')
+AMBIGUOUS = ('infer', 'NaT', 'first', 'last', 'raise')
+NONEXISTENT = ('NaT', 'shift_forward', 'shift_backward', 'raise')
+
+
+def _offsets(stamps, time_zone):
+    '''UTC offset in ns of the time zone at UTC instants given as
+    datetime64[ns]'''
+    utc = pd.DatetimeIndex(stamps).tz_localize('UTC')
+    wall = utc.tz_convert(time_zone).tz_localize(None)
+    return (np.asarray(wall.values, dtype='datetime64[ns]').view('i8') -
+            np.asarray(stamps, dtype='datetime64[ns]').view('i8'))
+
+
+def standard_offsets(index, time_zone):
+    '''UTC offset of local standard time, in ns, for each timestamp
+
+    The standard offset of each year is the smaller of the January and
+    July offsets, so only two lookups per year are needed however long the
+    record is.
+
+    Parameters:
+    ___________
+    index: DatetimeIndex
+        Naive timestamps
+    time_zone: string
+        pytz time zone name, e.g. 'US/Eastern'
+
+    Returns:
+    ________
+    int64 array of offsets in nanoseconds
+    '''
+    stamps = np.asarray(index.values, dtype='datetime64[ns]')
+    years, inverse = np.unique(stamps.astype('datetime64[Y]'),
+                               return_inverse=True)
+    january = years.astype('datetime64[ns]')
+    july = (years.astype('datetime64[M]') + 6).astype('datetime64[ns]')
+    standard = np.minimum(_offsets(january, time_zone),
+                          _offsets(july, time_zone))
+    return standard[inverse.ravel()]
+
+
+def from_standard(index, time_zone):
+    '''Time zone aware index from timestamps in local standard time. No
+    timestamp is repeated or missing in standard time, so this is a fixed
+    shift to UTC and a conversion to the time zone.'''
+    stamps = np.asarray(index.values, dtype='datetime64[ns]').view('i8')
+    utc = (stamps - standard_offsets(index, time_zone)).view('datetime64[ns]')
+    return pd.DatetimeIndex(utc).tz_localize('UTC').tz_convert(time_zone)
+
+
+def transitions(index, time_zone):
+    '''Rows of a local clock time index that fall in a repeated hour
+    (ambiguous) or in a skipped hour (nonexistent) of the time zone.
+    Returns a tuple of (ambiguous, nonexistent) bool arrays.'''
+    size = len(index)
+    daylight = index.tz_localize(time_zone, ambiguous=np.ones(size, bool),
+                                 nonexistent='NaT')
+    winter = index.tz_localize(time_zone, ambiguous=np.zeros(size, bool),
+                               nonexistent='NaT')
+    nonexistent = np.asarray(daylight.isnull())
+    ambiguous = ~nonexistent & (daylight.asi8 != winter.asi8)
+    return ambiguous, nonexistent
+
+
+def from_observed(index, time_zone, ambiguous='infer', nonexistent='NaT'):
+    '''Time zone aware index from local clock time that follows daylight
+    saving changes
+
+    Parameters:
+    ___________
+    index: DatetimeIndex
+        Naive timestamps in local clock time
+    time_zone: string
+        pytz time zone name
+    ambiguous: string, default 'infer'
+        Timestamps in the repeated autumn hour. 'infer' uses the order of
+        the records, which needs both copies of the hour. 'first' takes
+        them as daylight saving time, 'last' as standard time, 'NaT' marks
+        them missing and 'raise' raises a ValueError.
+    nonexistent: string, default 'NaT'
+        Timestamps in the skipped spring hour. 'NaT' marks them missing,
+        'shift_forward' and 'shift_backward' move them to the nearest
+        valid time and 'raise' raises a ValueError.
+
+    Returns:
+    ________
+    Time zone aware DatetimeIndex, with NaT for rows that could not be
+    placed
+    '''
+    if ambiguous not in AMBIGUOUS:
+        raise ValueError('ambiguous must be one of {0}'.format(AMBIGUOUS))
+    if nonexistent not in NONEXISTENT:
+        raise ValueError('nonexistent must be one of '
+                         '{0}'.format(NONEXISTENT))
+    if ambiguous in ('first', 'last'):
+        ambiguous = np.full(len(index), ambiguous == 'first')
+    return index.tz_localize(time_zone, ambiguous=ambiguous,
+                             nonexistent=nonexistent)
+
+
+def localize(index, time_zone, mode='standard', ambiguous='infer',
+             nonexistent='NaT'):
+    '''Localise a naive index to a time zone
+
+    Parameters:
+    ___________
+    index: DatetimeIndex
+        Naive timestamps. Indexes that already have a time zone are
+        converted to time_zone.
+    time_zone: string
+        pytz time zone name
+    mode: string, default 'standard'
+        'standard' for loggers kept on local standard time all year,
+        'observed' for loggers following daylight saving changes
+    ambiguous, nonexistent: string
+        Handling of the repeated and skipped hours in 'observed' mode, see
+        timezones.from_observed
+
+    Returns:
+    ________
+    Tuple of (index, report). report is a dict with the mode, the
+    'ambiguous' and 'nonexistent' local timestamps found, the number of
+    rows left as NaT under 'unplaced' and the number of rows in daylight
+    saving time under 'dst'.
+    '''
+    if mode not in MODES:
+        raise ValueError('mode must be one of {0}'.format(MODES))
+    empty = pd.DatetimeIndex([])
+    report = {'mode': mode, 'ambiguous': empty, 'nonexistent': empty,
+              'unplaced': 0, 'dst': 0}
+    if getattr(index, 'tz', None) is not None:
+        return index.tz_convert(time_zone), report
+
+    if mode == 'standard':
+        local = from_standard(index, time_zone)
+    else:
+        repeated, skipped = transitions(index, time_zone)
+        report['ambiguous'] = index[repeated]
+        report['nonexistent'] = index[skipped]
+        local = from_observed(index, time_zone, ambiguous=ambiguous,
+                              nonexistent=nonexistent)
+
+    placed = np.asarray(local.notnull())
+    report['unplaced'] = int((~placed).sum())
+    utc = np.asarray(local.tz_convert('UTC').tz_localize(None).values,
+                     dtype='datetime64[ns]')
+    offsets = _offsets(utc[placed], time_zone)
+    standard = standard_offsets(pd.DatetimeIndex(utc[placed]), time_zone)
+    report['dst'] = int((offsets != standard).sum())
+    return local, report
@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+'''
+Turbulence
+-------
+
+Turbulence intensity statistics per wind speed bin and IEC 61400-1
+turbulence category classification
+
+'''
+from __future__ import division
+import numpy as np
+import pandas as pd
+
+#IEC 61400-1 Ed. 3/4 reference turbulence intensities at 15 m/s
+IEC_CATEGORIES = (('C', 0.12), ('B', 0.14), ('A', 0.16), ('A+', 0.18))
+
+
+def _column_key(column, stat):
+    if isinstance(column, tuple):
+        return column + (stat,)
+    return (column, stat)
+
+
+def ti_bins(ws, std, bin_width=1):
+    '''Turbulence intensity statistics per wind speed bin, for many wind
+    speed columns in a single grouped pass. Bins are centered on multiples
+    of bin_width, as in IEC 61400-1.
+
+    Parameters:
+    ___________
+    ws: 2D array of float
+        Mean wind speeds, one column per sensor
+    std: 2D array of float
+        Wind speed standard deviations, same shape as ws
+    bin_width: float, default 1
+        Wind speed bin width
+
+    Returns:
+    ________
+    Tuple of (bin centers, dict of 2D arrays shaped (bins, sensors)) with
+    keys 'Count', 'TI Mean', 'TI Std', 'TI P90' and 'TI Rep'. 'TI Rep' is
+    the IEC representative turbulence, mean + 1.28 standard deviations.
+    There are no bins when no record is valid.
+    '''
+    ws = np.asarray(ws, dtype=float)
+    std = np.asarray(std, dtype=float)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        ti = std/ws
+    valid = np.isfinite(ti) & (ws > 0)
+    nsensors = ws.shape[1]
+    if not valid.any():
+        return np.zeros(0), dict((x, np.zeros((0, nsensors)))
+                                 for x in ('Count', 'TI Mean', 'TI Std',
+                                           'TI P90', 'TI Rep'))
+    codes = np.zeros(ws.shape, dtype=np.intp)
+    codes[valid] = np.floor(ws[valid]/bin_width + 0.5).astype(np.intp)
+    nbins = codes.max() + 1
+
+    #One flat group key per (sensor, bin)
+    keys = (np.arange(nsensors)*nbins + codes)[valid]
+    values = ti[valid]
+    size = nsensors*nbins
+    count = np.bincount(keys, minlength=size).astype(float)
+    sums = np.bincount(keys, weights=values, minlength=size)
+    squares = np.bincount(keys, weights=values**2, minlength=size)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = sums/count
+        var = (squares - count*mean**2)/(count - 1)
+    sd = np.sqrt(np.where(var > 0, var, 0))
+    sd[count < 2] = np.nan
+
+    #Percentiles from one sort on (key, ti), interpolated as np.percentile
+    order = np.lexsort((values, keys))
+    sorted_values = values[order]
+    starts = np.concatenate(([0], np.cumsum(count)[:-1])).astype(np.intp)
+    position = starts + 0.9*np.maximum(count - 1, 0)
+    lower = np.floor(position).astype(np.intp)
+    upper = np.ceil(position).astype(np.intp)
+    p90 = np.full(size, np.nan)
+    filled = count > 0
+    frac = position[filled] - lower[filled]
+    p90[filled] = (sorted_values[lower[filled]]*(1 - frac) +
+                   sorted_values[upper[filled]]*frac)
+
+    shape = (nsensors, nbins)
+    stats = {'Count': count, 'TI Mean': mean, 'TI Std': sd, 'TI P90': p90,
+             'TI Rep': mean + 1.28*sd}
+    stats = {x: y.reshape(shape).T for x, y in stats.items()}
+    return np.arange(nbins)*bin_width, stats
+
+
+def iec_category(speeds, ti):
+    '''Lowest IEC turbulence category whose normal turbulence model covers
+    the given turbulence intensity, evaluated elementwise. Values above
+    category A+ are returned as 'S'.
+
+    Parameters:
+    ___________
+    speeds: array of float
+        Bin center wind speeds
+    ti: array of float
+        Representative turbulence intensity at each speed
+
+    Returns:
+    ________
+    Array of category labels, with '' where no value is available
+    '''
+    speeds = np.asarray(speeds, dtype=float)
+    ti = np.asarray(ti, dtype=float)
+    labels = np.array([x for x, y in IEC_CATEGORIES] + ['S', ''],
+                      dtype=object)
+    irefs = np.array([y for x, y in IEC_CATEGORIES])
+    with np.errstate(invalid='ignore', divide='ignore'):
+        required = np.where(speeds > 0, ti/(0.75 + 5.6/speeds), np.nan)
+    codes = np.searchsorted(irefs, required)
+    codes[~np.isfinite(required)] = len(labels) - 1
+    return labels[codes]
+
+
+def turbulence(data, pairs, bin_width=1, min_count=10, min_ws=5, mask=None):
+    '''Turbulence intensity statistics and IEC categories for every wind
+    speed/standard deviation pair in a DataFrame
+
+    Parameters:
+    ___________
+    data: DataFrame
+        Met mast data
+    pairs: list
+        List of (mean column, standard deviation column) tuples, see
+        channels.ws_pairs
+    bin_width: float, default 1
+        Wind speed bin width
+    min_count: int, default 10
+        Minimum records in a bin for it to count toward the site category
+    min_ws: float, default 5
+        Minimum bin center wind speed counted toward the site category
+    mask: array of bool, default None
+        Rows to include
+
+    Returns:
+    ________
+    dict with 'TI', a DataFrame indexed by bin center with a column for each
+    (wind speed column, statistic), 'Bin Category', a DataFrame of IEC
+    categories per bin, and 'IEC Category', the most severe category per
+    column over bins meeting min_count and min_ws
+    '''
+    means = [x for x, y in pairs]
+    ws = data[means].values
+    std = data[[y for x, y in pairs]].values
+    if mask is not None:
+        ws = np.where(np.asarray(mask, dtype=bool)[:, None], ws, np.nan)
+    centers, stats = ti_bins(ws, std, bin_width=bin_width)
+
+    order = ['Count', 'TI Mean', 'TI Std', 'TI P90', 'TI Rep']
+    keys = [_column_key(x, stat) for x in means for stat in order]
+    values = np.column_stack([stats[stat][:, i] for i in range(len(means))
+                              for stat in order])
+    ti_frame = pd.DataFrame(values, index=centers,
+                            columns=pd.MultiIndex.from_tuples(keys))
+
+    categories = iec_category(centers[:, None], stats['TI Rep'])
+    bin_frame = pd.DataFrame(categories, index=centers, columns=means)
+    ranks = [x for x, y in IEC_CATEGORIES] + ['S']
+    counted = (stats['Count'] >= min_count) & (centers[:, None] >= min_ws)
+    site = {}
+    for i, column in enumerate(means):
+        found = [ranks.index(x) for x in categories[counted[:, i], i]
+                 if x in ranks]
+        site[column] = ranks[max(found)] if found else None
+
+    return {'TI': ti_frame, 'Bin Category': bin_frame, 'IEC Category': site}
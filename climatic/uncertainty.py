@@ -0,0 +1,283 @@
+# -*- coding: utf-8 -*-
+'''
+Uncertainty
+-------
+
+Block bootstrap confidence intervals for Weibull parameters and sector
+frequencies. Whole days or months of the record are resampled, so the
+autocorrelation within a block is kept.
+
+Each block is reduced once to a few sums and histograms. A bootstrap
+replicate is then only a count of how often each block was drawn, and the
+statistics of a batch of replicates are a matrix product of those counts
+with the block summaries, so thousands of replicates never copy the data.
+
+'''
+from __future__ import division
+import multiprocessing
+import numpy as np
+import circular
+import weibull_est as west
+
+BLOCKS = {'D': 'datetime64[D]', 'W': 'datetime64[W]', 'M': 'datetime64[M]'}
+METHODS = ('EuroAtlas', 'LeastSq')
+SUMMED = ('n', 'sum', 'cubes', 'fine', 'bins', 'sectors')
+MAX_WS = 100
+
+
+def block_codes(index, block='D'):
+    '''Block number of each timestamp, in local wall time
+
+    Parameters:
+    ___________
+    index: DatetimeIndex
+    block: string, default 'D'
+        'D' for days, 'W' for weeks or 'M' for months
+
+    Returns:
+    ________
+    Tuple of (codes, number of blocks). Blocks are numbered in time order,
+    and only blocks holding at least one record are counted.
+    '''
+    if block not in BLOCKS:
+        raise ValueError('block must be one of {0}'.format(sorted(BLOCKS)))
+    if getattr(index, 'tz', None) is not None:
+        index = index.tz_localize(None)
+    stamps = np.asarray(index.values, dtype='datetime64[ns]')
+    blocks = stamps.astype(BLOCKS[block]).astype(np.int64)
+    unique, codes = np.unique(blocks, return_inverse=True)
+    return codes.ravel(), len(unique)
+
+
+def _block_counts(codes, keys, valid, nblocks, nkeys, weights=None):
+    '''Counts, or sums of weights, of each key in each block'''
+    flat = codes[valid]*nkeys + keys[valid]
+    if weights is not None:
+        weights = weights[valid]
+    return np.bincount(flat, weights=weights,
+                       minlength=nblocks*nkeys).reshape(nblocks, nkeys)
+
+
+def _valid(ws, codes, max_ws):
+    '''Records with a finite speed from 0 to max_ws in a block'''
+    with np.errstate(invalid='ignore'):
+        return np.isfinite(ws) & (ws >= 0) & (ws <= max_ws) & (codes >= 0)
+
+
+def block_stats(ws, codes, nblocks, ws_intervals=1, resolution=0.05,
+                directions=None, sectors=12, max_ws=MAX_WS):
+    '''Per block summaries needed to refit a resampled record
+
+    Parameters:
+    ___________
+    ws: array of float
+        Wind speeds. NaNs, infinite and negative values, e.g. logger
+        sentinels such as -9999, are left out.
+    codes: array of int
+        Block of each record, from uncertainty.block_codes. Negative codes
+        are left out, e.g. for masked records.
+    nblocks: int
+        Number of blocks
+    ws_intervals: float, default 1
+        Width of the histogram bins for the least squares fit
+    resolution: float, default 0.05
+        Width of the fine histogram used to count records above the mean
+        wind speed of each replicate. Records are taken as spread evenly
+        within the bin holding the mean, which moves the EuroAtlas k by
+        around 0.1%, far less than the bootstrap spread.
+    directions: array of float, default None
+        Wind directions for sector frequencies
+    sectors: int, default 12
+        Number of sectors
+    max_ws: float, default 100
+        Highest plausible wind speed. Faster records are left out, which
+        also bounds the width of the histograms.
+
+    Returns:
+    ________
+    dict of arrays with one row per block: 'n', 'sum', 'cubes', the fine
+    histogram 'fine', the histogram 'bins' and, with directions,
+    'sectors'. 'resolution' and 'ws_intervals' are passed through.
+    '''
+    ws = np.asarray(ws, dtype=float)
+    codes = np.asarray(codes)
+    valid = _valid(ws, codes, max_ws)
+    filled = np.where(valid, ws, 0)
+    zeros = np.zeros(len(ws), dtype=np.int64)
+    stats = {'resolution': resolution, 'ws_intervals': ws_intervals}
+    stats['n'] = _block_counts(codes, zeros, valid, nblocks, 1)[:, 0]
+    stats['sum'] = _block_counts(codes, zeros, valid, nblocks, 1,
+                                 weights=filled)[:, 0]
+    stats['cubes'] = _block_counts(codes, zeros, valid, nblocks, 1,
+                                   weights=filled**3)[:, 0]
+
+    fine = (filled//resolution).astype(np.int64)
+    stats['fine'] = _block_counts(codes, fine, valid, nblocks,
+                                  int(fine.max()) + 1)
+    #Bins are closed on the right, (0, 1], (1, 2]..., as in MetMast.weibull
+    bins = np.ceil(filled/ws_intervals).astype(np.int64) - 1
+    stats['bins'] = _block_counts(codes, np.maximum(bins, 0),
+                                  valid & (bins >= 0), nblocks,
+                                  max(int(bins.max()) + 1, 1))
+
+    if directions is not None:
+        sector = circular.sector_codes(directions, sectors)
+        stats['sectors'] = _block_counts(codes, sector,
+                                         (sector >= 0) & (codes >= 0),
+                                         nblocks, sectors)
+    return stats
+
+
+def replicate_weights(nblocks, samples, seed=0):
+    '''Number of times each block is drawn in each replicate, with blocks
+    drawn uniformly with replacement. Returns an array of shape
+    (samples, nblocks).'''
+    rs = np.random.RandomState(seed)
+    picks = rs.randint(0, nblocks, (samples, nblocks))
+    flat = (np.arange(samples)[:, None]*nblocks + picks).ravel()
+    return np.bincount(flat, minlength=samples*nblocks).reshape(
+        samples, nblocks).astype(float)
+
+
+def combine(stats, weights):
+    '''Weighted sums of block summaries, one row per set of weights.
+    Returns a dict with the same keys as uncertainty.block_stats.'''
+    weights = np.atleast_2d(np.asarray(weights, dtype=float))
+    sums = {'resolution': stats['resolution'],
+            'ws_intervals': stats['ws_intervals']}
+    for key in SUMMED:
+        if key in stats:
+            sums[key] = weights.dot(stats[key])
+    return sums
+
+
+def fit(sums, method='EuroAtlas'):
+    '''Mean wind speed, Weibull A and k, and sector frequencies from
+    summed block summaries
+
+    Parameters:
+    ___________
+    sums: dict
+        Summaries with one row per estimate, from uncertainty.combine or
+        any other sum of uncertainty.block_stats rows
+    method: string, default 'EuroAtlas'
+        'EuroAtlas' or 'LeastSq'
+
+    Returns:
+    ________
+    dict of 'Mean', 'A' and 'k' arrays with one value per row, and
+    'Frequencies' of shape (rows, sectors) when the summaries have sector
+    counts
+    '''
+    if method not in METHODS:
+        raise ValueError('method must be one of {0}'.format(METHODS))
+    result = {}
+    with np.errstate(invalid='ignore', divide='ignore'):
+        n = sums['n']
+        mean = sums['sum']/n
+        result['Mean'] = mean
+        if method == 'EuroAtlas':
+            fine = sums['fine']
+            #Records above the mean, splitting the bin holding the mean
+            res = sums['resolution']
+            above = np.cumsum(fine[:, ::-1], axis=1)[:, ::-1]
+            above = np.hstack([above, np.zeros((len(fine), 1))])
+            pos = np.clip(np.nan_to_num(mean)/res, 0, fine.shape[1])
+            cell = np.minimum(pos.astype(np.int64), fine.shape[1] - 1)
+            rows = np.arange(len(fine))
+            part = np.clip(pos - cell, 0, 1)
+            exceed = above[rows, cell + 1] + fine[rows, cell]*(1 - part)
+            result['A'], result['k'] = west.euro_atlas_batch(
+                mean, sums['cubes']/n, exceed/n)
+        else:
+            counts = sums['bins']
+            x = np.arange(counts.shape[1])*sums['ws_intervals']
+            fitted = west.least_sq_batch(
+                counts/counts.sum(axis=1)[:, None], x)
+            result['A'], result['k'] = fitted['A'], fitted['k']
+        if 'sectors' in sums:
+            counts = sums['sectors']
+            result['Frequencies'] = counts/counts.sum(axis=1)[:, None]
+    return result
+
+
+def estimate(stats, weights, method='EuroAtlas'):
+    '''Mean wind speed, Weibull A and k, and sector frequencies of
+    weighted records
+
+    Parameters:
+    ___________
+    stats: dict
+        Block summaries from uncertainty.block_stats
+    weights: 2D array of float
+        Weight of each block, one row per replicate. A row of ones gives
+        the estimate of the full record.
+    method: string, default 'EuroAtlas'
+        'EuroAtlas' or 'LeastSq'
+
+    Returns:
+    ________
+    dict of arrays with one value, or one row of sector frequencies, per
+    replicate, as from uncertainty.fit
+    '''
+    return fit(combine(stats, weights), method=method)
+
+
+def _bootstrap_batch(args):
+    '''Estimates for one batch of block bootstrap replicates'''
+    stats, method, samples, seed = args
+    weights = replicate_weights(len(stats['n']), samples, seed=seed)
+    return estimate(stats, weights, method=method)
+
+
+def bootstrap(stats, samples=1000, method='EuroAtlas', processes=None,
+              seed=0, batch=250):
+    '''Block bootstrap replicates of the Weibull parameters and sector
+    frequencies
+
+    Parameters:
+    ___________
+    stats: dict
+        Block summaries from uncertainty.block_stats
+    samples: int, default 1000
+        Number of replicates
+    method: string, default 'EuroAtlas'
+        'EuroAtlas' or 'LeastSq'
+    processes: int, default None
+        Worker processes. Batches are run in this process with
+        processes=1 or when there is a single batch.
+    seed: int, default 0
+        Random seed. Each batch gets its own seed, so results do not
+        depend on the number of processes.
+    batch: int, default 250
+        Replicates estimated together in one batch
+
+    Returns:
+    ________
+    dict of replicate arrays, as from uncertainty.estimate
+    '''
+    if method not in METHODS:
+        raise ValueError('method must be one of {0}'.format(METHODS))
+    sizes = [min(batch, samples - x) for x in range(0, samples, batch)]
+    args = [(stats, method, size, seed + num)
+            for num, size in enumerate(sizes)]
+    if processes == 1 or len(args) == 1:
+        results = [_bootstrap_batch(x) for x in args]
+    else:
+        pool = multiprocessing.Pool(processes)
+        try:
+            results = pool.map(_bootstrap_batch, args)
+        finally:
+            pool.close()
+            pool.join()
+    return dict((key, np.concatenate([x[key] for x in results]))
+                for key in results[0])
+
+
+def intervals(replicates, ci=0.9):
+    '''Percentile confidence interval of replicates along the first axis.
+    Returns a tuple of (lower, upper).'''
+    tail = (1 - ci)/2*100
+    with np.errstate(invalid='ignore'):
+        return (np.nanpercentile(replicates, tail, axis=0),
+                np.nanpercentile(replicates, 100 - tail, axis=0))
@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+'''
+Variability
+-------
+
+Rolling and interannual variability of long records. Every calendar month
+is reduced once to moment sums, wind speed histograms and sector counts.
+Prefix sums over the months then give the sums of any run of months with
+two lookups, so rolling 12 month and calendar year windows are fit all at
+once without going back to the data.
+
+'''
+from __future__ import division
+import numpy as np
+import pandas as pd
+import circular
+import uncertainty
+
+
+def month_codes(index):
+    '''Calendar month of each timestamp, counted from the first month of
+    the record, in local wall time. Returns a tuple of (codes, months),
+    with months the start of every month from the first to the last,
+    including months with no data.'''
+    if getattr(index, 'tz', None) is not None:
+        index = index.tz_localize(None)
+    stamps = np.asarray(index.values, dtype='datetime64[ns]')
+    months = stamps.astype('datetime64[M]').astype(np.int64)
+    first, last = months.min(), months.max()
+    starts = np.arange(first, last + 1).astype('datetime64[M]')
+    return months - first, starts
+
+
+def prefix_sums(stats):
+    '''Cumulative sums of monthly summaries along the months, with a
+    leading row of zeros, so months [i, j) sum to p[j] - p[i]'''
+    prefix = {'resolution': stats['resolution'],
+              'ws_intervals': stats['ws_intervals']}
+    for key in uncertainty.SUMMED:
+        if key in stats:
+            values = np.asarray(stats[key], dtype=float)
+            zeros = np.zeros((1,) + values.shape[1:])
+            prefix[key] = np.concatenate([zeros, np.cumsum(values, axis=0)])
+    return prefix
+
+
+def window_sums(prefix, starts, ends):
+    '''Summaries of the months [starts, ends) of each window'''
+    starts, ends = np.asarray(starts), np.asarray(ends)
+    sums = {'resolution': prefix['resolution'],
+            'ws_intervals': prefix['ws_intervals']}
+    for key in uncertainty.SUMMED:
+        if key in prefix:
+            sums[key] = prefix[key][ends] - prefix[key][starts]
+    return sums
+
+
+def rolling_windows(nmonths, window=12):
+    '''Start and end months of every full window of consecutive months,
+    labelled by the last month. Returns a tuple of (starts, ends).'''
+    ends = np.arange(window, nmonths + 1)
+    return ends - window, ends
+
+
+def year_windows(months):
+    '''Start and end months of each calendar year in the record, as a tuple
+    of (starts, ends, years)'''
+    years = months.astype('datetime64[Y]').astype(np.int64) + 1970
+    starts = np.flatnonzero(np.r_[True, years[1:] != years[:-1]])
+    return starts, np.r_[starts[1:], len(months)], years[starts]
+
+
+def expected_records(first, last, interval):
+    '''Records expected from the first up to the last period, e.g.
+    datetime64[M] or datetime64[Y], at the sampling interval in seconds'''
+    seconds = ((last + 1).astype('datetime64[s]') -
+               first.astype('datetime64[s]')).astype(float)
+    return seconds/interval
+
+
+def windows(ws, codes, months, directions=None, window=12,
+            method='EuroAtlas', sectors=12, ws_intervals=1, interval=None,
+            min_coverage=0):
+    '''Rolling and calendar year statistics of one wind speed channel
+
+    Parameters:
+    ___________
+    ws: array of float
+        Wind speeds. NaNs, negative sentinels and speeds above
+        uncertainty.MAX_WS are left out, see uncertainty.block_stats.
+    codes: array of int
+        Month of each record, from variability.month_codes. Negative codes
+        are left out, e.g. for masked records.
+    months: array of datetime64[M]
+        Start of each month, from variability.month_codes
+    directions: array of float, default None
+        Wind directions for sector frequencies
+    window: int, default 12
+        Months in each rolling window
+    method: string, default 'EuroAtlas'
+        Weibull fit, 'EuroAtlas' or 'LeastSq'
+    sectors: int, default 12
+        Number of sectors
+    ws_intervals: float, default 1
+        Wind speed bins for the 'LeastSq' method
+    interval: float, default None
+        Sampling interval in seconds, used for the coverage
+    min_coverage: float, default 0
+        Fraction of the expected records a window needs. Windows below it
+        are NaN.
+
+    Returns:
+    ________
+    dict with 'Rolling' and 'Annual', each a dict of 'Mean', 'A', 'k',
+    'Records' and 'Coverage' arrays with one value per window, plus
+    'Frequencies' with directions, and the window 'Labels'
+    '''
+    stats = uncertainty.block_stats(ws, codes, len(months),
+                                    ws_intervals=ws_intervals,
+                                    directions=directions, sectors=sectors)
+    prefix = prefix_sums(stats)
+    year_starts, year_ends, years = year_windows(months)
+    roll_starts, roll_ends = rolling_windows(len(months), window=window)
+    calendar = (years - 1970).astype('datetime64[Y]')
+    kinds = {'Rolling': (roll_starts, roll_ends, months[roll_ends - 1],
+                         months[roll_starts], months[roll_ends - 1]),
+             'Annual': (year_starts, year_ends, years, calendar, calendar)}
+
+    result = {}
+    for kind, (starts, ends, labels, first, last) in kinds.items():
+        sums = window_sums(prefix, starts, ends)
+        if len(starts):
+            found = uncertainty.fit(sums, method=method)
+        else:
+            found = {'Mean': np.array([]), 'A': np.array([]),
+                     'k': np.array([])}
+            if 'sectors' in sums:
+                found['Frequencies'] = np.empty((0, sectors))
+        found['Records'] = sums['n']
+        if interval:
+            with np.errstate(invalid='ignore', divide='ignore'):
+                found['Coverage'] = sums['n']/expected_records(
+                    first, last, interval)
+            short = found['Coverage'] < min_coverage
+        else:
+            found['Coverage'] = np.full(len(starts), np.nan)
+            short = np.zeros(len(starts), dtype=bool)
+        for key in ('Mean', 'A', 'k', 'Frequencies'):
+            if key in found:
+                found[key] = np.where(
+                    short.reshape((-1,) + (1,)*(found[key].ndim - 1)),
+                    np.nan, found[key])
+        found['Labels'] = labels
+        result[kind] = found
+    return result
+
+
+def interannual(annual, min_coverage=0.9):
+    '''Interannual variability: standard deviation of the annual means over
+    their average, using years with at least min_coverage of their
+    records. Returns NaN with fewer than two such years.'''
+    means = np.asarray(annual['Mean'], dtype=float)
+    coverage = np.asarray(annual['Coverage'], dtype=float)
+    if np.isnan(coverage).all():
+        full = ~np.isnan(means)
+    else:
+        full = ~np.isnan(means) & (coverage >= min_coverage)
+    if full.sum() < 2:
+        return np.nan
+    return np.std(means[full], ddof=1)/np.mean(means[full])
+
+
+def frames(found, columns, sectors=12):
+    '''Arrange per column window results from variability.windows into
+    DataFrames
+
+    Parameters:
+    ___________
+    found: dict
+        column: result of variability.windows
+    columns: list
+        Wind speed columns, in output order
+    sectors: int, default 12
+        Number of sectors
+
+    Returns:
+    ________
+    dict of 'Rolling' and 'Annual', each a dict of 'Mean', 'Weibull A',
+    'Weibull k', 'Records' and 'Coverage' DataFrames with one column per
+    wind speed column, and 'Sectorwise', a dict of column: DataFrame of
+    frequencies per window
+    '''
+    names = (('Mean', 'Mean'), ('Weibull A', 'A'), ('Weibull k', 'k'),
+             ('Records', 'Records'), ('Coverage', 'Coverage'))
+    result = {}
+    for kind in ('Rolling', 'Annual'):
+        labels = found[columns[0]][kind]['Labels']
+        if kind == 'Rolling':
+            index = pd.DatetimeIndex(labels.astype('datetime64[ns]'))
+        else:
+            index = pd.Index(labels, name='Year')
+        tables = {}
+        for name, key in names:
+            tables[name] = pd.DataFrame(
+                dict((num, found[x][kind][key])
+                     for num, x in enumerate(columns)), index=index)
+            tables[name].columns = pd.Index(columns)
+        sectorwise = {}
+        for column in columns:
+            if 'Frequencies' in found[column][kind]:
+                sectorwise[column] = pd.DataFrame(
+                    found[column][kind]['Frequencies'], index=index,
+                    columns=circular.sector_centers(sectors))
+        tables['Sectorwise'] = sectorwise
+        result[kind] = tables
+    return result
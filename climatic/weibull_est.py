@@ -13,21 +13,145 @@ import numpy as np
 
 
 #Least Squares
+def _pdf(A, k, log_x):
+    '''Weibull pdf and its partial derivatives by A and k at wind speeds
+    x > 0, given as log(x)'''
+    log_u = log_x - np.log(A)
+    z = np.exp(k*log_u)
+    f = k/A*np.exp((k - 1)*log_u - z)
+    return f, f*k/A*(z - 1), f*(1/k + log_u*(1 - z))
+
+
+def pdf(A, k, x):
+    '''Weibull pdf with the partial derivatives by A and k. A and k
+    broadcast against x, e.g. A[:, None] for many fits over shared bins.
+    The pdf and its derivatives are taken as 0 at x = 0.'''
+    x = np.asarray(x, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        values = _pdf(A, k, np.log(x))
+    return tuple(np.where(x > 0, v, 0) for v in values)
+
+
+def moment_seed(data, x):
+    '''Method of moments A and k from histogram frequencies, using the
+    Justus approximation k = (std/mean)^-1.086. Used to start the least
+    squares fit.'''
+    data = np.atleast_2d(np.asarray(data, dtype=float))
+    x = np.asarray(x, dtype=float)
+    weights = np.where(np.isfinite(data), data, 0)
+    total = weights.sum(axis=-1)
+    mean = (weights*x).sum(axis=-1)/total
+    var = (weights*(x - mean[:, None])**2).sum(axis=-1)/total
+    k = np.clip((np.sqrt(var)/mean)**-1.086, 0.5, 10)
+    A = mean/gamma(1 + 1/k)
+    return np.where(A > 0, A, 1), k
+
+
+def least_sq_batch(data, x, A=None, k=None, max_iter=100, tol=1e-10):
+    '''Least squares Weibull fits of many histograms at once with a
+    vectorized Levenberg-Marquardt loop and analytic Jacobian
+
+    Parameters:
+    ___________
+    data: 2D array of float
+        Normalized histogram frequencies, one fit per row
+    x: array of float
+        Wind speed of each histogram bin, shared by all rows
+    A, k: array of float, default None
+        Starting parameters. Default to moment_seed estimates.
+    max_iter: int, default 100
+        Maximum iterations
+    tol: float, default 1e-10
+        Stop a fit when an accepted step lowers its squared error by less
+        than tol relative to the error
+
+    Returns:
+    ________
+    dict of arrays with one value per fit: 'A', 'k', the squared error
+    'cost', 'iterations' and 'converged'
+    '''
+    y = np.atleast_2d(np.asarray(data, dtype=float))
+    y = np.where(np.isfinite(y), y, 0)
+    x = np.asarray(x, dtype=float)
+    seed_A, seed_k = moment_seed(y, x)
+    A = np.array(seed_A if A is None else np.broadcast_to(A, seed_A.shape),
+                 dtype=float)
+    k = np.array(seed_k if k is None else np.broadcast_to(k, seed_k.shape),
+                 dtype=float)
+    nfits = len(y)
+    damping = np.full(nfits, 1e-3)
+    iterations = np.zeros(nfits, dtype=int)
+    converged = np.zeros(nfits, dtype=bool)
+
+    #The pdf is taken as 0 at x = 0, so those bins add a constant error
+    positive = x > 0
+    fixed = (y[:, ~positive]**2).sum(axis=1)
+    y, log_x = y[:, positive], np.log(x[positive])
+
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        f, dA, dk = _pdf(A[:, None], k[:, None], log_x)
+        resid = y - f
+        cost = (resid**2).sum(axis=1)
+        for num in range(max_iter):
+            active = ~converged
+            if not active.any():
+                break
+            iterations[active] += 1
+            #2x2 normal equations, (J'J + damping*diag(J'J)) step = J'r
+            aa, ak, kk = (dA*dA).sum(axis=1), (dA*dk).sum(axis=1), \
+                (dk*dk).sum(axis=1)
+            ga, gk = (dA*resid).sum(axis=1), (dk*resid).sum(axis=1)
+            aa_d, kk_d = aa*(1 + damping), kk*(1 + damping)
+            det = aa_d*kk_d - ak**2
+            new_A = A + (kk_d*ga - ak*gk)/det
+            new_k = k + (aa_d*gk - ak*ga)/det
+            ok = active & (new_A > 0) & (new_k > 0)
+            new_A, new_k = np.where(ok, new_A, A), np.where(ok, new_k, k)
+            new_f, new_dA, new_dk = _pdf(new_A[:, None], new_k[:, None],
+                                         log_x)
+            new_resid = y - new_f
+            new_cost = (new_resid**2).sum(axis=1)
+            better = ok & (new_cost < cost)
+
+            converged |= better & (cost - new_cost <= tol*(cost + fixed))
+            converged |= active & ~better & (damping > 1e10)
+            damping = np.where(better, damping/10, damping*10)
+            A, k = np.where(better, new_A, A), np.where(better, new_k, k)
+            cost = np.where(better, new_cost, cost)
+            resid = np.where(better[:, None], new_resid, resid)
+            dA = np.where(better[:, None], new_dA, dA)
+            dk = np.where(better[:, None], new_dk, dk)
+    return {'A': A, 'k': k, 'cost': cost + fixed, 'iterations': iterations,
+            'converged': converged}
+
+
 def least_sq(data, x):
     '''Least squares fitting of parameters via data fitting to the
-    distribution
+    distribution. Returns the array [A, k].
     '''
-    def residuals(p, y, x):
-        '''Least squares residual errors'''
-        A, k = p
-        err = y-k/A*(x/A)**(k-1)*np.exp(-(x/A)**k)
-        return err
-    param_init = [10, 2]
-    plsq = spyopt.leastsq(residuals, param_init, args=(data, x))
-    return plsq[0]
+    fit = least_sq_batch(data, x)
+    return np.array([fit['A'][0], fit['k'][0]])
 
 
-def euro_atlas(ws_data):
+def sample_moments(ws_data):
+    '''Sample moments used by the European Wind Atlas fit, from a single
+    pass over the data. The third moment also gives the mean wind power
+    density, 1/2 rho a3, without touching the data again.
+
+    Returns:
+    ________
+    dict with the record count 'n', the mean 'mean', the third moment 'a3'
+    and the probability of exceeding the mean 'prob_exceed'
+    '''
+    ws = np.asarray(ws_data, dtype=float)
+    ws = ws[~np.isnan(ws)]
+    n = len(ws)
+    mean = ws.sum()/n
+    return {'n': n, 'mean': mean, 'a3': np.sum(ws**3)/n,
+            'prob_exceed': np.count_nonzero(ws > mean)/n}
+
+
+def euro_atlas(ws_data=None, moments=None):
     '''European Wind Atlas approach for calculating weibull parameters.
     This approach specifies the following contraints:
 
@@ -39,24 +163,72 @@ def euro_atlas(ws_data):
     These details can be found on pages 168-169 in the EMD WindPro manual:
     http://www.emd.dk/files/windpro2.8/WindPRO28_Manual.pdf
 
+    Pass either the wind speed data, or moments precomputed with
+    weibull_est.sample_moments.
+
     '''
+    if moments is None:
+        moments = sample_moments(ws_data)
 
     #Statistical 3rd order moment
-    a3 = np.sum(ws_data**3)/len(ws_data)
+    a3 = moments['a3']
 
     #Probability of exceeding mean value
-    exceed = ws_data.where(ws_data > ws_data.mean(), None)
-    prob_exceed = exceed.count()/len(ws_data)
+    prob_exceed = moments['prob_exceed']
 
     def k_eq(x, ws_mean, a3, prob):
         '''Equation for k'''
         return np.exp(-(ws_mean/(a3/gamma(1+3/x))**(1/3))**x)-prob
 
     #Solve for k
-    soln = spyopt.fsolve(k_eq, x0=[2], args=(ws_data.mean(), a3, prob_exceed))
+    soln = spyopt.fsolve(k_eq, x0=[2], args=(moments['mean'], a3,
+                                             prob_exceed))
     k = soln[0]
 
     #Solve for A
     A = (a3/gamma(1+3/k))**(1/3)
 
     return A, k
+
+
+def euro_atlas_batch(mean, a3, prob_exceed, k_range=(0.5, 20),
+                     iterations=60):
+    '''European Wind Atlas fits for many sets of moments at once. k is
+    found by bisection over k_range in log space, so every fit takes the
+    same steps and the loop runs over arrays rather than fits.
+
+    Parameters:
+    ___________
+    mean, a3, prob_exceed: array of float
+        Mean, third moment and probability of exceeding the mean, as
+        returned by weibull_est.sample_moments
+    k_range: tuple, default (0.5, 20)
+        Bracket for k. Fits without a root in the bracket are NaN.
+    iterations: int, default 60
+        Bisection steps
+
+    Returns:
+    ________
+    Tuple of (A, k) arrays
+    '''
+    mean, a3, prob = np.broadcast_arrays(*[np.asarray(x, dtype=float)
+                                           for x in (mean, a3, prob_exceed)])
+
+    def excess(k):
+        A = (a3/gamma(1 + 3/k))**(1/3)
+        return np.exp(-(mean/A)**k) - prob
+
+    with np.errstate(invalid='ignore', divide='ignore', over='ignore'):
+        lo = np.full(mean.shape, float(k_range[0]))
+        hi = np.full(mean.shape, float(k_range[1]))
+        f_lo, f_hi = excess(lo), excess(hi)
+        bracketed = np.sign(f_lo) != np.sign(f_hi)
+        for num in range(iterations):
+            mid = np.sqrt(lo*hi)
+            f_mid = excess(mid)
+            same = np.sign(f_mid) == np.sign(f_lo)
+            lo, f_lo = np.where(same, mid, lo), np.where(same, f_mid, f_lo)
+            hi = np.where(same, hi, mid)
+        k = np.where(bracketed, np.sqrt(lo*hi), np.nan)
+        A = (a3/gamma(1 + 3/k))**(1/3)
+    return A, k
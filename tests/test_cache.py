@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+'''
+Test Cache
+-------
+
+Test the LRU cache and argument keys with nosetests
+
+'''
+from __future__ import division
+import numpy as np
+import pandas as pd
+import nose.tools as nt
+
+from climatic import cache
+
+
+class TestCache():
+    '''Test eviction, statistics and argument freezing'''
+
+    def test_lru(self):
+        '''Test least recently used eviction'''
+        lru = cache.LRUCache(maxsize=2)
+        lru.put('a', 1)
+        lru.put('b', 2)
+        assert lru.get('a') == (True, 1)
+        lru.put('c', 3)
+
+        assert lru.get('b') == (False, None)
+        assert lru.get('a') == (True, 1)
+        stats = lru.stats()
+        assert (stats['hits'], stats['misses'], stats['evictions'],
+                stats['size']) == (2, 1, 1, 2)
+        nt.assert_raises(ValueError, cache.LRUCache, 0)
+
+    def test_freeze(self):
+        '''Test keys follow array contents'''
+        mask = np.array([True, False, True])
+        assert cache.freeze(mask) == cache.freeze(mask.copy())
+        assert cache.freeze(mask) != cache.freeze(~mask)
+        assert cache.freeze({'b': [1, 2], 'a': ('WS', 50)}) == \
+            cache.freeze({'a': ('WS', 50), 'b': [1, 2]})
+        nt.assert_raises(TypeError, cache.freeze, {'a': set([1])})
+
+    def test_freeze_frame(self):
+        '''Test DataFrame keys follow the index, columns and values'''
+        index = pd.date_range('2013/01/01 00:00', periods=3, freq='10Min')
+        frame = pd.DataFrame({('WS Mean 1', 50): [4., 5., 6.],
+                              ('WD Mean 1', 50): [90., 180., 270.]},
+                             index=index)
+        shifted = frame.copy()
+        shifted.index = shifted.index + pd.Timedelta('10Min')
+        renamed = frame.copy()
+        renamed.columns = [('WS Mean 2', 50), ('WD Mean 1', 50)]
+
+        assert cache.freeze(frame) == cache.freeze(frame.copy())
+        assert cache.freeze(frame) != cache.freeze(frame*2)
+        assert cache.freeze(frame) != cache.freeze(shifted)
+        assert cache.freeze(frame) != cache.freeze(renamed)
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+'''
+Test Circular
+-------
+
+Test the circular statistics with nosetests
+
+'''
+from __future__ import division
+import numpy as np
+import nose.tools as nt
+
+from climatic import circular
+
+
+class TestCircular():
+    '''Test vector means, Yamartino standard deviations and grouping'''
+
+    def test_vector_mean(self):
+        '''Test means across north and speed weighting'''
+        nt.assert_almost_equal(circular.vector_mean([359, 1]), 0)
+        nt.assert_almost_equal(circular.vector_mean([350, 20, np.nan]), 5)
+        nt.assert_almost_equal(circular.vector_mean([90, 0], weights=[3, 1]),
+                               np.degrees(np.arctan2(3, 1)))
+        means = circular.vector_mean(np.array([[350, 80], [10, 100]]))
+        np.testing.assert_almost_equal(means, [0, 90])
+
+    def test_sector_codes(self):
+        '''Test sector edges, north at 360 and invalid readings'''
+        codes = circular.sector_codes([0, 14.9, 15, 345, 360, np.nan, -999,
+                                       400, -0.1])
+        assert codes.tolist() == [0, 0, 1, 0, 0, -1, -1, -1, -1]
+
+    def test_stddev(self):
+        '''Test the Yamartino standard deviation'''
+        nt.assert_almost_equal(circular.stddev([10, 10, 10]), 0, places=4)
+        nt.assert_almost_equal(circular.stddev([355, 5]),
+                               circular.stddev([175, 185]))
+        nt.assert_almost_equal(circular.stddev([0, 90, 180, 270]),
+                               np.degrees(np.pi/2*2/np.sqrt(3)))
+
+    def test_group_stats(self):
+        '''Test grouped statistics against a per-group loop'''
+        rs = np.random.RandomState(0)
+        directions = rs.uniform(0, 360, (500, 3))
+        directions[rs.randint(0, 500, 20), 1] = np.nan
+        codes = rs.randint(-1, 4, 500)
+        stats = circular.group_stats(directions, codes, 5)
+
+        assert np.isnan(stats['Mean'][4]).all()
+        for group in range(4):
+            for col in range(3):
+                values = directions[codes == group, col]
+                values = values[~np.isnan(values)]
+                assert stats['Count'][group, col] == len(values)
+                nt.assert_almost_equal(stats['Mean'][group, col],
+                                       circular.vector_mean(values))
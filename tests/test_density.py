@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+'''
+Test Density
+-------
+
+Test the air density and power density module with nosetests
+
+'''
+from __future__ import division
+import numpy as np
+import pandas as pd
+import nose.tools as nt
+
+from climatic import density
+from climatic import weibull_est as west
+
+
+class TestDensity():
+    '''Test density extrapolation and grouped power density'''
+
+    def test_air_density(self):
+        '''Test against ISA values and the ideal gas law'''
+        isa = density.air_density([15., 15.], heights=[0, 1000])
+        np.testing.assert_almost_equal(isa[0], [1.2250, 1.1117], decimal=4)
+
+        measured = density.air_density(np.array([20.]),
+                                       pressure=np.array([1000.]),
+                                       sensor_height=2)
+        nt.assert_almost_equal(measured[0, 0], 100000/(287.05*293.15))
+        higher = density.air_density(np.array([20.]),
+                                     pressure=np.array([1000.]),
+                                     sensor_height=2, heights=[2, 80])
+        assert higher[0, 1] < higher[0, 0]
+
+    def test_grouped(self):
+        '''Test grouped power density against a pandas groupby'''
+        rs = np.random.RandomState(0)
+        ws = rs.weibull(2, (1000, 2))*8
+        ws[rs.randint(0, 1000, 30), 0] = np.nan
+        rho = rs.normal(1.2, 0.02, (1000, 1))
+        codes = rs.randint(-1, 12, 1000)
+        wpd, m3, counts = density.grouped(ws, rho, codes, 12)
+
+        frame = pd.DataFrame(density.power_density(ws, rho))
+        test_wpd = frame[codes >= 0].groupby(codes[codes >= 0]).mean()
+        np.testing.assert_almost_equal(wpd, test_wpd.values)
+        assert counts[:, 1].sum() == (codes >= 0).sum()
+
+    def test_moments(self):
+        '''Test the EuroAtlas fit on precomputed moments and the power
+        density from the same third moment'''
+        ws = pd.Series(np.random.RandomState(1).weibull(2, 5000)*8)
+        moments = west.sample_moments(ws)
+
+        assert west.euro_atlas(ws) == west.euro_atlas(moments=moments)
+        nt.assert_almost_equal(0.5*1.225*moments['a3'],
+                               density.power_density(ws).mean())
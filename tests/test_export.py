@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+'''
+Test Export
+-------
+
+Test the WAsP .tab export and reader with nosetests
+
+'''
+from __future__ import division
+import os
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+import nose.tools as nt
+
+from climatic import export, MetMast
+
+
+class TestExport():
+    '''Test joint counts, .tab round trips and campaign export'''
+
+    def setup(self):
+        self.directory = tempfile.mkdtemp()
+        rs = np.random.RandomState(0)
+        index = pd.date_range('2001/01/01', periods=6*24*30, freq='10Min')
+        self.masts = {}
+        for name in ('North', 'South'):
+            mast = MetMast(lat=45.5, lon=-122.7, height=80)
+            mast.data = pd.DataFrame(
+                {('WS Mean 1', 80): rs.weibull(2, len(index))*7,
+                 ('WS Mean 2', 40): rs.weibull(2, len(index))*6,
+                 ('WD Mean 1', 78): rs.uniform(0, 360, len(index))},
+                index=index)
+            self.masts[name] = mast
+
+    def teardown(self):
+        shutil.rmtree(self.directory)
+
+    def test_joint_counts(self):
+        '''Test bins closed on the right, calms and missing records'''
+        ws = np.array([0, 0.5, 1, 1.5, 2.5, np.nan, 3])
+        wd = np.array([0, 90, 180, 270, 0, 0, np.nan])
+        counts, edges = export.joint_counts(ws, wd, sectors=4)
+        np.testing.assert_array_equal(edges, [1, 2, 3])
+        np.testing.assert_array_equal(counts, [[1, 1, 1, 0], [0, 0, 0, 1],
+                                               [1, 0, 0, 0]])
+
+    def test_joint_counts_sentinels(self):
+        '''Test sentinels are dropped, not counted as calms'''
+        ws = np.array([0.5, -9999, -0.5, np.inf, 2.5, 40])
+        wd = np.array([0, 0, 90, 180, 270, 0])
+        counts, edges = export.joint_counts(ws, wd, sectors=4, max_ws=3)
+        np.testing.assert_array_equal(edges, [1, 2, 3])
+        np.testing.assert_array_equal(counts, [[1, 0, 0, 0], [0, 0, 0, 0],
+                                               [0, 0, 0, 1]])
+
+    def test_round_trip(self):
+        '''Test that a written table reads back as the joint frequencies'''
+        mast = self.masts['North']
+        ws = mast.data[('WS Mean 1', 80)].values
+        wd = mast.data[('WD Mean 1', 78)].values
+        counts, edges = export.joint_counts(ws, wd)
+        path = os.path.join(self.directory, 'north.tab')
+        export.write_tab(path, counts, edges, title='North', lat=45.5,
+                         lon=-122.7, height=80)
+        owc = export.read_tab(path)
+
+        nt.assert_equal(owc['Title'], 'North')
+        nt.assert_equal(owc['Height'], 80)
+        np.testing.assert_allclose(owc['Joint'].values, counts/counts.sum(),
+                                   atol=1e-5)
+        np.testing.assert_array_equal(owc['Table'].index, edges)
+        nt.assert_almost_equal(owc['Frequencies'].sum(), 1, places=4)
+
+    def test_campaign(self):
+        '''Test parallel export of every height of every mast'''
+        paths = export.campaign(self.masts, self.directory, processes=2)
+        serial = self.masts['South'].export_tabs(self.directory,
+                                                 name='South', processes=1)
+
+        nt.assert_equal(len(paths), 4)
+        nt.assert_equal(paths[('South', ('WS Mean 2', 40))],
+                        serial[('WS Mean 2', 40)])
+        for path in paths.values():
+            assert os.path.exists(path)
+        owc = export.read_tab(paths[('North', ('WS Mean 2', 40))])
+        nt.assert_equal(owc['Height'], 40)
+        nt.assert_equal(owc['Title'], 'North, WS Mean 2 40, WD Mean 1 78')
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+'''
+Test Extremes
+-------
+
+Test the extreme wind module with nosetests
+
+'''
+from __future__ import division
+import numpy as np
+import pandas as pd
+import scipy.stats as spystats
+import nose.tools as nt
+
+from climatic import extremes
+
+
+class TestExtremes():
+    '''Test block maxima, peaks over threshold and the batched fits'''
+
+    def setup(self):
+        rs = np.random.RandomState(0)
+        index = pd.date_range('2001/01/01', periods=6*24*365*3, freq='10Min')
+        self.data = pd.DataFrame(rs.weibull(2, (len(index), 2))*8,
+                                 index=index,
+                                 columns=[('WS Max 1', 80), ('WS Max 2', 40)])
+
+    def test_block_maxima(self):
+        '''Test annual and monthly maxima against a pandas groupby'''
+        annual = extremes.block_maxima(self.data)
+        test_max = self.data.groupby(self.data.index.year).max()
+
+        assert len(annual) == 3
+        np.testing.assert_almost_equal(annual.values, test_max.values)
+        monthly = extremes.block_maxima(self.data.iloc[:-1000], freq='M',
+                                        min_coverage=0.9)
+        assert len(monthly) == 36
+        assert monthly.iloc[-1].isnull().all()
+        assert monthly.iloc[:-1].notnull().all().all()
+
+    def test_peaks_over_threshold(self):
+        '''Test storm declustering'''
+        data = pd.DataFrame({'WS': [1., 30., 31., 1., 1., 25., 1.]},
+                            index=pd.date_range('2001/01/01', periods=7,
+                                                freq='1H'))
+        peaks = extremes.peaks_over_threshold(data, threshold=20,
+                                              separation=2)['WS']
+        assert peaks.tolist() == [31, 25]
+        assert peaks.index[0] == pd.Timestamp('2001/01/01 02:00')
+        merged = extremes.peaks_over_threshold(data, threshold=20,
+                                               separation=4)['WS']
+        assert merged.tolist() == [31]
+
+    def test_fit(self):
+        '''Test fits and return levels on large samples'''
+        sample = spystats.genextreme.rvs(-0.1, loc=30, scale=3,
+                                         size=(5000, 2), random_state=1)
+        gev = extremes.fit(sample, dist='gev')
+        np.testing.assert_allclose(gev['shape'], -0.1, atol=0.03)
+        np.testing.assert_allclose(gev['loc'], 30, rtol=0.01)
+        level = extremes.return_level(gev, period=50)
+        np.testing.assert_allclose(
+            level, spystats.genextreme.ppf(1 - 1/50, -0.1, 30, 3), rtol=0.02)
+
+        gumbel = extremes.fit(spystats.gumbel_r.rvs(loc=25, scale=2,
+                                                    size=5000,
+                                                    random_state=2))
+        np.testing.assert_allclose(gumbel['scale'], 2, rtol=0.05)
+        nt.assert_raises(ValueError, extremes.fit, sample, dist='weibull')
+
+    def test_bootstrap(self):
+        '''Test bootstrap intervals bracket the estimate and are
+        repeatable'''
+        maxima = extremes.block_maxima(self.data, freq='M').values
+        level = extremes.return_level(extremes.fit(maxima), period=50,
+                                      blocks_per_year=12)
+        lower, upper = extremes.bootstrap(maxima, blocks_per_year=12,
+                                          samples=200, processes=1)
+        assert (lower < level).all() and (level < upper).all()
+        again = extremes.bootstrap(maxima, blocks_per_year=12, samples=200,
+                                   processes=1)
+        np.testing.assert_array_equal(lower, again[0])
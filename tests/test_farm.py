@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+'''
+Test Farm
+-------
+
+Test the multi-mast Site with nosetests
+
+'''
+from __future__ import division
+import numpy as np
+import pandas as pd
+import nose.tools as nt
+
+import climatic as cl
+from climatic import farm
+
+
+class TestSite():
+    '''Test alignment, views and the pairwise matrices'''
+
+    def setup(self):
+        rs = np.random.RandomState(0)
+        index = pd.date_range('2010/01/01', periods=2000, freq='10Min')
+        base = rs.weibull(2, 2000)*8
+        self.masts = []
+        for num in range(3):
+            mast = cl.MetMast()
+            rows = slice(num*100, 1500 + num*100)
+            speeds = base[rows]*(1 + 0.1*num) + rs.normal(0, 0.5, 1500)
+            mast.data = pd.DataFrame({('WS Mean 1', 80): speeds,
+                                      ('WS Mean 2', 40): speeds*0.9},
+                                     index=index[rows],
+                                     columns=[('WS Mean 1', 80),
+                                              ('WS Mean 2', 40)])
+            self.masts.append(mast)
+        self.site = farm.Site(self.masts)
+
+    def test_alignment(self):
+        '''Test the shared axis and zero-copy views'''
+        assert len(self.site.index) == 1700
+        view = self.site.values('Mast 2')
+        assert np.shares_memory(view, self.site.block)
+        data = self.site.view('Mast 2').dropna()
+        assert data.index.equals(self.masts[1].data.index)
+        np.testing.assert_array_equal(data.values, self.masts[1].data.values)
+
+    def test_time_zones(self):
+        '''Test aware masts align in UTC and mixed masts raise'''
+        aware = []
+        for mast, zone in zip(self.masts[:2], ['US/Eastern', 'US/Pacific']):
+            local = cl.MetMast()
+            local.data = mast.data.tz_localize(zone)
+            aware.append(local)
+        site = farm.Site(aware)
+        nt.assert_equal(site.index[0], aware[0].data.index[0])
+        union = aware[0].data.index.union(aware[1].data.index)
+        assert site.index.equals(union.tz_convert('UTC'))
+        nt.assert_raises(ValueError, farm.Site, [aware[0], self.masts[1]])
+
+    def test_matrices(self):
+        '''Test pairwise matrices against pandas on concurrent data'''
+        ws = ('WS Mean 1', 80)
+        joined = pd.concat([self.masts[0].data[ws], self.masts[2].data[ws]],
+                           axis=1).dropna()
+        coverage = self.site.coverage()
+        nt.assert_almost_equal(coverage.loc['Mast 1', 'Mast 3'],
+                               len(joined)/1700)
+        nt.assert_almost_equal(self.site.correlation().loc['Mast 1',
+                                                           'Mast 3'],
+                               joined.corr().iloc[0, 1])
+        ratio = self.site.speed_ratio()
+        nt.assert_almost_equal(ratio.loc['Mast 3', 'Mast 1'],
+                               joined.iloc[:, 1].mean()/
+                               joined.iloc[:, 0].mean())
+        nt.assert_almost_equal(ratio.loc['Mast 1', 'Mast 1'], 1)
@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+'''
+Test Instrument
+-------
+
+Test the instrument module with nosetests
+
+'''
+import json
+
+from climatic import instrument
+
+
+class TestInstrument():
+    '''Test stage recording and reports'''
+
+    def setup(self):
+        instrument.reset()
+
+    def teardown(self):
+        instrument.disable()
+        instrument.reset()
+
+    def test_disabled(self):
+        '''Test nothing is recorded while disabled'''
+        with instrument.stage('read') as timer:
+            timer.rows = 10
+
+        assert instrument.report() == []
+
+    def test_nested_stages(self):
+        '''Test nested stage names, row counts and the JSON report'''
+        instrument.enable()
+        with instrument.stage('wind_import'):
+            with instrument.stage('read') as timer:
+                timer.rows = 10
+        report = json.loads(instrument.report_json())
+
+        assert [x['stage'] for x in report['stages']] == ['wind_import/read',
+                                                          'wind_import']
+        assert report['stages'][0]['rows'] == 10
+        assert report['stages'][1]['seconds'] >= report['stages'][0]['seconds']
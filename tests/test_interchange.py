@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+'''
+Test Interchange
+-------
+
+Test Arrow interchange of mast data and results with nosetests. Skipped
+when pyarrow is not installed.
+
+'''
+from __future__ import division
+import os
+import shutil
+import tempfile
+from unittest import SkipTest
+import numpy as np
+import pandas as pd
+import nose.tools as nt
+
+from climatic import interchange, MetMast
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+
+class TestArrow():
+    '''Test tables, IPC streams and memory mapped files'''
+
+    def setup(self):
+        if pyarrow is None:
+            raise SkipTest('pyarrow is not installed')
+        self.directory = tempfile.mkdtemp()
+        rs = np.random.RandomState(0)
+        index = pd.date_range('2001/01/01', periods=1000, freq='10Min',
+                              tz='US/Eastern')
+        columns = [('WS Mean 1', 80), ('WD Mean 1', 78)]
+        self.mast = MetMast(lat=45.5, lon=-122.7, height=80,
+                            time_zone='US/Eastern')
+        self.mast.data = pd.DataFrame(rs.rand(1000, 2)*10, index=index,
+                                      columns=pd.Index(columns))
+        self.mast.data.iloc[5, 0] = np.nan
+        self.mast.interval = 600
+        self.mast.data_binned_WS = pd.DataFrame({'Count': [4., 6.]},
+                                                index=['[0-1]', '[1-2]'])
+
+    def teardown(self):
+        if pyarrow is not None:
+            shutil.rmtree(self.directory)
+
+    def check_mast(self, mast):
+        nt.assert_equal(mast.data.columns.tolist(),
+                        self.mast.data.columns.tolist())
+        np.testing.assert_array_equal(mast.data.values,
+                                      self.mast.data.values)
+        assert mast.data.index.equals(self.mast.data.index)
+        nt.assert_equal(mast.time_zone, 'US/Eastern')
+        nt.assert_equal(mast.interval, 600)
+
+    def test_zero_copy(self):
+        '''Test that numeric columns share buffers in both directions'''
+        table = self.mast.to_arrow()
+        values = self.mast.data[('WS Mean 1', 80)].values
+        buffer = table.column(1).chunk(0).buffers()[1]
+        nt.assert_equal(buffer.address, values.ctypes.data)
+        frame = interchange.read_frame(table)
+        nt.assert_equal(frame[('WS Mean 1', 80)].values.ctypes.data,
+                        buffer.address)
+        nt.assert_equal(table.column_names[1], 'WS Mean 1 | 80')
+
+    def test_ipc(self):
+        '''Test an IPC stream round trip'''
+        mast = MetMast()
+        mast.arrow_import(interchange.to_ipc(self.mast.to_arrow()))
+        self.check_mast(mast)
+        nt.assert_equal(mast.lat, 45.5)
+
+    def test_file(self):
+        '''Test memory mapped files with binned results'''
+        path = os.path.join(self.directory, 'mast.arrow')
+        paths = self.mast.arrow_export(path)
+        nt.assert_equal(paths[1], os.path.join(self.directory,
+                                               'mast.binned_WS.arrow'))
+        mast = MetMast()
+        mast.data_binned_WD = pd.DataFrame({'Count': [1.]})
+        mast.arrow_import(path)
+        self.check_mast(mast)
+        binned = mast.data_binned_WS
+        nt.assert_equal(binned.index.tolist(), ['[0-1]', '[1-2]'])
+        nt.assert_equal(binned['Count'].tolist(), [4, 6])
+        assert not hasattr(mast, 'data_binned_WD')
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+'''
+Test Loggers
+-------
+
+Test the logger file reader with nosetests
+
+'''
+from __future__ import division
+import os
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+from climatic import loggers
+
+
+class TestLoggers():
+    '''Test logger detection and timestamp parsing'''
+
+    def setup(self):
+        pkg_dir, filename = os.path.split(os.path.abspath(__file__))
+        self.beresford = os.path.join(pkg_dir,
+                                      r'data/USDOE_beresford_051201.csv')
+        self.simple = os.path.join(pkg_dir, r'data/test_data_import.csv')
+
+    def test_sniff(self):
+        '''Test logger, header and timestamp format detection'''
+        info = loggers.sniff(self.beresford)
+
+        assert info['logger'] == 'NRG 9200'
+        assert info['delimiter'] == ','
+        assert info['names'][1] == 'Average Speed'
+        assert info['time_format'] == '%m/%d/%y %H:%M'
+        assert info['text_columns'] == []
+        assert loggers.sniff(self.simple)['text_columns'] == [7]
+
+    def test_read_logger(self):
+        '''Test the reader keeps numeric and text columns'''
+        data = loggers.read_logger(self.simple)
+
+        assert len(data) == 15
+        assert data.index[0] == pd.Timestamp('2005-12-01 16:40')
+        assert data['Mean WS 1'].dtype == np.float64
+        assert data['Binned Dir'].iloc[0] == '[105-120]'
+
+    def test_parse_times(self):
+        '''Test the fixed width parser against strptime, and the fallback
+        for stamps of varying width'''
+        fmt = '%d.%m.%Y %H:%M:%S'
+        stamps = ['29.02.2004 00:10:00', '31.12.1999 23:59:59',
+                  '01.01.2010 12:00:30']
+        expected = [np.datetime64(datetime.strptime(x, fmt), 'ns')
+                    for x in stamps]
+        parsed = loggers.parse_times(stamps, fmt).view('datetime64[ns]')
+        assert parsed.tolist() == np.array(expected).tolist()
+
+        stamps = ['1/2/05 1:00', '12/2/05 10:00']
+        parsed = loggers.parse_times(stamps, '%m/%d/%y %H:%M')
+        expected = pd.to_datetime(stamps, format='%m/%d/%y %H:%M')
+        assert pd.DatetimeIndex(parsed.view('datetime64[ns]')).equals(expected)
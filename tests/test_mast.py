@@ -8,6 +8,7 @@ Test the MetMast class with nosetests
 '''
 
 from __future__ import print_function
+from __future__ import division
 import os
 import pandas as pd
 import numpy as np
@@ -158,3 +159,291 @@ class TestMast():
                                 
         
         
+
+    def test_binned_directions(self):
+        '''Test vector averaging of direction channels when binning'''
+
+        directions = np.full(15, 180.)
+        directions[[0, 4]] = [359, 1]
+        self.simple_mast.data[('Wind Direction 1', 50)] = directions
+        self.simple_mast.binned(column=('Wind Speed 1 Mean', 50),
+                                bins=np.array([0, 5, 10]), name='Speeds')
+        binned = self.simple_mast.data_binned_Speeds[('Wind Direction 1', 50)]
+        nt.assert_almost_equal(binned['[0-5]'] % 360, 0)
+
+        sectors = self.simple_mast.sectorwise(column=('Wind Direction 1', 50),
+                                              plot=None,
+                                              speed=('Wind Speed 1 Mean', 50))
+        nt.assert_almost_equal(sectors['Mean Direction'][0] % 360, 0)
+
+    def test_interval(self):
+        '''Test sampling interval detection on import'''
+
+        assert self.simple_mast.interval == 600
+        assert self.simple_mast.hours_per_record() == 1/6
+        assert self.beresford.interval == 600
+
+    def test_localize(self):
+        '''Test time zone localisation on import'''
+
+        mast = cl.MetMast(time_zone='US/Eastern')
+        mast.logger_import(self.simple_import, columns=self.simple_cols,
+                           localize='standard')
+        nt.assert_equal(mast.data.index[0],
+                        pd.Timestamp('2005-12-01 21:40', tz='UTC'))
+        nt.assert_equal(mast.tz_report['unplaced'], 0)
+        assert mast.interval == 600
+        nt.assert_raises(ValueError, cl.MetMast().logger_import,
+                         self.simple_import, localize='standard')
+
+    def test_logger_import(self):
+        '''Test logger import against the read_table import'''
+
+        mast = cl.MetMast()
+        mast.logger_import(self.beres_import, columns=self.beres_cols)
+        rows = len(self.beresford.data)
+        assert_almost_equal(mast.data.values[-rows:],
+                            self.beresford.data.values)
+        nt.assert_equal(mast.data.index[0], pd.Timestamp('2005-12-01 16:40'))
+        assert mast.interval == 600
+
+        mast.logger_import([self.simple_import], columns=self.simple_cols)
+        nt.assert_equal(mast.data.columns.tolist(), self.simple_cols)
+        assert_almost_equal(mast.data, self.simple_mast.data)
+
+    def test_resample(self):
+        '''Test block averaging, with directions vector averaged'''
+        index = pd.date_range('2013/01/01 00:00', periods=120, freq='1Min')
+        hf_mast = cl.MetMast()
+        hf_mast.data = pd.DataFrame({('WS Mean 1', 50): np.arange(120.),
+                                     ('WD Mean 1', 50): [359., 1.]*60},
+                                    index=index)
+        hf_mast._multidata = hf_mast.data
+        hf_mast.resample('10Min')
+
+        assert hf_mast.interval == 600
+        assert len(hf_mast._multidata) == 12
+
+        from climatic import resample
+        mixed = pd.DataFrame({('WS Mean 1', 50): np.arange(120.),
+                              ('Count', 50): np.arange(120),
+                              ('Flag', 50): ['a']*120}, index=index)
+        chunked = resample.block_average(mixed, '10Min', chunksize=7)
+        assert_almost_equal(chunked, resample.block_average(mixed, '10Min'))
+        nt.assert_almost_equal(chunked[('Count', 50)].iloc[1], 14.5)
+        assert len(hf_mast.data) == 12
+        nt.assert_almost_equal(hf_mast.data[('WS Mean 1', 50)].iloc[0], 4.5)
+        nt.assert_almost_equal(hf_mast.data[('WD Mean 1', 50)].iloc[0], 0)
+
+    def test_turbulence(self):
+        '''Test turbulence intensity binning for all sensors at once'''
+        ti = self.simple_mast.turbulence(min_count=1)
+        ws1 = ('Wind Speed 1 Mean', 50)
+        std1 = ('Wind Speed Std Dev 1', 50)
+        data = self.simple_mast.data
+        in_bin = (data[ws1] >= 9.5) & (data[ws1] < 10.5)
+        test_mean = (data[std1]/data[ws1])[in_bin].mean()
+
+        assert sorted(ti['IEC Category'].keys()) == [('Wind Speed 1 Mean', 50),
+                                                     ('Wind Speed 2 Mean', 40)]
+        assert ti['TI'][ws1 + ('Count',)].sum() == len(data)
+        nt.assert_almost_equal(ti['TI'][ws1 + ('TI Mean',)][10], test_mean)
+
+    def test_turbulence_empty(self):
+        '''Test turbulence with every record masked or missing'''
+        ws1 = ('Wind Speed 1 Mean', 50)
+        mask = np.zeros(len(self.simple_mast.data), dtype=bool)
+        ti = self.simple_mast.turbulence(mask=mask)
+
+        assert ti['TI'].empty
+        nt.assert_equal(ti['IEC Category'][ws1], None)
+        empty = cl.MetMast()
+        empty.data = self.simple_mast.data.iloc[:0]
+        assert empty.turbulence()['TI'].empty
+
+    def test_extremes(self):
+        '''Test extreme wind estimation from monthly maxima'''
+        ws = ('Wind Speed 1', 66)
+        vref = self.beresford.extremes(freq='M')
+        data = self.beresford.data[ws]
+
+        assert vref['Params'].index.tolist() == [ws]
+        nt.assert_equal(vref['Maxima'][ws].max(), data.max())
+        assert vref['Params']['Return Level'][ws] > data.max()
+
+    def test_extremes_channels(self):
+        '''Test only wind speed maxima and gusts are picked by default'''
+        index = pd.date_range('2001/01/01', periods=6*24*365*2, freq='10Min')
+        rs = np.random.RandomState(0)
+        columns = [('WS Max 1', 80), ('Gust 2', 60), ('Temp Max', 2),
+                   ('TI Max', 80), ('Rho Max', 2), ('WS Mean 1', 80)]
+        mast = cl.MetMast()
+        mast.data = pd.DataFrame(rs.weibull(2, (len(index), 6))*8,
+                                 index=index, columns=columns)
+        vref = mast.extremes()
+
+        assert vref['Params'].index.tolist() == [('WS Max 1', 80),
+                                                 ('Gust 2', 60)]
+
+    def test_uncertainty(self):
+        '''Test block bootstrap intervals of Weibull and sector results'''
+        from climatic import weibull_est as west
+        ws, wd = ('Wind Speed 1', 66), ('Wind Direction 1', 66)
+        spread = self.beresford.uncertainty(column=ws, direction=wd,
+                                            samples=200)
+        weibull = spread['Weibull']
+        data = self.beresford.data[ws]
+
+        assert weibull.index.tolist() == ['Weibull A', 'Weibull k']
+        np.testing.assert_allclose(weibull['Estimate'].values,
+                                   west.euro_atlas(data[data.notnull()]),
+                                   rtol=2e-3)
+        assert (weibull['Lower'] <= weibull['Estimate']).all()
+        assert (weibull['Estimate'] <= weibull['Upper']).all()
+        nt.assert_almost_equal(spread['Sectorwise']['Estimate'].sum(), 1)
+
+    def test_variability(self):
+        '''Test monthly windows and calendar years for every height'''
+        ws = ('Wind Speed 1', 66)
+        var = self.beresford.variability(window=1)
+        data = self.beresford.data[ws]
+
+        assert var['Annual']['Mean'].index.tolist() == [2005, 2006]
+        nt.assert_almost_equal(var['Rolling']['Mean'][ws].iloc[1],
+                               data['2006-01'].mean())
+        assert var['Rolling']['Sectorwise'][ws].shape == (2, 12)
+        assert np.isnan(var['IAV'][ws])
+
+    def test_power_density(self):
+        '''Test power density for all heights with ISA density'''
+        wpd = self.simple_mast.power_density()
+        ws1 = ('Wind Speed 1 Mean', 50)
+        isa = wpd['Density'][ws1].iloc[0]
+
+        nt.assert_almost_equal(wpd['Mean'][ws1],
+                               0.5*isa*(self.simple_mast.data[ws1]**3).mean())
+        assert wpd['Density'][('Wind Speed 2 Mean', 40)].iloc[0] > isa
+        nt.assert_almost_equal(wpd['Monthly'][ws1][12], wpd['Mean'][ws1])
+        assert wpd['Sectorwise'][ws1].notnull().sum() == 4
+
+    def test_cache(self):
+        '''Test memoized results and invalidation on data changes'''
+        wd = ('Wind Direction 1', 50)
+        mast = self.simple_mast
+        assert mast.cache_stats() is None
+        mast.enable_cache(maxsize=2)
+        first = mast.sectorwise(column=wd, plot=None)
+        counts = first['Counts'].copy()
+        first['Counts'].iloc[:] = -1
+
+        again = mast.sectorwise(wd, plot=None)
+        nt.assert_equal(mast.cache_stats()['hits'], 1)
+        assert again['Counts'].equals(counts)
+        mast.data[wd] = 200.
+        mast.touch()
+        changed = mast.sectorwise(column=wd, plot=None)
+        nt.assert_equal(mast.cache_stats()['hits'], 1)
+        nt.assert_equal(changed['Counts'][210], len(mast.data))
+        mast.data = mast.data.iloc[:5]
+        nt.assert_equal(mast.sectorwise(column=wd, plot=None)['Counts'].sum(),
+                        5)
+        nt.assert_equal(mast.cache_stats()['evictions'], 1)
+
+    def test_mcp(self):
+        '''Test the concurrent count leaves out missing pairs'''
+        index = pd.date_range('2013/01/01 00:00', periods=100, freq='10Min')
+        base = np.linspace(3, 15, 100)
+        site = cl.MetMast()
+        site.data = pd.DataFrame({('WS Mean 1', 80): 1.2*base}, index=index)
+        site.data.iloc[:5, 0] = np.nan
+        ref = pd.DataFrame({('WS Mean 1', 50): base}, index=index)
+        ref.iloc[50:53, 0] = np.nan
+        lt = site.mcp(ref, column=('WS Mean 1', 80),
+                      ref_column=('WS Mean 1', 50))
+
+        nt.assert_equal(lt['Concurrent'], 92)
+        nt.assert_almost_equal(lt['Params']['Slope'], 1.2)
+
+    def test_cache_reference(self):
+        '''Test mcp results are cached for the same reference data'''
+        ws1, ws2 = ('Wind Speed 1 Mean', 50), ('Wind Speed 2 Mean', 40)
+        mast = self.simple_mast
+        mast.enable_cache()
+        ref = mast.data.copy()
+        first = mast.mcp(ref, column=ws1, ref_column=ws2)
+
+        again = mast.mcp(ref.copy(), column=ws1, ref_column=ws2)
+        stats = mast.cache_stats()
+        assert (stats['hits'], stats['uncacheable']) == (1, 0)
+        assert again['Long Term'].equals(first['Long Term'])
+        mast.mcp(ref*2, column=ws1, ref_column=ws2)
+        nt.assert_equal(mast.cache_stats()['misses'], 2)
+
+    def test_qc(self):
+        '''Test the QC pipeline masks analysis methods'''
+        from climatic import qc
+        ws = ('Wind Speed 1 Mean', 50)
+        wd = ('Wind Direction 1', 50)
+        fired = self.simple_mast.qc([qc.out_of_range(ws, high=10),
+                                     qc.tower_shadow(wd, [(150, 170)], [ws])])
+        mask = self.simple_mast.qc_mask(ws)
+        sectors = self.simple_mast.sectorwise(column=wd, plot=None, mask=mask)
+
+        assert fired.tolist() == [5, 8]
+        assert mask.sum() == 6
+        assert self.simple_mast.qc_mask(wd).all()
+        assert sectors['Counts'].sum() == 6
+        self.simple_mast.data = self.simple_mast.data.iloc[:5]
+        assert self.simple_mast.qc_mask(ws).tolist() == [True]*5
+
+    def test_qc_fill_gaps(self):
+        '''Test QC flags survive gap filling, which keeps the rows'''
+        from climatic import qc
+        ws = ('Wind Speed 1 Mean', 50)
+        self.simple_mast.qc([qc.out_of_range(ws, high=10)])
+        mask = self.simple_mast.qc_mask(ws)
+        self.simple_mast.fill_gaps()
+
+        assert mask.sum() < len(mask)
+        assert self.simple_mast.qc_mask(ws).tolist() == mask.tolist()
+
+    def test_fill_gaps(self):
+        '''Test redundant sensor substitution and shear extrapolation'''
+        index = pd.date_range('2013/01/01 00:00', periods=300, freq='10Min')
+        base = np.linspace(3, 15, 300)
+        gap_mast = cl.MetMast()
+        gap_mast.data = pd.DataFrame({('WS Mean 1', 80): 1.2*base,
+                                      ('WS Mean 2', 80): 1.2*base + 0.1,
+                                      ('WS Mean 3', 40): base},
+                                     index=index)
+        truth = gap_mast.data.copy()
+        gap_mast.data.iloc[10:20, 0] = np.nan
+        gap_mast.data.iloc[200:210, 0:2] = np.nan
+        report = gap_mast.fill_gaps()
+
+        assert report['Redundant'].tolist() == [10, 0, 0]
+        assert report['Shear'].tolist() == [10, 10, 0]
+        assert report['Remaining'].sum() == 0
+        assert np.allclose(gap_mast.data.values[:200], truth.values[:200])
+
+    def test_fill_gaps_mask(self):
+        '''Test flagged rows are not used and the nearest height fills'''
+        index = pd.date_range('2013/01/01 00:00', periods=300, freq='10Min')
+        base = np.linspace(3, 15, 300)
+        gap_mast = cl.MetMast()
+        gap_mast.data = pd.DataFrame({('WS Mean 1', 80): 1.2*base,
+                                      ('WS Mean 2', 60): 1.1*base,
+                                      ('WS Mean 3', 40): base},
+                                     index=index)
+        gap_mast.data.iloc[100:150, 1] = 0
+        gap_mast.data.iloc[100:110, 0] = np.nan
+        gap_mast.data.iloc[200:210, 0] = np.nan
+        mask = np.ones(300, dtype=bool)
+        mask[100:150] = False
+        report = gap_mast.fill_gaps(mask=mask)
+
+        assert report['Shear'].tolist() == [10, 0, 0]
+        assert gap_mast.data.iloc[100:110, 0].isnull().all()
+        alpha = np.log(1.2/1.1)/np.log(80/60)
+        np.testing.assert_allclose(gap_mast.data.iloc[200:210, 0],
+                                   1.1*base[200:210]*(80/60)**alpha)
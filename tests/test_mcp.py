@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+'''
+Test MCP
+-------
+
+Test the mcp module with nosetests
+
+'''
+from __future__ import division
+import numpy as np
+import pandas as pd
+import nose.tools as nt
+
+from climatic import mcp
+
+
+class TestMCP():
+    '''Test the fitting and prediction functions of the mcp module'''
+
+    def setup(self):
+        rs = np.random.RandomState(42)
+        self.ref_ws = rs.weibull(2, 5000)*8
+        self.ref_wd = rs.rand(5000)*360
+        north = (self.ref_wd < 15) | (self.ref_wd >= 345)
+        self.site_ws = np.where(north, 1.5, 1.1)*self.ref_ws + 0.2
+
+    def test_align(self):
+        '''Test concurrent period alignment'''
+        site = pd.date_range('2012/01/01', periods=10, freq='1H')
+        ref = pd.date_range('2012/01/01 05:00', periods=10, freq='1H')
+        site_pos, ref_pos = mcp.align(site, ref)
+
+        assert site_pos.tolist() == [5, 6, 7, 8, 9]
+        assert ref_pos.tolist() == [0, 1, 2, 3, 4]
+
+    def test_linreg(self):
+        '''Test the linear regression and variance ratio methods'''
+        linear = 1.1*self.ref_ws + 0.2
+        for method in ['LinReg', 'VarRatio']:
+            params = mcp.fit(linear, self.ref_ws, method=method)
+            nt.assert_almost_equal(params['Slope'], 1.1)
+            nt.assert_almost_equal(params['Offset'], 0.2)
+
+    def test_sectorwise(self):
+        '''Test the sectorwise method recovers each sector fit'''
+        params = mcp.fit(self.site_ws, self.ref_ws, ref_wd=self.ref_wd,
+                         method='Sectorwise', sectors=12)
+        predicted = mcp.predict(params, self.ref_ws, self.ref_wd)
+
+        nt.assert_almost_equal(params['Sector Slope'][0], 1.5)
+        nt.assert_almost_equal(params['Sector Slope'][6], 1.1)
+        assert np.allclose(predicted, self.site_ws)
+
+    def test_matrix(self):
+        '''Test the matrix method keeps the concurrent mean'''
+        params = mcp.fit(self.site_ws, self.ref_ws, ref_wd=self.ref_wd,
+                         method='Matrix', min_points=1)
+        predicted = mcp.predict(params, self.ref_ws, self.ref_wd)
+
+        nt.assert_almost_equal(predicted.mean(), self.site_ws.mean(),
+                               places=5)
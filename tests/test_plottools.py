@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+'''
+Test Plottools
+-------
+
+Test the batch wind rose rendering with nosetests
+
+'''
+from __future__ import division
+import os
+import shutil
+import tempfile
+import numpy as np
+import nose.tools as nt
+
+from climatic import plottools
+
+
+class TestRoses():
+    '''Test the reusable rose figure and batch rendering'''
+
+    def setup(self):
+        self.directory = tempfile.mkdtemp()
+        rs = np.random.RandomState(0)
+        self.roses = [(('WD Mean {0}'.format(x), 80 - 10*x),
+                       rs.dirichlet(np.ones(12))) for x in range(3)]
+
+    def teardown(self):
+        shutil.rmtree(self.directory)
+
+    def test_renderer(self):
+        '''Test bars are updated in place on one figure'''
+        renderer = plottools.RoseRenderer(sectors=12)
+        for name, freqs in self.roses:
+            path = os.path.join(self.directory, 'rose.png')
+            renderer.render(freqs, path)
+            heights = [x.get_height() for x in renderer.bars]
+            np.testing.assert_almost_equal(heights, freqs)
+        assert len(renderer.fig.axes) == 1
+        nt.assert_raises(ValueError, renderer.render, np.ones(8), path)
+
+    def test_wind_roses(self):
+        '''Test batch rendering writes one file per rose, in order'''
+        paths = plottools.wind_roses(self.roses, self.directory, processes=1)
+
+        assert [os.path.basename(x) for x in paths] == \
+            ['WD_Mean_0_80.png', 'WD_Mean_1_70.png', 'WD_Mean_2_60.png']
+        assert all(os.path.getsize(x) > 0 for x in paths)
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+'''
+Test QC
+-------
+
+Test the qc module with nosetests
+
+'''
+from __future__ import division
+import numpy as np
+import pandas as pd
+
+from climatic import qc
+
+
+class TestQC():
+    '''Test the data quality rules and bitmask evaluation'''
+
+    def setup(self):
+        self.ws = ('WS Mean 1', 50)
+        self.wd = ('WD Mean 1', 50)
+        self.temp = ('Temp Mean 1', 2)
+        self.data = pd.DataFrame({self.ws: [5., 6., 99., 7., 7., 7., 7., 8.],
+                                  self.wd: [355., 5., 90., 90., 90., 90., 90.,
+                                            180.],
+                                  self.temp: [10., 10., 10., -5., -5., -5.,
+                                              -5., 10.]})
+
+    def test_out_of_range(self):
+        '''Test range checks'''
+        rule = qc.out_of_range(self.ws, 0, 50)
+
+        assert rule(self.data).tolist() == [False, False, True, False, False,
+                                            False, False, False]
+        assert rule.columns == [self.ws]
+
+    def test_flat_line(self):
+        '''Test rolling-window flat line detection'''
+        rule = qc.flat_line(self.ws, window=4)
+        short = qc.flat_line(self.ws, window=5)
+
+        assert rule(self.data).tolist() == [False, False, False, True, True,
+                                            True, True, False]
+        assert not short(self.data).any()
+
+    def test_icing(self):
+        '''Test icing needs both cold temperatures and a stuck vane'''
+        rule = qc.icing(self.temp, self.wd, window=4)
+
+        assert rule(self.data).tolist() == [False, False, False, True, True,
+                                            True, True, False]
+
+    def test_tower_shadow(self):
+        '''Test shadow sectors, including sectors wrapping through north'''
+        rule = qc.tower_shadow(self.wd, [(350, 10), (170, 190)], [self.ws])
+
+        assert rule(self.data).tolist() == [True, True, False, False, False,
+                                            False, False, True]
+
+    def test_bitmask(self):
+        '''Test the compact bitmask and per-column validity'''
+        rules = [qc.out_of_range(self.ws, 0, 50),
+                 qc.tower_shadow(self.wd, [(350, 10)], [self.ws])]
+        flags = qc.evaluate(self.data, rules)
+
+        assert flags.dtype == np.uint8
+        assert flags.tolist() == [2, 2, 1, 0, 0, 0, 0, 0]
+        assert qc.valid(flags, rules, column=self.wd).all()
+        assert qc.valid(flags, rules, column=self.ws).sum() == 5
+        assert qc.valid(flags, rules, names=['Range {0}'.format(
+            self.ws)]).sum() == 7
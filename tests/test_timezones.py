@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+'''
+Test Time Zones
+-------
+
+Test time zone localisation with nosetests
+
+'''
+from __future__ import division
+import numpy as np
+import pandas as pd
+import nose.tools as nt
+
+from climatic import timezones
+
+
+class TestTimeZones():
+    '''Test standard time and clock time localisation'''
+
+    def setup(self):
+        self.zone = 'US/Eastern'
+        utc = pd.date_range('2012/03/10', '2012/11/05', freq='10Min',
+                            tz='UTC')
+        self.local = utc.tz_convert(self.zone)
+        self.clock = self.local.tz_localize(None)
+
+    def test_standard(self):
+        '''Test that standard time is a fixed shift all year'''
+        index = pd.date_range('2012/01/01', periods=6*24*365, freq='10Min')
+        local, report = timezones.localize(index, self.zone)
+        expected = (index + pd.Timedelta(hours=5)).tz_localize('UTC')
+        assert local.equals(expected.tz_convert(self.zone))
+        nt.assert_equal(report['unplaced'], 0)
+        assert 0 < report['dst'] < len(index)
+        southern = pd.DatetimeIndex(['2012/01/15 12:00', '2012/07/15 12:00'])
+        local, report = timezones.localize(southern, 'Australia/Sydney')
+        nt.assert_equal(local[0].hour, 13)
+        nt.assert_equal(local[1].hour, 12)
+
+    def test_observed(self):
+        '''Test that clock time with both copies of the repeated hour
+        round trips, and the report of affected rows'''
+        local, report = timezones.localize(self.clock, self.zone,
+                                           mode='observed')
+        assert local.equals(self.local)
+        nt.assert_equal(len(report['ambiguous']), 12)
+        nt.assert_equal(len(report['nonexistent']), 0)
+
+    def test_transitions(self):
+        '''Test handling of single copies of the repeated hour and of the
+        skipped hour'''
+        clock = pd.DatetimeIndex(['2012/03/11 01:00', '2012/03/11 02:30',
+                                  '2012/03/11 03:00', '2012/11/04 01:00'])
+        ambiguous, nonexistent = timezones.transitions(clock, self.zone)
+        assert ambiguous.tolist() == [False, False, False, True]
+        assert nonexistent.tolist() == [False, True, False, False]
+        nt.assert_raises(ValueError, timezones.localize, clock, self.zone,
+                         mode='observed')
+        local, report = timezones.localize(clock, self.zone, mode='observed',
+                                           ambiguous='last')
+        nt.assert_equal(report['unplaced'], 1)
+        assert np.asarray(local.isnull()).tolist() == [False, True, False,
+                                                       False]
+        nt.assert_equal(local[3].utcoffset(), pd.Timedelta(hours=-5))
+        shifted, report = timezones.localize(clock, self.zone,
+                                             mode='observed',
+                                             ambiguous='first',
+                                             nonexistent='shift_forward')
+        nt.assert_equal(shifted[1].hour, 3)
+        nt.assert_equal(shifted[3].utcoffset(), pd.Timedelta(hours=-4))
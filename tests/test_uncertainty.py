@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+'''
+Test Uncertainty
+-------
+
+Test the block bootstrap module with nosetests
+
+'''
+from __future__ import division
+import numpy as np
+import pandas as pd
+import nose.tools as nt
+
+from climatic import uncertainty
+from climatic import weibull_est as west
+
+
+class TestUncertainty():
+    '''Test block summaries, replicate estimates and the bootstrap'''
+
+    def setup(self):
+        rs = np.random.RandomState(0)
+        self.index = pd.date_range('2001/01/01', periods=6*24*365,
+                                   freq='10Min')
+        self.ws = rs.weibull(2, len(self.index))*7
+        self.ws[::50] = np.nan
+        self.wd = rs.uniform(0, 360, len(self.index))
+        self.codes, self.nblocks = uncertainty.block_codes(self.index)
+        self.stats = uncertainty.block_stats(self.ws, self.codes,
+                                             self.nblocks,
+                                             directions=self.wd)
+
+    def test_block_codes(self):
+        '''Test day and month blocks'''
+        nt.assert_equal(self.nblocks, 365)
+        codes, nblocks = uncertainty.block_codes(self.index, block='M')
+        nt.assert_equal(nblocks, 12)
+        nt.assert_equal(codes[-1], 11)
+        nt.assert_raises(ValueError, uncertainty.block_codes, self.index,
+                         block='H')
+
+    def test_full_record(self):
+        '''Test that unit weights reproduce the fits of the whole record'''
+        full = uncertainty.estimate(self.stats, np.ones(self.nblocks))
+        A, k = west.euro_atlas(self.ws)
+        np.testing.assert_allclose([full['A'][0], full['k'][0]], [A, k],
+                                   rtol=2e-3)
+        counts = np.bincount(np.floor((self.wd + 15) % 360/30).astype(int),
+                             minlength=12)
+        np.testing.assert_almost_equal(full['Frequencies'][0],
+                                       counts/counts.sum())
+
+    def test_sentinels(self):
+        '''Test that sentinels and implausible speeds are left out'''
+        ws = self.ws.copy()
+        ws[[10, 20, 30]] = [-9999., np.inf, 1e6]
+        stats = uncertainty.block_stats(ws, self.codes, self.nblocks)
+        clean = ws.copy()
+        clean[[10, 20, 30]] = np.nan
+        expected = uncertainty.block_stats(clean, self.codes, self.nblocks)
+
+        for key in ('n', 'sum', 'cubes', 'fine', 'bins'):
+            np.testing.assert_array_equal(stats[key], expected[key])
+        assert stats['fine'].shape[1] <= uncertainty.MAX_WS/0.05 + 1
+
+    def test_estimate_in_interval(self):
+        '''Test the full record estimate lies within the replicates'''
+        full = uncertainty.estimate(self.stats, np.ones(self.nblocks))
+        replicates = uncertainty.bootstrap(self.stats, samples=500,
+                                           processes=1)
+        for key in ('A', 'k'):
+            lower, upper = uncertainty.intervals(replicates[key])
+            assert lower < full[key][0] < upper
+            nt.assert_almost_equal(np.median(replicates[key]), full[key][0],
+                                   delta=(upper - lower)/4)
+
+    def test_replicate(self):
+        '''Test a replicate against the resampled record'''
+        weights = uncertainty.replicate_weights(self.nblocks, 1, seed=3)
+        nt.assert_equal(weights.sum(), self.nblocks)
+        picks = np.repeat(np.arange(self.nblocks), weights[0].astype(int))
+        resampled = np.concatenate([self.ws[self.codes == x] for x in picks])
+        A, k = west.euro_atlas(resampled[~np.isnan(resampled)])
+        fit = uncertainty.estimate(self.stats, weights)
+        np.testing.assert_allclose([fit['A'][0], fit['k'][0]], [A, k],
+                                   rtol=2e-3)
+
+    def test_bootstrap(self):
+        '''Test that batches are seeded independently of the processes'''
+        serial = uncertainty.bootstrap(self.stats, samples=300, batch=100,
+                                       processes=1)
+        pooled = uncertainty.bootstrap(self.stats, samples=300, batch=100,
+                                       processes=2)
+        for key in serial:
+            np.testing.assert_array_equal(serial[key], pooled[key])
+        nt.assert_equal(serial['Frequencies'].shape, (300, 12))
+        lower, upper = uncertainty.intervals(serial['A'])
+        A = west.euro_atlas(self.ws)[0]
+        assert lower < A < upper
+        least_sq = uncertainty.bootstrap(self.stats, samples=50,
+                                         method='LeastSq')
+        assert np.isfinite(least_sq['k']).all()
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+'''
+Test Variability
+-------
+
+Test the rolling and interannual variability module with nosetests
+
+'''
+from __future__ import division
+import numpy as np
+import pandas as pd
+import nose.tools as nt
+
+from climatic import variability
+from climatic import weibull_est as west
+
+
+class TestVariability():
+    '''Test monthly prefix sums and window statistics'''
+
+    def setup(self):
+        rs = np.random.RandomState(0)
+        self.index = pd.date_range('2001/03/01', '2004/06/30 23:50',
+                                   freq='10Min')
+        self.ws = pd.Series(rs.weibull(2, len(self.index))*7,
+                            index=self.index)
+        self.wd = rs.uniform(0, 360, len(self.index))
+        self.codes, self.months = variability.month_codes(self.index)
+        self.found = variability.windows(self.ws.values, self.codes,
+                                         self.months, directions=self.wd,
+                                         interval=600)
+
+    def test_month_codes(self):
+        '''Test months counted from the start of the record'''
+        nt.assert_equal(len(self.months), 40)
+        nt.assert_equal(self.codes[0], 0)
+        nt.assert_equal(self.codes[-1], 39)
+        nt.assert_equal(str(self.months[10]), '2002-01')
+
+    def test_rolling(self):
+        '''Test rolling windows against the raw data'''
+        rolling = self.found['Rolling']
+        nt.assert_equal(len(rolling['Mean']), 29)
+        nt.assert_equal(str(rolling['Labels'][0]), '2002-02')
+        window = self.ws['2002-03':'2003-02']
+        nt.assert_almost_equal(rolling['Mean'][12], window.mean())
+        A, k = west.euro_atlas(window.values)
+        np.testing.assert_allclose([rolling['A'][12], rolling['k'][12]],
+                                   [A, k], rtol=2e-3)
+        np.testing.assert_allclose(rolling['Frequencies'].sum(axis=1), 1)
+
+    def test_annual(self):
+        '''Test calendar years, coverage and interannual variability'''
+        annual = self.found['Annual']
+        assert annual['Labels'].tolist() == [2001, 2002, 2003, 2004]
+        nt.assert_almost_equal(annual['Mean'][1], self.ws['2002'].mean())
+        np.testing.assert_allclose(annual['Coverage'], [306/365, 1, 1,
+                                                        182/366])
+        means = annual['Mean'][1:3]
+        nt.assert_almost_equal(variability.interannual(annual),
+                               np.std(means, ddof=1)/np.mean(means))
+        found = variability.windows(self.ws.values, self.codes, self.months,
+                                    interval=600, min_coverage=0.9)
+        assert np.isnan(found['Annual']['A'][[0, 3]]).all()
+        assert 'Frequencies' not in found['Annual']
+
+    def test_sentinels(self):
+        '''Test that sentinels and outliers are left out of the windows'''
+        ws = self.ws.values.copy()
+        ws[[100, 5000]] = [-9999., 1e6]
+        found = variability.windows(ws, self.codes, self.months,
+                                    interval=600)
+        clean = self.ws.copy()
+        clean.iloc[[100, 5000]] = np.nan
+        nt.assert_almost_equal(found['Annual']['Mean'][0],
+                               clean['2001'].mean())
+        nt.assert_equal(found['Annual']['Records'][0],
+                        clean['2001'].count())
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+'''
+Test Weibull Estimators
+-------
+
+Test the weibull fitting tools with nosetests
+
+'''
+from __future__ import division
+import numpy as np
+import scipy.optimize as spyopt
+
+from climatic import weibull_est as west
+
+
+def histogram(A, k, seed=0, bins=40):
+    ws = A*np.random.RandomState(seed).weibull(k, 5000)
+    counts = np.bincount(np.floor(ws).astype(int), minlength=bins)[:bins]
+    return counts/counts.sum()
+
+
+class TestWeibullEst():
+    '''Test the least squares fits against scipy leastsq'''
+
+    def setup(self):
+        self.x = np.arange(0, 40, 1.)
+
+    def test_jacobian(self):
+        '''Test the analytic derivatives against finite differences'''
+        x = self.x[1:]
+        f, df_dA, df_dk = west.pdf(7., 2.2, x)
+        step = 1e-6
+        np.testing.assert_allclose(
+            df_dA, (west.pdf(7. + step, 2.2, x)[0] - f)/step, atol=1e-6)
+        np.testing.assert_allclose(
+            df_dk, (west.pdf(7., 2.2 + step, x)[0] - f)/step, atol=1e-6)
+        assert west.pdf(7., 0.8, [0.])[0][0] == 0
+
+    def test_least_sq(self):
+        '''Test single fits against scipy leastsq from the old start'''
+        def residuals(p, y, x):
+            A, k = p
+            return y-k/A*(x/A)**(k-1)*np.exp(-(x/A)**k)
+        data = histogram(8, 2)
+        with np.errstate(all='ignore'):
+            test_fit = spyopt.leastsq(residuals, [10, 2],
+                                      args=(data, self.x))[0]
+
+        np.testing.assert_allclose(west.least_sq(data, self.x), test_fit,
+                                   rtol=1e-5)
+
+    def test_least_sq_batch(self):
+        '''Test batched fits match single fits, and converge on low wind
+        histograms'''
+        data = np.array([histogram(A, k, seed=num) for num, (A, k) in
+                         enumerate([(8, 2), (4, 1.5), (1.2, 1.5), (11, 3)])])
+        fits = west.least_sq_batch(data, self.x)
+
+        assert fits['converged'].all()
+        for num, row in enumerate(data):
+            np.testing.assert_allclose([fits['A'][num], fits['k'][num]],
+                                       west.least_sq(row, self.x), rtol=1e-6)
+        #scipy leastsq from the old [10, 2] start stalls near A=9, k=1
+        stalled = ((data[2] - west.pdf(9., 1., self.x)[0])**2).sum()
+        assert fits['cost'][2] < stalled
+        assert fits['A'][2] < 2